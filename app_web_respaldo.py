@@ -8,6 +8,8 @@ from datetime import timedelta, timezone
 import pandas as pd
 import time
 
+from modules import cpu_generacion
+
 # ==========================================
 # 1. CONFIGURACIÓN Y ESTILOS
 # ==========================================
@@ -172,22 +174,8 @@ def aprender_leccion(error, correccion):
 # UTILIDAD CPU (CLASIFICACIÓN GENERACIONAL)
 # ==========================================
 def extraer_gen(proc):
-    if not proc or str(proc).strip().lower() in ['n/a', '', 'nan']: 
-        return 'moderno' # Si no sabemos, lo tratamos como moderno para que no desaparezca
-    
-    p = str(proc).lower()
-    
-    # Lista de términos para equipos antiguos
-    obsoletos = ['4th', '5th', '6th', '7th', '8th', '9th', '4ta', '5ta', '6ta', '7ta', '8va', '9na', 'gen 8', 'gen 9']
-    if any(x in p for x in obsoletos):
-        return 'obsoleto'
-    
-    # Si detecta 10, 11, 12, 13, 14 es moderno
-    modernos = ['10th', '11th', '12th', '13th', '14th', '10ma', '11va', '12va', '13va', '14va', 'gen 10', 'gen 11', 'gen 12']
-    if any(x in p for x in modernos):
-        return 'moderno'
-    
-    return 'moderno' # Por defecto, si hay algo escrito y no es obsoleto, es moderno
+    # Mismo clasificador que la app modular (memoizado, Intel/AMD, ordinales ES/EN)
+    return cpu_generacion.clasificar(proc)
 
 # ==========================================
 # 4. MOTOR DE STOCK
@@ -206,7 +194,7 @@ def calcular_stock_web(df):
     df_c['cant_n'] = pd.to_numeric(df_c['cantidad'], errors='coerce').fillna(0)
 
     # ✅ AQUÍ VA LA LÍNEA QUE FALTABA (CRÍTICA)
-    df_c['gen_cpu'] = df_c['procesador'].apply(extraer_gen)
+    df_c['gen_cpu'] = cpu_generacion.clasificar_serie(df_c['procesador'])
 
     # Definiciones de tipos
     perifericos_list = [
@@ -0,0 +1,217 @@
+"""
+benchmarks/bench_buzon_pipeline.py
+Flujo completo buzón -> robot -> histórico contra el servidor falso de GitHub:
+N operadores concurrentes guardan registros (Chat) y mandan órdenes de borrado
+(Limpieza) por GitHubHandler mientras el robot simulado los procesa.
+
+Mide latencia de cada envío y de punta a punta (envío -> histórico), commits,
+conflictos, llamadas HTTP y la consistencia final del histórico: ningún registro
+perdido ni duplicado y solo se borró lo que se pidió.
+
+Uso:
+    python -m benchmarks.bench_buzon_pipeline
+    python -m benchmarks.bench_buzon_pipeline --operadores 8 --acciones 20 --latencia-ms 60
+    python -m benchmarks.bench_buzon_pipeline --buzon clasico
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+from benchmarks.bench_stock_calculator import generar_movimientos
+from benchmarks.fake_github import ServidorGitHubFalso
+from benchmarks.robot_simulado import RobotSimulado
+from config.settings import Config
+from modules.cache_contenido import CacheContenido
+from modules.github_handler import GitHubHandler
+from modules.refresco_historico import RefrescoHistorico
+
+
+def sembrar_historico(n, semilla):
+    """Histórico inicial con series únicas S-<i> (para verificar borrados)"""
+    df = generar_movimientos(n, semilla=semilla)
+    df["serie"] = [f"S-{i}" for i in range(n)]
+    return json.loads(df.to_json(orient="records"))
+
+
+def percentil(valores, p):
+    if not valores:
+        return float("nan")
+    orden = sorted(valores)
+    return orden[min(len(orden) - 1, int(round(p / 100 * (len(orden) - 1))))]
+
+
+class Operador(threading.Thread):
+    """Una sesión de la app: alterna guardados del Chat y órdenes de Limpieza"""
+
+    def __init__(self, n, github, acciones, prob_borrado, objetivos, semilla):
+        super().__init__(name=f"operador-{n}", daemon=True)
+        self.n = n
+        self.github = github
+        self.acciones = acciones
+        self.prob_borrado = prob_borrado
+        self.objetivos = list(objetivos)  # series del histórico que este operador puede borrar
+        self.rng = random.Random(semilla + n)
+
+        self.guardados = []  # series enviadas con éxito
+        self.borrados = []  # series cuyo borrado se ordenó con éxito
+        self.fallidos = 0
+        self.latencias = []
+
+    def run(self):
+        for k in range(self.acciones):
+            t0 = time.perf_counter()
+            if self.objetivos and self.rng.random() < self.prob_borrado:
+                ok = self._ordenar_borrado()
+            else:
+                ok = self._guardar(k)
+            self.latencias.append(time.perf_counter() - t0)
+            self.fallidos += 0 if ok else 1
+
+    def _guardar(self, k):
+        serie = f"OP{self.n}-{k}"
+        registro = {
+            "fecha_registro": time.strftime("%Y-%m-%d %H:%M"), "tipo": "Recibido", "equipo": "Laptop",
+            "marca": "Dell", "modelo": "Latitude 5420", "serie": serie, "cantidad": 1,
+            "estado": "Bueno", "destino": "Bodega", "_enviado": time.time(),
+        }
+        ok = self.github.enviar_a_buzon([registro])
+        if ok:
+            self.guardados.append(serie)
+        return ok
+
+    def _ordenar_borrado(self):
+        """Como Limpieza: idx = posición en el histórico que ve esta sesión"""
+        serie = self.objetivos.pop()
+        hist = self.github.obtener_historico()
+        idx = next((i for i, r in enumerate(hist) if isinstance(r, dict) and r.get("serie") == serie), None)
+        if idx is None:
+            return False
+        orden = {
+            "action": "delete", "source": "historico.json", "instruction": "BORRAR_SELECCIONADOS",
+            "count": 1, "accion": "borrar_por_indices", "idx_list": [idx],
+            "matches": [{"idx": idx, "serie": serie}], "_enviado": time.time(),
+        }
+        ok = self.github.enviar_orden_limpieza(orden)
+        if ok:
+            self.borrados.append(serie)
+        return ok
+
+
+def esperar_robot(srv, github, robot, timeout):
+    """Hasta que el buzón quede vacío (sin segmentos) o se acabe el tiempo"""
+    limite = time.time() + timeout
+    while time.time() < limite:
+        buzon = srv.repo.leer("buzon.json") or []
+        if not buzon and not srv.repo.rutas("buzon/"):
+            return True
+        github.compactar_buzon()
+        robot.ciclo()
+        time.sleep(0.05)
+    return False
+
+
+def consistencia(srv, semilla_series, operadores):
+    final = [r.get("serie") for r in srv.repo.leer("historico.json") or [] if isinstance(r, dict)]
+    presentes = set(final)
+    guardados = {s for op in operadores for s in op.guardados}
+    pedidos = {s for op in operadores for s in op.borrados}
+    return {
+        "registros_final": len(final),
+        "duplicados": len(final) - len(presentes),
+        "guardados_perdidos": len(guardados - presentes),
+        "borrados_no_aplicados": len(pedidos & presentes),
+        "borrados_de_mas": len((set(semilla_series) - pedidos) - presentes),
+    }
+
+
+def correr(args):
+    Config.BUZON_SEGMENTADO = args.buzon == "segmentado"
+    Config.SNAPSHOT_COLUMNAR = False
+
+    with ServidorGitHubFalso(latencia_ms=args.latencia_ms) as srv:
+        hist = sembrar_historico(args.historico, args.semilla)
+        srv.repo.poner("historico.json", hist)
+        srv.repo.poner("buzon.json", [])
+        commits_siembra = srv.repo.n_commits
+
+        github = GitHubHandler(token=srv.token, api_url=srv.url, cache=CacheContenido(Config.CACHE_TTL_SEG))
+        robot = RobotSimulado(srv.token, srv.url, intervalo=args.intervalo_robot).iniciar()
+        # Como en main.py: el hilo de refresco compacta el buzón en cada vuelta
+        refresco = RefrescoHistorico(github, Config.FILE_HISTORICO, args.intervalo_compactar,
+                                     tareas=(github.compactar_buzon,))
+        refresco.iniciar()
+
+        series = [r["serie"] for r in hist]
+        operadores = [
+            Operador(n, github, args.acciones, args.prob_borrado, series[n::args.operadores], args.semilla)
+            for n in range(args.operadores)
+        ]
+        t0 = time.perf_counter()
+        for op in operadores:
+            op.start()
+        for op in operadores:
+            op.join()
+        t_envios = time.perf_counter() - t0
+
+        robot.detener()
+        refresco.detener()
+        drenado = esperar_robot(srv, github, robot, args.timeout)
+        t_total = time.perf_counter() - t0
+
+        latencias = [x for op in operadores for x in op.latencias]
+        acciones = len(latencias)
+        return {
+            "buzon": args.buzon,
+            "operadores": args.operadores,
+            "acciones": acciones,
+            "fallidas": sum(op.fallidos for op in operadores),
+            "envio_p50_ms": percentil(latencias, 50) * 1000,
+            "envio_p95_ms": percentil(latencias, 95) * 1000,
+            "punta_a_punta_p50_s": percentil(robot.latencias, 50),
+            "punta_a_punta_p95_s": percentil(robot.latencias, 95),
+            "acciones_por_seg": acciones / t_envios if t_envios else float("nan"),
+            "t_total_s": t_total,
+            "commits": srv.repo.n_commits - commits_siembra,
+            "conflictos_servidor": srv.conflictos,
+            "llamadas_http": sum(srv.llamadas.values()),
+            "drenado": drenado,
+            "robot": robot.estado(),
+            "escrituras_app": github.metricas_escritura()["por_archivo"],
+            "consistencia": consistencia(srv, series, operadores),
+            "llamadas": dict(sorted((f"{m} {r}", n) for (m, r), n in srv.llamadas.items())),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operadores", type=int, default=4)
+    parser.add_argument("--acciones", type=int, default=10, help="acciones por operador")
+    parser.add_argument("--prob-borrado", type=float, default=0.2, help="fracción de acciones que son órdenes de borrado")
+    parser.add_argument("--historico", type=int, default=500, help="registros iniciales del histórico")
+    parser.add_argument("--latencia-ms", type=float, default=30, help="latencia simulada por llamada HTTP")
+    parser.add_argument("--intervalo-robot", type=float, default=0.5)
+    parser.add_argument("--intervalo-compactar", type=float, default=1.0,
+                        help="vuelta del hilo de refresco que compacta el buzón")
+    parser.add_argument("--buzon", choices=["segmentado", "clasico"], default="segmentado")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=60, help="espera máxima a que el robot vacíe el buzón")
+    parser.add_argument("--json", action="store_true", help="imprime el resultado completo como JSON")
+    args = parser.parse_args()
+
+    r = correr(args)
+    if args.json:
+        print(json.dumps(r, indent=2, ensure_ascii=False))
+        return
+
+    print(f"buzón {r['buzon']}: {r['operadores']} operadores, {r['acciones']} acciones ({r['fallidas']} fallidas)")
+    print(f"  envío        p50 {r['envio_p50_ms']:7.1f} ms   p95 {r['envio_p95_ms']:7.1f} ms   {r['acciones_por_seg']:.1f} acciones/s")
+    print(f"  punta a punta p50 {r['punta_a_punta_p50_s']:6.2f} s    p95 {r['punta_a_punta_p95_s']:6.2f} s")
+    print(f"  commits {r['commits']}   conflictos {r['conflictos_servidor']}   llamadas HTTP {r['llamadas_http']}")
+    print(f"  robot {r['robot']}")
+    print(f"  consistencia {r['consistencia']}  (buzón vacío al final: {r['drenado']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+benchmarks/bench_extractor_local.py
+Tasa de mensajes que resuelve el extractor por reglas (sin llamar al modelo) sobre
+un corpus de mensajes típicos del Chat, y exactitud de los campos extraídos en
+los que sí resolvió. Los mensajes que deben ir a la IA cuentan como aciertos si
+el extractor los deriva.
+
+Uso:
+    python -m benchmarks.bench_extractor_local
+    python -m benchmarks.bench_extractor_local --detalle
+"""
+import argparse
+import time
+
+from modules.extractor_local import ExtractorLocal
+
+# (mensaje, campos esperados por item o None si debe derivarse a la IA)
+CORPUS = [
+    ("recibí 10 teclados guía 0310", [{"equipo": "Teclado", "cantidad": 10, "guia": "0310", "destino": "Stock", "marca": "N/A"}]),
+    ("llegaron 5 mouse logitech guia 77812 hoy", [{"equipo": "Mouse", "cantidad": 5, "marca": "Logitech"}]),
+    ("me llegó un monitor lg serie 204NTAB1234 guía 5521", [{"equipo": "Monitor", "marca": "LG", "serie": "204NTAB1234", "destino": "Bodega"}]),
+    ("recibí laptop dell latitude 5420 serie ABC1234 i5 de 11va 16gb ram 512 ssd guia 9001 hoy",
+     [{"equipo": "Laptop", "marca": "Dell", "modelo": "latitude 5420", "serie": "ABC1234",
+       "procesador": "Intel Core i5 - 11th Gen", "ram": "16GB", "disco": "512GB SSD", "estado": "Bueno"}]),
+    ("llegó cpu hp prodesk 400 serie MXL8899 i5 8va 8gb 1tb hdd guía 4410 hoy",
+     [{"equipo": "CPU", "procesador": "Intel Core i5 - 8th Gen", "disco": "1TB HDD",
+       "estado": "Obsoleto / Pendiente Chatarrización", "destino": "CHATARRA / BAJA"}]),
+    ("recibí 3 laptops lenovo thinkpad e14 series PF1AAA1, PF1AAA2, PF1AAA3 i7 de 10ma 16gb 512ssd guía 123456 hoy",
+     [{"serie": "PF1AAA1", "procesador": "Intel Core i7 - 10th Gen"}, {"serie": "PF1AAA2"}, {"serie": "PF1AAA3"}]),
+    ("envié 2 teclados a la agencia Ambato guía 8891", [{"tipo": "Enviado", "equipo": "Teclado", "origen": "Stock", "destino": "Agencia Ambato"}]),
+    ("envié laptop hp probook 440 serie 5CD1234XYZ a Riobamba guía 7777",
+     [{"tipo": "Enviado", "origen": "Bodega", "destino": "Riobamba", "serie": "5CD1234XYZ"}]),
+    ("mandé 4 mouse a Quito", [{"tipo": "Enviado", "cantidad": 4, "destino": "Quito"}]),
+    ("recibí 2 impresoras epson guía 3030 desde Guayaquil hoy", [{"equipo": "Impresora", "marca": "Epson", "origen": "Guayaquil"}]),
+    ("llegó 1 cargador hp guía 1122 hoy", [{"equipo": "Cargador", "marca": "HP", "cantidad": 1}]),
+    ("recibí 6 parlantes genius y 6 teclados genius guia 5500 hoy",
+     [{"equipo": "Parlantes", "cantidad": 6}, {"equipo": "Teclado", "cantidad": 6}]),
+    ("recibí de Quito guía 0311 hoy:\nlaptop dell latitude 3420 serie DL0001 i5 11va 8gb 256ssd\nlaptop dell latitude 3420 serie DL0002 i5 11va 8gb 256ssd",
+     [{"serie": "DL0001", "ram": "8GB", "disco": "256GB SSD"}, {"serie": "DL0002"}]),
+    ("recibí laptop asus serie ASX998877 guía 4545 hoy", [{"marca": "Asus", "serie": "ASX998877"}]),
+    ("llegó un toner hp guía 6061 el 12/03/2025", [{"equipo": "Tóner", "fecha_llegada": "2025-03-12"}]),
+    ("envié 3 monitores samsung series SM00001, SM00002, SM00003 a Cuenca guía 1212",
+     [{"serie": "SM00001", "destino": "Cuenca"}, {"serie": "SM00002"}, {"serie": "SM00003"}]),
+    ("recibí 1 laptop hp elitebook 840 serie 5CG7777 i7-8650u 16gb 512 ssd guía 2020 hoy",
+     [{"procesador": "Intel Core i7 - 8th Gen", "destino": "CHATARRA / BAJA"}]),
+    ("llegaron 20 mouses genius guía 9090 ayer", [{"cantidad": 20, "marca": "Genius"}]),
+    ("envié 1 cpu lenovo m720 serie MJ0ABC12 i5 9na 8gb 256 ssd a Loja guía 3131",
+     [{"destino": "CHATARRA / BAJA", "estado": "Obsoleto / Pendiente Chatarrización"}]),
+    ("recibí 2 webcams logitech guía 4242 hoy", [{"equipo": "Cámara", "cantidad": 2}]),
+    ("recibí 10 teclados guía 45 hoy", [{"guia": "45", "cantidad": 10}]),
+    ("envié 2 mouse y 3 teclados a Cuenca guía 77", [{"destino": "Cuenca"}, {"destino": "Cuenca"}]),
+
+    # Deben ir a la IA
+    ("hola", None),
+    ("quién eres", None),
+    ("cambia la serie del segundo equipo a XYZ", None),
+    ("recibí 3 laptops dell guía 111", None),  # cómputo sin series
+    ("envié 2 teclados", None),  # sin destino
+    ("recibí una laptop dañada serie ABC999 guía 222", None),  # estado a interpretar
+    ("recibí laptop dell serie AAA111 i5 16gb 512ssd guía 123", None),  # CPU sin generación
+    ("recibí 2 laptops hp series QQ111, QQ222, QQ333 guía 999", None),  # cantidad vs series
+    ("llegaron los equipos que pidió el gerente de sistemas para la nueva oficina", None),
+    ("recibí 5 switches cisco guía 8080", None),  # equipo fuera del diccionario
+    ("enviar así", None),
+    ("recibí y envié 2 teclados", None),
+    ("recibí teclados guía 0310 y 0311", None),
+    ("recibí 2 mouse del proveedor que vino ayer con la factura pendiente guía 123", None),
+    ("envié 5 mouse a Quito y 3 teclados a Cuenca", None),  # un destino por item
+    ("recibí 10 teclados para reemplazo guía 0310", None),  # "reemplazo" no es un lugar
+    ("envié 2 teclados a Quito urgente hoy guía 4567", None),
+    ("recibí 3 teclados guía de remisión hoy", None),  # guía sin número
+]
+
+
+def _coincide(item, esperado):
+    return all(str(item.get(k)) == str(v) for k, v in esperado.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--umbral", type=float, default=0.85)
+    parser.add_argument("--repeticiones", type=int, default=200, help="pasadas del corpus para medir el tiempo")
+    parser.add_argument("--detalle", action="store_true", help="imprime cada mensaje y su resultado")
+    args = parser.parse_args()
+
+    extractor = ExtractorLocal(umbral=args.umbral)
+    resueltos = correctos = falsos_positivos = derivados_ok = 0
+    rutinarios = sum(1 for _, e in CORPUS if e is not None)
+    for texto, esperado in CORPUS:
+        r = extractor.extraer(texto)
+        items = (r or {}).get("json_response", {}).get("items", [])
+        if esperado is None:
+            ok = r is None
+            derivados_ok += ok
+            falsos_positivos += not ok
+        else:
+            ok = r is not None and len(items) == len(esperado) and all(map(_coincide, items, esperado))
+            resueltos += r is not None
+            correctos += ok
+        if args.detalle:
+            marca = "OK " if ok else "MAL"
+            print(f"{marca} {'IA   ' if r is None else 'local'} {texto.splitlines()[0][:70]}")
+            if r is not None and not ok:
+                print(f"      {items}")
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeticiones):
+        for texto, _ in CORPUS:
+            extractor.extraer(texto)
+    por_msg = (time.perf_counter() - t0) / (args.repeticiones * len(CORPUS))
+
+    print(f"corpus: {len(CORPUS)} mensajes ({rutinarios} rutinarios, {len(CORPUS) - rutinarios} para la IA)")
+    print(f"  resueltos sin IA    {resueltos}/{rutinarios} ({resueltos / rutinarios:.0%})")
+    print(f"  campos correctos    {correctos}/{resueltos}")
+    print(f"  derivados a la IA   {derivados_ok}/{len(CORPUS) - rutinarios}  (resueltos por error: {falsos_positivos})")
+    print(f"  tiempo por mensaje  {por_msg * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
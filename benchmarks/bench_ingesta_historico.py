@@ -0,0 +1,105 @@
+"""
+benchmarks/bench_ingesta_historico.py
+Pico de memoria (tracemalloc) y tiempo de la ingesta de historico.json:
+camino anterior (b64decode -> str -> json.loads -> lista de dicts -> DataFrame)
+contra el streaming (trozos base64 -> iterar_json -> HistoricoColumnar).
+
+Uso:
+    python -m benchmarks.bench_ingesta_historico
+    python -m benchmarks.bench_ingesta_historico --tamanos 10000 100000
+"""
+import argparse
+import base64
+import gc
+import json
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.bench_stock_calculator import generar_movimientos
+from modules import historico_stream, registros
+
+
+def contenido_api(n):
+    """Lo que devuelve la Contents API en `content` (base64 en líneas de 60)"""
+    hist = generar_movimientos(n).to_dict("records")
+    # Algunas órdenes de borrado mezcladas, como las deja el robot
+    for i in range(0, n, 997):
+        hist[i] = {"action": "delete", "source": "historico.json", "idx_list": [i], "matches": []}
+    crudo = json.dumps(hist, indent=4, ensure_ascii=False).encode("utf-8")
+    return base64.encodebytes(crudo).decode("ascii")
+
+
+# ---------------------------
+# Referencia: camino anterior
+# ---------------------------
+def ingesta_legacy(contenido):
+    hist = json.loads(base64.b64decode(contenido).decode("utf-8"))
+    filas, posiciones = [], []
+    for pos, x in enumerate(hist):
+        reg = registros.a_dict(x)
+        if reg is not None:
+            filas.append(reg)
+            posiciones.append(pos)
+    df = pd.DataFrame(filas, index=posiciones)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    acc = df["action"].astype(str).str.strip().str.lower() if "action" in df.columns else None
+    if acc is not None:
+        df = df[~acc.isin(list(registros.COMANDOS))]
+    basura = [c for c in df.columns if c.isdigit() or c in registros.COLUMNAS_META]
+    return df.drop(columns=basura)
+
+
+def ingesta_streaming(contenido):
+    trozos = historico_stream.trozos_base64(contenido)
+    return historico_stream.HistoricoColumnar.desde(historico_stream.iterar_json(trozos)).dataframe()
+
+
+# ---------------------------
+# Medición
+# ---------------------------
+def medir(fn, contenido):
+    """Tiempo sin tracemalloc (que infla cada asignación) y pico en una segunda corrida"""
+    gc.collect()
+    t0 = time.perf_counter()
+    resultado = fn(contenido)
+    t = time.perf_counter() - t0
+    del resultado
+
+    gc.collect()
+    tracemalloc.start()
+    resultado = fn(contenido)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return t, pico, resultado
+
+
+def comparar(legacy, streaming):
+    # El camino anterior deja columnas de las órdenes (ej. "matches") vacías
+    sobrantes = [c for c in legacy.columns if c not in streaming.columns]
+    pd.testing.assert_frame_equal(legacy[list(streaming.columns)], streaming)
+    assert legacy[sobrantes].map(lambda v: v == [] or v != v).all().all(), sobrantes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'filas':>9} | {'json MB':>8} | {'pico legacy':>11} | {'pico stream':>11} | {'t legacy':>8} | {'t stream':>8}")
+    print("-" * 72)
+    for n in args.tamanos:
+        contenido = contenido_api(n)
+        mb = len(contenido) * 3 / 4 / 2 ** 20
+        t_leg, pico_leg, res_leg = medir(ingesta_legacy, contenido)
+        t_str, pico_str, res_str = medir(ingesta_streaming, contenido)
+        comparar(res_leg, res_str)
+        print(
+            f"{n:>9} | {mb:>8.1f} | {pico_leg / 2 ** 20:>9.1f}MB | {pico_str / 2 ** 20:>9.1f}MB"
+            f" | {t_leg:>7.2f}s | {t_str:>7.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+benchmarks/bench_snapshot_columnar.py
+Tamaño y tiempo de lectura: historico.json (indent=4, parseo completo) contra el
+snapshot Parquet leído solo con StockCalculator.COLUMNAS_STOCK.
+
+Uso:
+    python -m benchmarks.bench_snapshot_columnar
+    python -m benchmarks.bench_snapshot_columnar --tamanos 10000 100000
+"""
+import argparse
+import json
+import time
+
+import pandas as pd
+
+from benchmarks.bench_stock_calculator import generar_movimientos
+from modules import snapshot_columnar
+from modules.historico_stream import HistoricoColumnar
+from modules.stock_calculator import StockCalculator
+
+
+def medir(fn, repeticiones=3):
+    mejor, resultado = float("inf"), None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = fn()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    if not snapshot_columnar.disponible():
+        print("pyarrow no está instalado: no hay snapshot columnar que medir")
+        return
+
+    columnas = list(StockCalculator.COLUMNAS_STOCK)
+    print(f"{'filas':>9} | {'json MB':>8} | {'parquet MB':>10} | {'t json':>8} | {'t parquet':>9} | {'x':>5}")
+    print("-" * 66)
+    for n in args.tamanos:
+        hist = generar_movimientos(n).to_dict("records")
+        crudo = json.dumps(hist, indent=4).encode()
+        parquet = snapshot_columnar.generar(hist, "bench")
+
+        def desde_json():
+            df = HistoricoColumnar.desde(json.loads(crudo)).dataframe()
+            return StockCalculator.calcular_stock_completo(df[columnas])
+
+        def desde_parquet():
+            return StockCalculator.calcular_stock_completo(snapshot_columnar.leer(parquet, columnas))
+
+        t_json, res_json = medir(desde_json)
+        t_parq, res_parq = medir(desde_parquet)
+        for a, b in zip(res_json, res_parq):
+            pd.testing.assert_frame_equal(a, b, check_dtype=False)
+        print(
+            f"{n:>9} | {len(crudo) / 2 ** 20:>8.1f} | {len(parquet) / 2 ** 20:>10.1f}"
+            f" | {t_json:>7.2f}s | {t_parq:>8.2f}s | {t_json / t_parq:>4.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
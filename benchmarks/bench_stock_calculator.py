@@ -0,0 +1,158 @@
+"""
+benchmarks/bench_stock_calculator.py
+Compara StockCalculator.calcular_stock_completo (vectorizado) contra la versión
+fila a fila original sobre movimientos sintéticos de 1k, 100k y 1M filas.
+
+Uso:
+    python -m benchmarks.bench_stock_calculator
+    python -m benchmarks.bench_stock_calculator --tamanos 1000 100000 --sin-legacy
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules import cpu_generacion
+from modules.stock_calculator import StockCalculator
+
+
+# ---------------------------
+# Datos sintéticos
+# ---------------------------
+EQUIPOS = ["Laptop", "CPU", "Mouse", "Teclado", "Cable HDMI", "Monitor", "Cargador", "Tóner", "Impresora", "AIO"]
+MARCAS = ["HP", "Dell", "Lenovo", "Genius", "Logitech", "N/A", " hp ", "DELL"]
+MODELOS = ["ProBook 440", "Latitude 5420", "ThinkPad E14", "N/A", "K120", "M90"]
+TIPOS = ["Recibido", "Enviado", "Ingreso", "Despacho", "Llegó", "Salida", "Traslado"]
+ESTADOS = ["Bueno", "Nuevo", "Dañado", "Obsoleto / Pendiente Chatarrización", "N/A", ""]
+DESTINOS = ["Bodega", "Stock", "Ambato", "Quito", "CHATARRA / BAJA", "bodega "]
+PROCESADORES = [
+    "Intel Core i5 - 8th Gen", "Intel Core i7 - 10th Gen", "i5 de 8va", "Intel Core i3 - 12th Gen",
+    "Ryzen 5 5600U", "N/A", "", "Intel Core i7 - 14th Gen", "gen 9", "Celeron",
+]
+
+
+def generar_movimientos(n, semilla=7):
+    rng = np.random.default_rng(semilla)
+
+    def col(valores):
+        return np.array(valores, dtype=object)[rng.integers(0, len(valores), n)]
+
+    df = pd.DataFrame({
+        "fecha_registro": pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 400 * 24 * 60, n), unit="min"),
+        "guia": rng.integers(100000, 999999, n).astype(str),
+        "tipo": col(TIPOS),
+        "origen": col(DESTINOS),
+        "destino": col(DESTINOS),
+        "categoria_item": col(["Computo", "Periferico", "Pantalla"]),
+        "equipo": col(EQUIPOS),
+        "marca": col(MARCAS),
+        "modelo": col(MODELOS),
+        "serie": [f"SN{x:08d}" for x in rng.integers(0, 10 ** 8, n)],
+        "estado": col(ESTADOS),
+        "procesador": col(PROCESADORES),
+        "ram": col(["8GB", "16GB", "N/A"]),
+        "disco": col(["256 SSD", "1TB HDD", "N/A"]),
+        "reporte": col(["", "ok", "pantalla rota"]),
+        "cantidad": col([1, 2, 5, 10, "3", "", None]),
+    })
+    df["fecha_registro"] = df["fecha_registro"].dt.strftime("%Y-%m-%d %H:%M")
+    return df
+
+
+# ---------------------------
+# Referencia: implementación fila a fila original
+# ---------------------------
+def calcular_stock_legacy(df):
+    df_c = df.copy()
+    df_c.columns = df_c.columns.str.lower().str.strip()
+    for col in df_c.columns:
+        df_c[col] = df_c[col].astype(str).str.lower().str.strip()
+
+    df_c['cant_n'] = pd.to_numeric(df_c['cantidad'], errors='coerce').fillna(0)
+    df_c['gen_cpu'] = df_c['procesador'].apply(extraer_generacion_legacy)
+
+    perifericos_list = [
+        'mouse', 'teclado', 'cable', 'hdmi', 'limpiador',
+        'cargador', 'toner', 'tinta', 'parlante', 'herramienta'
+    ]
+    es_periferico = df_c['equipo'].str.contains('|'.join(perifericos_list), na=False)
+    es_dañado = df_c['estado'].str.contains('dañado|obsoleto|chatarrización', na=False)
+    es_destino_bodega = df_c['destino'] == 'bodega'
+
+    df_p = df_c[es_periferico].copy()
+    if not df_p.empty:
+        def procesar_saldo(row):
+            t = row['tipo']
+            if any(x in t for x in ['recibido', 'ingreso', 'entrada', 'llegó']):
+                return row['cant_n']
+            if any(x in t for x in ['enviado', 'salida', 'despacho', 'egreso', 'envio']):
+                return -row['cant_n']
+            return 0
+
+        df_p['val'] = df_p.apply(procesar_saldo, axis=1)
+        st_res = df_p.groupby(['equipo', 'marca', 'modelo']).agg({'val': 'sum'}).reset_index()
+        st_res = st_res[st_res['val'] > 0]
+    else:
+        st_res = pd.DataFrame(columns=['equipo', 'marca', 'modelo', 'val'])
+
+    bod_res = df_c[es_destino_bodega & ~es_periferico & ~es_dañado & (df_c['gen_cpu'] == 'moderno')].copy()
+    danados_res = df_c[es_dañado | (df_c['gen_cpu'] == 'obsoleto')].copy()
+    return st_res, bod_res, danados_res, df_c
+
+
+def extraer_generacion_legacy(procesador):
+    # Reglas actuales de cpu_generacion, pero fila a fila y sin memo (como el original)
+    fabricante, gen = cpu_generacion.analizar.__wrapped__(cpu_generacion.normalizar(procesador))
+    if gen is not None and gen <= cpu_generacion.OBSOLETA_MAX[fabricante]:
+        return 'obsoleto'
+    return 'moderno'
+
+
+# ---------------------------
+# Medición
+# ---------------------------
+def medir(fn, df, repeticiones):
+    mejor = float("inf")
+    resultado = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = fn(df)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, resultado
+
+
+def comparar(a, b):
+    nombres = ["stock", "bodega", "danados", "completo"]
+    for nombre, x, y in zip(nombres, a, b):
+        pd.testing.assert_frame_equal(
+            x.reset_index(drop=True), y.reset_index(drop=True),
+            obj=nombre,
+        )
+        assert x.index.equals(y.index), f"{nombre}: índices distintos"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--sin-legacy", action="store_true", help="No medir la versión original (lenta en 1M)")
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} | {'vectorizado':>12} | {'legacy':>10} | {'x':>6}")
+    print("-" * 48)
+    for n in args.tamanos:
+        df = generar_movimientos(n)
+        t_vec, res_vec = medir(StockCalculator.calcular_stock_completo, df, args.repeticiones)
+
+        if args.sin_legacy:
+            print(f"{n:>10} | {t_vec:>11.3f}s | {'-':>10} | {'-':>6}")
+            continue
+
+        t_leg, res_leg = medir(calcular_stock_legacy, df, 1)
+        comparar(res_vec, res_leg)
+        print(f"{n:>10} | {t_vec:>11.3f}s | {t_leg:>9.3f}s | {t_leg / t_vec:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+benchmarks/fake_github.py
+Servidor falso de la API de GitHub (Contents + Git Data) en un hilo local, para
+correr el flujo buzón -> robot -> histórico sin red ni token real.
+
+Cubre lo que usan GitHubBackend, BuzonLog y LoteGit:
+    GET/PUT/DELETE  /repos/{u}/{r}/contents/{ruta}   (ETag / 304, 409/422 por sha, crudo)
+    GET             /repos/{u}/{r}                   (default_branch)
+    GET             /repos/{u}/{r}/git/ref/heads/{rama}, git/commits/{sha},
+                    git/trees/{sha|HEAD}[?recursive=1], git/blobs/{sha}
+    POST            /repos/{u}/{r}/git/blobs, git/trees, git/commits
+    PATCH           /repos/{u}/{r}/git/refs/heads/{rama}  (solo fast-forward)
+
+Uso:
+    with ServidorGitHubFalso(latencia_ms=40) as srv:
+        github = GitHubHandler(token=srv.token, api_url=srv.url)
+"""
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+LIMITE_CONTENTS = 1024 * 1024  # sobre 1 MB la Contents API no trae `content`
+
+
+def sha_blob(contenido):
+    return hashlib.sha1(b"blob %d\0" % len(contenido) + contenido).hexdigest()
+
+
+class RepoFalso:
+    """
+    Estado del repo: commits inmutables (sha -> (tree, padre)) y trees como dicts
+    ruta -> bytes. Todo cambio pasa por _commit bajo el lock, igual que una rama real.
+    """
+
+    def __init__(self, rama="main"):
+        self.rama = rama
+        self.lock = threading.Lock()
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self._n = 0
+        self.head = self._nuevo_commit({}, None)
+        self.n_commits = 0  # sin contar el commit inicial
+
+    # --- internos ---
+    def _tree(self, archivos):
+        sha = hashlib.sha1(json.dumps(sorted((p, sha_blob(b)) for p, b in archivos.items())).encode()).hexdigest()
+        self.trees[sha] = archivos
+        for b in archivos.values():
+            self.blobs.setdefault(sha_blob(b), b)
+        return sha
+
+    def _nuevo_commit(self, archivos, padre):
+        self._n += 1
+        tree = self._tree(archivos)
+        sha = hashlib.sha1(f"{tree}:{padre}:{self._n}".encode()).hexdigest()
+        self.commits[sha] = (tree, padre)
+        return sha
+
+    def _commit(self, archivos):
+        self.head = self._nuevo_commit(archivos, self.head)
+        self.n_commits += 1
+
+    @property
+    def archivos(self):
+        return self.trees[self.commits[self.head][0]]
+
+    # --- API de conveniencia (siembra y verificación) ---
+    def poner(self, ruta, datos):
+        """Escribe un JSON como lo haría el robot (un commit)"""
+        contenido = json.dumps(datos, indent=4).encode() if not isinstance(datos, bytes) else datos
+        with self.lock:
+            archivos = dict(self.archivos)
+            archivos[ruta] = contenido
+            self._commit(archivos)
+
+    def leer(self, ruta):
+        with self.lock:
+            contenido = self.archivos.get(ruta)
+        return None if contenido is None else json.loads(contenido)
+
+    def rutas(self, prefijo=""):
+        with self.lock:
+            return sorted(p for p in self.archivos if p.startswith(prefijo))
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    # --- respuesta ---
+    def _responder(self, codigo, cuerpo=None, headers=None, crudo=None):
+        datos = crudo if crudo is not None else (b"" if cuerpo is None else json.dumps(cuerpo).encode())
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/octet-stream" if crudo is not None else "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if datos:
+            self.wfile.write(datos)
+
+    def _cuerpo(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(n)) if n else {}
+
+    def _despachar(self, metodo):
+        srv = self.server.falso
+        srv.contar(metodo, self.path)
+        if srv.latencia:
+            time.sleep(srv.latencia)
+        if self.headers.get("Authorization") != f"token {srv.token}":
+            return self._responder(401, {"message": "Bad credentials"})
+        url = urlsplit(self.path)
+        prefijo = f"/repos/{srv.usuario}/{srv.nombre}"
+        if not url.path.startswith(prefijo):
+            return self._responder(404, {"message": "Not Found"})
+        ruta = url.path[len(prefijo):].lstrip("/")
+        cuerpo = self._cuerpo() if metodo in ("PUT", "POST", "PATCH", "DELETE") else None
+        with srv.repo.lock:
+            if ruta == "" and metodo == "GET":
+                return self._responder(200, {"default_branch": srv.repo.rama})
+            if ruta == "contents" or ruta.startswith("contents/"):
+                return getattr(self, f"_contents_{metodo.lower()}")(srv, ruta[len("contents/"):], cuerpo)
+            if ruta.startswith("git/"):
+                return self._git(srv, metodo, ruta[4:], url.query, cuerpo)
+        return self._responder(404, {"message": "Not Found"})
+
+    def do_GET(self):
+        self._despachar("GET")
+
+    def do_PUT(self):
+        self._despachar("PUT")
+
+    def do_POST(self):
+        self._despachar("POST")
+
+    def do_PATCH(self):
+        self._despachar("PATCH")
+
+    def do_DELETE(self):
+        self._despachar("DELETE")
+
+    # --- Contents API ---
+    def _contents_get(self, srv, ruta, _):
+        archivos = srv.repo.archivos
+        if ruta in archivos:
+            contenido = archivos[ruta]
+            sha = sha_blob(contenido)
+            etag = f'"{sha}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._responder(304, headers={"ETag": etag})
+            if self.headers.get("Accept") == "application/vnd.github.raw":
+                return self._responder(200, crudo=contenido, headers={"ETag": etag})
+            grande = len(contenido) > LIMITE_CONTENTS
+            return self._responder(200, {
+                "name": ruta.rsplit("/", 1)[-1], "path": ruta, "sha": sha, "size": len(contenido), "type": "file",
+                "encoding": "none" if grande else "base64",
+                "content": "" if grande else base64.encodebytes(contenido).decode(),
+            }, headers={"ETag": etag})
+
+        pre = f"{ruta}/" if ruta else ""
+        listado = [
+            {"name": p[len(pre):], "path": p, "sha": sha_blob(b), "type": "file"}
+            for p, b in sorted(archivos.items()) if p.startswith(pre) and "/" not in p[len(pre):]
+        ]
+        if not listado:
+            return self._responder(404, {"message": "Not Found"})
+        etag = '"%s"' % hashlib.sha1(json.dumps(listado).encode()).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            return self._responder(304, headers={"ETag": etag})
+        return self._responder(200, listado, headers={"ETag": etag})
+
+    def _contents_put(self, srv, ruta, cuerpo):
+        archivos = srv.repo.archivos
+        actual = sha_blob(archivos[ruta]) if ruta in archivos else None
+        if cuerpo.get("sha") != actual:
+            srv.conflictos += 1
+            if actual is None:
+                return self._responder(422, {"message": "sha does not match"})
+            return self._responder(409 if cuerpo.get("sha") else 422, {"message": "sha mismatch"})
+        contenido = base64.b64decode(cuerpo["content"])
+        nuevos = dict(archivos)
+        nuevos[ruta] = contenido
+        srv.repo._commit(nuevos)
+        return self._responder(201 if actual is None else 200, {"content": {"path": ruta, "sha": sha_blob(contenido)}})
+
+    def _contents_delete(self, srv, ruta, cuerpo):
+        archivos = srv.repo.archivos
+        if ruta not in archivos:
+            return self._responder(404, {"message": "Not Found"})
+        if cuerpo.get("sha") != sha_blob(archivos[ruta]):
+            srv.conflictos += 1
+            return self._responder(409, {"message": "sha mismatch"})
+        nuevos = dict(archivos)
+        del nuevos[ruta]
+        srv.repo._commit(nuevos)
+        return self._responder(200, {"content": None})
+
+    # --- Git Data API ---
+    def _git(self, srv, metodo, ruta, query, cuerpo):
+        repo = srv.repo
+        if metodo == "GET" and ruta == f"ref/heads/{repo.rama}":
+            return self._responder(200, {"object": {"sha": repo.head, "type": "commit"}})
+        if metodo == "GET" and ruta.startswith("commits/"):
+            commit = repo.commits.get(ruta[8:])
+            if commit is None:
+                return self._responder(404, {"message": "Not Found"})
+            return self._responder(200, {"sha": ruta[8:], "tree": {"sha": commit[0]}})
+        if metodo == "GET" and ruta.startswith("trees/"):
+            clave = ruta[6:]
+            if clave == "HEAD":
+                clave = repo.commits[repo.head][0]
+            elif clave in repo.commits:
+                clave = repo.commits[clave][0]
+            if clave not in repo.trees:
+                return self._responder(404, {"message": "Not Found"})
+            etag = f'"{clave}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._responder(304, headers={"ETag": etag})
+            tree = [{"path": p, "sha": sha_blob(b), "type": "blob", "mode": "100644"} for p, b in sorted(repo.trees[clave].items())]
+            return self._responder(200, {"sha": clave, "tree": tree, "truncated": False}, headers={"ETag": etag})
+        if metodo == "GET" and ruta.startswith("blobs/"):
+            contenido = repo.blobs.get(ruta[6:])
+            if contenido is None:
+                return self._responder(404, {"message": "Not Found"})
+            return self._responder(200, {"sha": ruta[6:], "encoding": "base64", "content": base64.encodebytes(contenido).decode()})
+        if metodo == "POST" and ruta == "blobs":
+            contenido = base64.b64decode(cuerpo["content"]) if cuerpo.get("encoding") == "base64" else cuerpo["content"].encode()
+            repo.blobs[sha_blob(contenido)] = contenido
+            return self._responder(201, {"sha": sha_blob(contenido)})
+        if metodo == "POST" and ruta == "trees":
+            archivos = dict(repo.trees.get(cuerpo.get("base_tree"), {}))
+            for e in cuerpo["tree"]:
+                if "content" in e:
+                    archivos[e["path"]] = e["content"].encode()
+                elif e.get("sha") is None:
+                    archivos.pop(e["path"], None)
+                elif e["sha"] in repo.blobs:
+                    archivos[e["path"]] = repo.blobs[e["sha"]]
+                else:
+                    return self._responder(422, {"message": f"blob {e['sha']} no existe"})
+            return self._responder(201, {"sha": repo._tree(archivos)})
+        if metodo == "POST" and ruta == "commits":
+            padres = cuerpo.get("parents") or [None]
+            repo._n += 1
+            sha = hashlib.sha1(f"{cuerpo['tree']}:{padres[0]}:{repo._n}".encode()).hexdigest()
+            repo.commits[sha] = (cuerpo["tree"], padres[0])
+            return self._responder(201, {"sha": sha})
+        if metodo == "PATCH" and ruta == f"refs/heads/{repo.rama}":
+            commit = repo.commits.get(cuerpo["sha"])
+            if commit is None:
+                return self._responder(422, {"message": "Object does not exist"})
+            if commit[1] != repo.head and not cuerpo.get("force"):
+                srv.conflictos += 1
+                return self._responder(422, {"message": "Update is not a fast forward"})
+            repo.head = cuerpo["sha"]
+            repo.n_commits += 1
+            return self._responder(200, {"object": {"sha": repo.head}})
+        return self._responder(404, {"message": "Not Found"})
+
+
+class ServidorGitHubFalso:
+    """
+    Servidor en un hilo daemon sobre 127.0.0.1 (puerto libre).
+
+    Atributos útiles para medir:
+        repo.n_commits  commits creados en la rama
+        conflictos      PUT/DELETE/PATCH rechazados por sha o non-fast-forward
+        llamadas        Counter((método, recurso))
+    """
+
+    def __init__(self, usuario="Soporte1jaher", nombre="inventario-jaher", token="token-falso", latencia_ms=0):
+        self.usuario = usuario
+        self.nombre = nombre
+        self.token = token
+        self.latencia = latencia_ms / 1000.0
+        self.repo = RepoFalso()
+        self.conflictos = 0
+        self.llamadas = Counter()
+        self._lock_llamadas = threading.Lock()
+        self._httpd = None
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self._httpd.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def contar(self, metodo, path):
+        ruta = urlsplit(path).path.split(f"/repos/{self.usuario}/{self.nombre}", 1)[-1].strip("/")
+        partes = ruta.split("/")
+        recurso = "/".join(partes[:2]) if partes[0] == "git" else (partes[0] or "repo")
+        with self._lock_llamadas:
+            self.llamadas[(metodo, recurso)] += 1
+
+    def iniciar(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Manejador)
+        self._httpd.daemon_threads = True
+        self._httpd.falso = self
+        self._hilo = threading.Thread(target=self._httpd.serve_forever, name="github-falso", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
@@ -0,0 +1,130 @@
+"""
+benchmarks/robot_simulado.py
+Sustituto en proceso del robot de la PC: lee buzon.json (como el robot real, no
+mira los segmentos de buzon/: esos llegan solo cuando la app compacta), agrega
+los registros al histórico, aplica las órdenes de borrado por idx_list y vacía
+lo que consumió. Habla con GitHub por HTTP como el robot real.
+
+Las posiciones de idx_list se interpretan sobre el histórico tal como estaba al
+empezar el ciclo (los borrados se aplican al final, los agregados van al final).
+"""
+import threading
+import time
+
+from modules.buzon_log import BuzonLog
+from modules.cache_contenido import CacheContenido
+from modules.registros import es_comando
+from modules.storage import GitHubBackend
+
+
+class RobotSimulado:
+    """
+    Cada ciclo publica un solo commit (LoteGit) condicionado a los sha que leyó:
+    historico.json nuevo + buzon.json vacío. Si alguien escribió buzon.json
+    entre medio (una compactación), el ciclo se descarta entero y se repite en
+    el siguiente (nada se procesa dos veces).
+    """
+
+    def __init__(self, token, api_url, user="Soporte1jaher", repo="inventario-jaher", intervalo=0.5):
+        self.backend = GitHubBackend(token, user, repo, cache=CacheContenido(ttl=0), api_url=api_url)
+        self.intervalo = intervalo
+
+        self.ciclos = 0
+        self.ciclos_descartados = 0
+        self.procesados = 0
+        self.borrados = 0
+        self.borrados_desfasados = 0  # idx que ya no apuntaba al registro de `matches`
+        self.latencias = []  # segundos entre el envío (`_enviado`) y su aplicación en el histórico
+
+        self._detener = threading.Event()
+        self._hilo = None
+
+    # ---------------------------
+    # Hilo
+    # ---------------------------
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._bucle, name="robot-simulado", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join()
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                self.ciclo()
+            except Exception as e:
+                print(f"Robot simulado: {e}")
+            self._detener.wait(self.intervalo)
+
+    # ---------------------------
+    # Un ciclo
+    # ---------------------------
+    def ciclo(self):
+        """
+        Returns:
+            int: Registros del buzón consumidos (0 si no había o se descartó el ciclo)
+        """
+        buzon, sha_buzon = self.backend.leer(BuzonLog.ARCHIVO)
+        hist, sha_hist = self.backend.leer("historico.json")
+        if buzon is None or hist is None:
+            return 0
+
+        pendientes = list(buzon) if isinstance(buzon, list) else []
+        if not pendientes:
+            return 0
+
+        base = list(hist) if isinstance(hist, list) else []
+        nuevos, borrar, desfasados = [], set(), 0
+        for reg in pendientes:
+            if es_comando(reg):
+                posiciones, n = self._posiciones_a_borrar(base, reg)
+                borrar.update(posiciones)
+                desfasados += n
+            elif isinstance(reg, dict):
+                nuevos.append(reg)
+        final = [r for i, r in enumerate(base) if i not in borrar] + nuevos
+
+        lote = self.backend.lote("Robot: procesa buzón")
+        lote.escribir("historico.json", final, si_sha=sha_hist)
+        lote.escribir(BuzonLog.ARCHIVO, [], si_sha=sha_buzon)
+
+        self.ciclos += 1
+        if not lote.publicar():
+            self.ciclos_descartados += 1
+            return 0
+
+        ahora = time.time()
+        self.procesados += len(nuevos)
+        self.borrados += len(borrar)
+        self.borrados_desfasados += desfasados
+        self.latencias.extend(ahora - r["_enviado"] for r in pendientes if isinstance(r, dict) and "_enviado" in r)
+        return len(pendientes)
+
+    def _posiciones_a_borrar(self, base, orden):
+        """
+        Returns:
+            tuple: (posiciones de idx_list válidas, cuántas no coinciden con su serie en `matches`)
+        """
+        posiciones, desfasados = [], 0
+        series = {m.get("idx"): m.get("serie") for m in orden.get("matches") or [] if isinstance(m, dict)}
+        for idx in orden.get("idx_list") or []:
+            if not isinstance(idx, int) or not 0 <= idx < len(base):
+                continue
+            esperado = series.get(idx)
+            if esperado is not None and str(base[idx].get("serie", "")).strip() != esperado:
+                desfasados += 1
+            posiciones.append(idx)
+        return posiciones, desfasados
+
+    def estado(self):
+        return {
+            "ciclos": self.ciclos,
+            "ciclos_descartados": self.ciclos_descartados,
+            "procesados": self.procesados,
+            "borrados": self.borrados,
+            "borrados_desfasados": self.borrados_desfasados,
+        }
@@ -2,18 +2,71 @@
 config/settings.py
 Configuración centralizada de la aplicación LAIA
 """
+import os
 import streamlit as st
 
 class Config:
     """Configuración global de la aplicación"""
-    
+
     # GitHub
     GITHUB_USER = "Soporte1jaher"
     GITHUB_REPO = "inventario-jaher"
+    # Raíz de la API de GitHub (Enterprise o el servidor falso de benchmarks/)
+    GITHUB_API_URL = os.environ.get("LAIA_GITHUB_API_URL", "https://api.github.com")
     FILE_BUZON = "buzon.json"
     FILE_HISTORICO = "historico.json"
     FILE_LECCIONES = "lecciones.json"
-    
+    FILE_PEDIDO = "pedido.json"
+
+    # Almacenamiento: "github" (Contents API directo) o "sqlite" (motor local + réplica opcional)
+    STORAGE_BACKEND = os.environ.get("LAIA_STORAGE", "github").lower()
+    SQLITE_PATH = os.environ.get("LAIA_SQLITE_PATH", os.path.join("data", "laia.db"))
+    REPLICAR_GITHUB = os.environ.get("LAIA_REPLICAR_GITHUB", "1") != "0"
+    # Cada cuánto (segundos) se baja de la réplica lo que escribió el robot
+    SYNC_INTERVALO_SEG = int(os.environ.get("LAIA_SYNC_INTERVALO_SEG", "60"))
+
+    # Cache de lecturas de GitHub (ETag / If-None-Match)
+    CACHE_TTL_SEG = int(os.environ.get("LAIA_CACHE_TTL_SEG", "15"))
+    # Cache de respuestas del modelo (misma entrada + mismo borrador => misma respuesta)
+    LLM_CACHE_TTL_SEG = int(os.environ.get("LAIA_LLM_CACHE_TTL_SEG", "1800"))
+    LLM_CACHE_MAX = int(os.environ.get("LAIA_LLM_CACHE_MAX", "256"))
+    # Capa en disco del cache ("" = solo memoria)
+    LLM_CACHE_DIR = os.environ.get("LAIA_LLM_CACHE_DIR", os.path.join("data", "cache_llm"))
+    # Respuesta del modelo por streaming (texto y tabla del borrador a medida que llegan)
+    LLM_STREAMING = os.environ.get("LAIA_LLM_STREAMING", "1") != "0"
+    # Salida estructurada (JSON Schema de modules/esquema_respuesta.py) en vez de extraer el JSON del texto
+    LLM_SALIDA_ESTRUCTURADA = os.environ.get("LAIA_LLM_ESTRUCTURADA", "1") != "0"
+    # Presupuesto de tokens del prompt (modules/prompt_llm.py): el historial viejo se resume
+    LLM_PRESUPUESTO_TOKENS = int(os.environ.get("LAIA_LLM_TOKENS", "6000"))
+    LLM_PRESUPUESTO_LECCIONES = int(os.environ.get("LAIA_LLM_TOKENS_LECCIONES", "1500"))
+    # Borradores con más de N items: el modelo los revisa por trozos en paralelo (0 = desactivado)
+    LLM_LOTE_ITEMS = int(os.environ.get("LAIA_LLM_LOTE_ITEMS", "12"))
+    LLM_LOTE_HILOS = int(os.environ.get("LAIA_LLM_LOTE_HILOS", "4"))
+    # Lecciones que entran al prompt (las más relevantes para el mensaje, BM25)
+    LECCIONES_TOP_K = int(os.environ.get("LAIA_LECCIONES_TOP_K", "8"))
+    # Extractor por reglas (modules/extractor_local.py): mensajes rutinarios sin llamar al modelo
+    EXTRACTOR_LOCAL = os.environ.get("LAIA_EXTRACTOR_LOCAL", "1") != "0"
+    EXTRACTOR_UMBRAL = float(os.environ.get("LAIA_EXTRACTOR_UMBRAL", "0.85"))
+    # Hilos para lecturas remotas en paralelo (precargas, buzón segmentado)
+    IO_HILOS = int(os.environ.get("LAIA_IO_HILOS", "8"))
+
+    # Buzón segmentado (append-only): un archivo por envío en buzon/ + compactación
+    BUZON_SEGMENTADO = os.environ.get("LAIA_BUZON_SEGMENTADO", "1") != "0"
+    BUZON_COMPACTAR_CADA = int(os.environ.get("LAIA_BUZON_COMPACTAR_CADA", "10"))
+    BUZON_COMPACTAR_SEG = int(os.environ.get("LAIA_BUZON_COMPACTAR_SEG", "120"))
+
+    # Snapshot columnar (Parquet, con pyarrow de requirements.txt) al lado de estos JSON; el JSON
+    # sigue siendo el formato de compatibilidad (lo lee y escribe el robot)
+    SNAPSHOT_COLUMNAR = os.environ.get("LAIA_SNAPSHOT_COLUMNAR", "1") != "0"
+    SNAPSHOT_ARCHIVOS = ("historico.json",)
+    SNAPSHOT_DIR = os.environ.get("LAIA_SNAPSHOT_DIR", os.path.join("data", "snapshots"))
+
+    # Hilo que mantiene historico.json en memoria (revalida con ETag cada N segundos)
+    REFRESCO_HISTORICO_SEG = int(os.environ.get("LAIA_REFRESCO_SEG", "30"))
+
+    # Ledger incremental de stock (checkpoint local; se reconstruye solo si falta)
+    LEDGER_PATH = os.environ.get("LAIA_LEDGER_PATH", os.path.join("data", "stock_ledger.pkl"))
+
     # Credenciales
     @staticmethod
     def get_api_key():
@@ -10,6 +10,14 @@ from ui.styles import inject_css, render_logo
 from ui.chat_tab import ChatTab
 from ui.stock_tab import StockTab
 from ui.cleaning_tab import CleaningTab
+from ui.import_tab import ImportTab
+from modules.ai_engine import AIEngine
+from modules.github_handler import GitHubHandler
+from modules.recursos import recurso
+from modules.stock_ledger import StockLedger
+from modules.indice_historico import IndiceHistorico
+from modules.refresco_historico import RefrescoHistorico
+from config.settings import Config
 
 st.set_page_config(page_title="LAIA v91.2", page_icon="🧠", layout="wide")
 
@@ -17,16 +25,39 @@ def main():
     inject_css()
     render_logo()
 
-    tab1, tab2, tab3 = st.tabs(["💬 Chat Auditor", "📊 Stock Real", "🗑️ Limpieza"])
+    # Una sola instancia por proceso (no por rerun): clientes y pools se reutilizan
+    github = recurso("github", GitHubHandler)
+    ai_engine = recurso("ai_engine", AIEngine)
+    ledger = recurso("stock_ledger", lambda: StockLedger(Config.LEDGER_PATH))
+    indice = recurso("indice_historico", IndiceHistorico)
+    # Un solo hilo por proceso mantiene el histórico al día; ledger e índice se
+    # sincronizan ahí, antes de publicar cada versión. El mismo hilo consolida los
+    # segmentos del buzón en buzon.json (lo único que lee el robot)
+    refresco = recurso("refresco_historico", lambda: RefrescoHistorico(
+        github, Config.FILE_HISTORICO, Config.REFRESCO_HISTORICO_SEG,
+        al_publicar=(ledger.sincronizar, indice.sincronizar),
+        tareas=(github.compactar_buzon,),
+    ))
+    chat_tab = recurso("chat_tab", lambda: ChatTab(ai_engine=ai_engine, github=github, ledger=ledger))
+    stock_tab = recurso("stock_tab", lambda: StockTab(github=github, ledger=ledger, indice=indice, refresco=refresco))
+    cleaning_tab = recurso("cleaning_tab", lambda: CleaningTab(
+        ai_engine=ai_engine, github=github, ledger=ledger, indice=indice, refresco=refresco,
+    ))
+    import_tab = recurso("import_tab", lambda: ImportTab(github=github, ledger=ledger, chat_tab=chat_tab))
+
+    tab1, tab_imp, tab2, tab3 = st.tabs(["💬 Chat Auditor", "📥 Importar", "📊 Stock Real", "🗑️ Limpieza"])
 
     with tab1:
-        ChatTab().render()
+        chat_tab.render()
+
+    with tab_imp:
+        import_tab.render()
 
     with tab2:
-        StockTab().render()
+        stock_tab.render()
 
     with tab3:
-        CleaningTab().render()
+        cleaning_tab.render()
 
 if __name__ == "__main__":
     main()
@@ -3,13 +3,41 @@ modules/ai_engine.py - Motor de IA pulido
 """
 from openai import OpenAI
 import json
+import re
 from config.settings import Config, SYSTEM_PROMPT
+from modules.cache_llm import CacheRespuestasLLM, huella
+from modules.respuesta_stream import LectorRespuesta
+from modules.esquema_respuesta import esquema_json, validar
+from modules.prompt_llm import ConstructorPrompt
+from modules.concurrencia import en_paralelo
+
+ESQUEMA_RESPUESTA = esquema_json()
+# Cambia solo si cambia el prompt o el esquema: invalida las respuestas cacheadas con el anterior
+ESQUEMA_LOTE = esquema_json(lote=True)
+VERSION_PROMPT = huella([SYSTEM_PROMPT, ESQUEMA_RESPUESTA, ESQUEMA_LOTE])[:12]
+
+# Pedidos que quitan items: el modo por lotes solo sabe devolver cambios, no bajas
+RE_BORRADO = re.compile(r"\b(?:borra|borrar|borren|elimina|eliminar|quita|quitar|saca|sacar)\b")
+RE_TODOS = re.compile(r"\b(?:todos|todas|cada)\b")
 
 class AIEngine:
-    def __init__(self):
+    def __init__(self, cache=None):
         self.client = OpenAI(api_key=Config.get_api_key())
         self.model = "gpt-4o-mini"
         self.temperature = 0
+        self.cache = cache or CacheRespuestasLLM(
+            ttl=Config.LLM_CACHE_TTL_SEG,
+            max_entradas=Config.LLM_CACHE_MAX,
+            directorio=Config.LLM_CACHE_DIR,
+        )
+        # Salida estructurada: la API devuelve solo JSON que cumple ESQUEMA_RESPUESTA
+        self.estructurada = Config.LLM_SALIDA_ESTRUCTURADA
+        self.contadores = {"respuestas": 0, "reparadas": 0, "invalidas": 0, "lotes": 0, "trozos": 0}
+        self.prompt = ConstructorPrompt(
+            SYSTEM_PROMPT, self.model,
+            presupuesto=Config.LLM_PRESUPUESTO_TOKENS,
+            presupuesto_lecciones=Config.LLM_PRESUPUESTO_LECCIONES,
+        )
     
     def extraer_json(self, texto_completo):
         try:
@@ -23,30 +51,250 @@ class AIEngine:
         except:
             return texto_completo.strip(), ""
 
-    def procesar_input(self, user_input, lecciones, borrador_actual, historial_mensajes):
-        # ... (Tu código de procesar_input está perfecto, mantenlo igual) ...
-        memoria_err = "\n".join([f"- {l['lo_que_hizo_mal']} -> {l['como_debe_hacerlo']}" for l in lecciones]) if lecciones else ""
-        contexto_tabla = json.dumps(borrador_actual, ensure_ascii=False) if borrador_actual else "[]"
-        mensajes_api = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "system", "content": f"LECCIONES TÉCNICAS:\n{memoria_err}"},
-            {"role": "system", "content": f"ESTADO ACTUAL: {contexto_tabla}"}
+    def _mensajes_api(self, user_input, lecciones, borrador_actual, historial_mensajes):
+        return self.prompt.construir(user_input, lecciones, borrador_actual, historial_mensajes)
+
+    def _formato(self, lote=False):
+        """kwargs de response_format para chat.completions.create (vacío en modo texto)"""
+        if not self.estructurada:
+            return {}
+        return {"response_format": {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "respuesta_laia_lote" if lote else "respuesta_laia", "strict": True,
+                "schema": ESQUEMA_LOTE if lote else ESQUEMA_RESPUESTA,
+            },
+        }}
+
+    def _reparar(self, mensajes_api, raw_content, errores, lote=False):
+        """Un único pase de reparación: se le devuelve al modelo su JSON con los errores"""
+        mensajes = mensajes_api + [
+            {"role": "assistant", "content": raw_content or ""},
+            {"role": "user", "content": f"Tu respuesta no cumple el formato de salida ({errores}). Devuelve SOLO el JSON corregido, con todos los items."},
         ]
-        for m in historial_mensajes[-10:]: mensajes_api.append(m)
-        mensajes_api.append({"role": "user", "content": user_input})
-        
-        response = self.client.chat.completions.create(model=self.model, messages=mensajes_api, temperature=self.temperature)
-        raw_content = response.choices[0].message.content
-        texto_fuera, res_txt = self.extraer_json(raw_content)
-        
         try:
-            res_json = json.loads(res_txt) if res_txt else {}
-        except:
+            response = self.client.chat.completions.create(
+                model=self.model, messages=mensajes, temperature=self.temperature, **self._formato(lote)
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"Error IA Reparación: {e}")
+            return None
+
+    def _armar_resultado(self, clave, raw_content, mensajes_api, lote=False):
+        texto_fuera, res_txt = self.extraer_json(raw_content or "")
+        res_json, errores = validar(res_txt, lote)
+        self.contadores["respuestas"] += 1
+
+        if res_json is None:
+            reparado = self._reparar(mensajes_api, raw_content, errores, lote)
+            if reparado:
+                texto_rep, res_txt = self.extraer_json(reparado)
+                res_json, errores = validar(res_txt, lote)
+                if res_json is not None:
+                    self.contadores["reparadas"] += 1
+                    raw_content = reparado
+                    texto_fuera = texto_fuera or texto_rep
+        if res_json is None:
+            self.contadores["invalidas"] += 1
+            print(f"IA: respuesta fuera de esquema ({errores})")
             res_json = {}
-        
+
         voz_interna = res_json.get("missing_info", "")
         msg_laia = f"{texto_fuera}\n{voz_interna}".strip()
-        return {"mensaje": msg_laia or "Instrucción procesada.", "json_response": res_json, "raw_content": raw_content}
+        resultado = {"mensaje": msg_laia or "Instrucción procesada.", "json_response": res_json, "raw_content": raw_content}
+        if res_json and clave:
+            self.cache.guardar(clave, resultado)  # una respuesta sin JSON no se repite
+        return resultado
+
+    def _clave_cache(self, user_input, lecciones, borrador_actual):
+        version = f"{VERSION_PROMPT}-{'esquema' if self.estructurada else 'texto'}"
+        return self.cache.clave(self.model, version, lecciones, borrador_actual, user_input)
+
+    def procesar_input(self, user_input, lecciones, borrador_actual, historial_mensajes):
+        """
+        Respuesta del modelo para un turno. Con temperature=0 el resultado depende
+        del prompt, las lecciones, el borrador y el texto: esa tupla es la clave del
+        cache (el historial no entra; el borrador ya resume el estado de la charla).
+
+        Returns:
+            dict: mensaje, json_response, raw_content (+ cache=True si no se llamó a la API)
+        """
+        clave = self._clave_cache(user_input, lecciones, borrador_actual)
+        cacheado = self.cache.obtener(clave)
+        if cacheado is not None:
+            cacheado["cache"] = True
+            return cacheado
+
+        if self._en_lotes(user_input, borrador_actual):
+            resultado = self._procesar_en_lotes(clave, user_input, lecciones, borrador_actual, historial_mensajes)
+            if resultado is not None:
+                return resultado
+
+        mensajes_api = self._mensajes_api(user_input, lecciones, borrador_actual, historial_mensajes)
+        response = self.client.chat.completions.create(
+            model=self.model, messages=mensajes_api, temperature=self.temperature, **self._formato()
+        )
+        return self._armar_resultado(clave, response.choices[0].message.content, mensajes_api)
+
+    def procesar_input_stream(self, user_input, lecciones, borrador_actual, historial_mensajes):
+        """
+        Igual que procesar_input pero con stream=True: va entregando lo que ya se
+        puede mostrar mientras el modelo escribe.
+
+        Yields:
+            tuple: ("texto", texto hablado + missing_info a medida que llega),
+            ("items", items completos hasta ahora, uno más por cada objeto que se
+            cierra) y al final ("fin", resultado de procesar_input)
+        """
+        clave = self._clave_cache(user_input, lecciones, borrador_actual)
+        cacheado = self.cache.obtener(clave)
+        if cacheado is not None:
+            cacheado["cache"] = True
+            yield "fin", cacheado
+            return
+
+        if self._en_lotes(user_input, borrador_actual):
+            resultado = self._procesar_en_lotes(clave, user_input, lecciones, borrador_actual, historial_mensajes)
+            if resultado is not None:
+                yield "items", resultado["json_response"].get("items", [])
+                yield "fin", resultado
+                return
+
+        mensajes_api = self._mensajes_api(user_input, lecciones, borrador_actual, historial_mensajes)
+        stream = self.client.chat.completions.create(
+            model=self.model, messages=mensajes_api, temperature=self.temperature, stream=True, **self._formato()
+        )
+        lector = LectorRespuesta()
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            fragmento = chunk.choices[0].delta.content
+            for evento in lector.alimentar(fragmento):
+                yield evento
+        yield "fin", self._armar_resultado(clave, lector.buffer, mensajes_api)
+
+    # ---------------------------
+    # Borradores grandes: trozos en paralelo
+    # ---------------------------
+    def _en_lotes(self, user_input, borrador_actual):
+        return (
+            Config.LLM_LOTE_ITEMS > 0
+            and len(borrador_actual or []) > Config.LLM_LOTE_ITEMS
+            and not RE_BORRADO.search(str(user_input or "").lower())
+        )
+
+    @staticmethod
+    def _clave_serie(item):
+        s = str(item.get("serie") or "").strip().lower()
+        return "" if s in ("", "n/a", "na", "none", "null") else s
+
+    def _indices_mencionados(self, user_input, borrador):
+        """Items cuya serie aparece en el mensaje (si habla de todos, ninguno en particular)"""
+        texto = str(user_input or "").lower()
+        if RE_TODOS.search(texto):
+            return []
+        return [i for i, it in enumerate(borrador) if len(self._clave_serie(it)) >= 4 and self._clave_serie(it) in texto]
+
+    def _procesar_trozo(self, user_input, lecciones, trozo, historial_mensajes, desde, total, nuevos):
+        mensajes = self._mensajes_api(user_input, lecciones, trozo, historial_mensajes)
+        aviso = (
+            f"MODO LOTE: el ESTADO ACTUAL es solo una parte del borrador (items {desde + 1}-{desde + len(trozo)} de {total}). "
+            "Devuelve en items ÚNICAMENTE los items de esta parte que cambian por el mensaje del usuario, completos; "
+            "si ninguno cambia, items = []. Cada item lleva en fila el N° (#) de su fila en el ESTADO ACTUAL, "
+            "aunque le cambies la serie. "
+            + ("Si el usuario agrega equipos nuevos, inclúyelos con fila 0." if nuevos else "No agregues equipos nuevos: otra parte se encarga.")
+        )
+        mensajes = mensajes[:-1] + [{"role": "system", "content": aviso}, mensajes[-1]]
+        response = self.client.chat.completions.create(
+            model=self.model, messages=mensajes, temperature=self.temperature, **self._formato(lote=True)
+        )
+        return self._armar_resultado(None, response.choices[0].message.content, mensajes, lote=True)
+
+    def _procesar_en_lotes(self, clave, user_input, lecciones, borrador_actual, historial_mensajes):
+        """
+        El borrador se parte en trozos de Config.LLM_LOTE_ITEMS que el modelo revisa
+        a la vez (a lo sumo Config.LLM_LOTE_HILOS en vuelo). Cada trozo devuelve solo
+        los items que cambian, con su N° de fila en el trozo, y reemplazan a esa fila
+        del borrador; los nuevos solo se aceptan del primer trozo. Si el mensaje
+        nombra series concretas, solo viajan los items con esas series.
+
+        Returns:
+            dict como procesar_input, o None si algún trozo falló (=> llamada completa)
+        """
+        borrador = list(borrador_actual)
+        indices = self._indices_mencionados(user_input, borrador) or list(range(len(borrador)))
+        tam = Config.LLM_LOTE_ITEMS
+        trozos = [indices[i:i + tam] for i in range(0, len(indices), tam)]
+
+        resultados = {}
+        hilos = max(1, Config.LLM_LOTE_HILOS)
+        for ola in range(0, len(trozos), hilos):
+            tareas = {
+                n: (lambda n=n: self._procesar_trozo(
+                    user_input, lecciones, [borrador[i] for i in trozos[n]], historial_mensajes,
+                    trozos[n][0], len(borrador), n == 0,
+                ))
+                for n in range(ola, min(ola + hilos, len(trozos)))
+            }
+            try:
+                resultados.update(en_paralelo(tareas))
+            except Exception as e:
+                print(f"Error IA Lotes: {e}")
+                return None
+        if any(not r["json_response"] for r in resultados.values()):
+            return None
+
+        final = [dict(it) for it in borrador]
+        por_serie = {self._clave_serie(it): i for i, it in enumerate(borrador) if self._clave_serie(it)}
+        agregadas = set()
+        nuevos, estados, avisos = [], [], []
+        for n in sorted(resultados):
+            res = resultados[n]["json_response"]
+            estados.append(res.get("status"))
+            if res.get("missing_info") and res["missing_info"] not in avisos:
+                avisos.append(res["missing_info"])
+            for it in res.get("items") or []:
+                it = dict(it)
+                fila = it.pop("fila", 0)
+                # La fila (N° en el ESTADO ACTUAL del trozo) identifica el item aunque cambie su serie
+                if 1 <= fila <= len(trozos[n]):
+                    final[trozos[n][fila - 1]] = it
+                    continue
+                s = self._clave_serie(it)
+                if s in por_serie:
+                    final[por_serie[s]] = it  # sin fila pero con una serie del borrador
+                elif n == 0 and (not s or s not in agregadas):
+                    nuevos.append(it)  # solo el primer trozo puede agregar equipos
+                    if s:
+                        agregadas.add(s)
+
+        self.contadores["lotes"] += 1
+        self.contadores["trozos"] += len(trozos)
+        res_json = {
+            "status": "QUESTION" if "QUESTION" in estados else "READY",
+            "missing_info": " ".join(avisos),
+            "items": final + nuevos,
+        }
+        resultado = {
+            "mensaje": res_json["missing_info"] or "Instrucción procesada.",
+            "json_response": res_json,
+            "raw_content": json.dumps(res_json, ensure_ascii=False),
+            "trozos": len(trozos),
+        }
+        self.cache.guardar(clave, resultado)
+        return resultado
+
+    def estadisticas_cache(self):
+        return self.cache.estadisticas()
+
+    def estadisticas_salida(self):
+        """Respuestas validadas, reparadas e inválidas; borradores partidos en lotes y trozos enviados"""
+        return dict(self.contadores, estructurada=self.estructurada)
+
+    def estadisticas_prompt(self):
+        """Tokens y recortes del último prompt armado"""
+        return dict(self.prompt.ultimo)
 
     def generar_orden_borrado(self, instruccion, historial_reciente):
         """Genera orden de borrado (Exactamente como el original)"""
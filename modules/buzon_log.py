@@ -0,0 +1,181 @@
+"""
+modules/buzon_log.py
+Buzón append-only segmentado: cada envío es un archivo nuevo en buzon/ y una
+compactación los consolida en buzon.json para el robot (al escribir si toca por
+cantidad/antigüedad, y en cada vuelta del hilo de RefrescoHistorico)
+"""
+import time
+
+from modules.concurrencia import en_paralelo
+
+
+class BuzonLog:
+    """
+    Formato en el repo:
+        buzon.json                  -> registros ya compactados (lo que lee el robot v91.2)
+        buzon/000001739999999999.json -> un segmento por envío, nombre = secuencia monotónica
+
+    Escribir un segmento no necesita leer ni el buzón ni el sha de nadie, así que el
+    costo es O(lote) y dos operadores no se pisan: si dos eligen la misma secuencia,
+    GitHub rechaza al segundo y éste reintenta con la siguiente.
+    Orden de lectura: buzon.json y luego los segmentos por secuencia ascendente.
+    """
+
+    ARCHIVO = "buzon.json"
+    CARPETA = "buzon"
+    DIGITOS = 18
+
+    def __init__(self, backend, compactar_cada=10, compactar_seg=120, max_intentos=5):
+        """
+        Args:
+            backend: GitHubBackend (necesita leer/listar/crear/lote)
+            compactar_cada: N° de segmentos pendientes que dispara la compactación
+            compactar_seg: Antigüedad (seg) del segmento más viejo que la dispara
+            max_intentos: Reintentos si otro escritor tomó la misma secuencia
+        """
+        self.backend = backend
+        self.compactar_cada = compactar_cada
+        self.compactar_seg = compactar_seg
+        self.max_intentos = max_intentos
+
+    # ---------------------------
+    # Nombres / secuencias
+    # ---------------------------
+    def _nombre(self, seq):
+        return f"{self.CARPETA}/{seq:0{self.DIGITOS}d}.json"
+
+    @staticmethod
+    def _seq_de(nombre):
+        base = nombre.rsplit("/", 1)[-1]
+        if not base.endswith(".json"):
+            return None
+        base = base[:-5]
+        return int(base) if base.isdigit() else None
+
+    def segmentos(self):
+        """
+        Returns:
+            list: [(seq, path, sha)] ordenados por secuencia; None si no se pudo listar
+        """
+        archivos = self.backend.listar(self.CARPETA)
+        if archivos is None:
+            return None
+        segs = []
+        for a in archivos:
+            seq = self._seq_de(a["name"])
+            if seq is not None:
+                segs.append((seq, a["path"], a["sha"]))
+        return sorted(segs)
+
+    def _siguiente_seq(self, segs):
+        # Secuencia = milisegundos; así sigue siendo monotónica después de compactar
+        ahora = int(time.time() * 1000)
+        ultimo = segs[-1][0] if segs else 0
+        return max(ahora, ultimo + 1)
+
+    # ---------------------------
+    # Escritura
+    # ---------------------------
+    def agregar(self, datos, mensaje="Registro LAIA"):
+        """
+        Agrega un lote como segmento nuevo.
+
+        Returns:
+            bool: True si el segmento quedó escrito
+        """
+        lote = datos if isinstance(datos, list) else [datos]
+        segs = self.segmentos() or []
+        seq = self._siguiente_seq(segs)
+
+        t0 = time.time()
+        ok, intentos, conflictos = False, 0, 0
+        for _ in range(self.max_intentos):
+            intentos += 1
+            res = self.backend.crear(self._nombre(seq), lote, mensaje)
+            if res == "creado":
+                ok = True
+                break
+            if res == "error":
+                break
+            conflictos += 1
+            seq += 1  # "existe": otro escritor ganó esta secuencia
+        self.backend.metricas.registrar(self.ARCHIVO, ok, intentos, conflictos, time.time() - t0, via="segmento")
+
+        if ok:
+            segs.append((seq, self._nombre(seq), None))
+            if self._toca_compactar(segs):
+                self.compactar()
+        return ok
+
+    def compactar_si_toca(self):
+        """Para quien escribió un segmento por otro camino (ej. LoteGit)"""
+        segs = self.segmentos()
+        if segs and self._toca_compactar(segs):
+            self.compactar()
+
+    def _toca_compactar(self, segs):
+        if len(segs) >= self.compactar_cada:
+            return True
+        if segs:
+            antiguedad = time.time() - segs[0][0] / 1000.0
+            return antiguedad >= self.compactar_seg
+        return False
+
+    # ---------------------------
+    # Lectura / compactación
+    # ---------------------------
+    def _leer_todo(self, segs):
+        """buzon.json y los segmentos a la vez (una ronda de red, no una por archivo)"""
+        tareas = {self.ARCHIVO: lambda: self.backend.leer(self.ARCHIVO)}
+        for _, path, _ in segs:
+            tareas[path] = lambda path=path: self.backend.leer(path)
+        return en_paralelo(tareas)
+
+    def leer(self):
+        """Buzón completo en orden: compactado + segmentos pendientes"""
+        segs = self.segmentos() or []
+        leidos = self._leer_todo(segs)
+        base, _ = leidos[self.ARCHIVO]
+        registros = list(base) if isinstance(base, list) else []
+        for _, path, _ in segs:
+            datos, _ = leidos[path]
+            if isinstance(datos, list):
+                registros.extend(datos)
+        return registros
+
+    def compactar(self, mensaje="LAIA: Compactación de buzón"):
+        """
+        Consolida los segmentos pendientes en buzon.json y los borra, todo en un
+        solo commit (LoteGit) en lugar de un commit por segmento.
+
+        Si buzon.json o un segmento cambió entre la lectura y el commit (robot u
+        otro operador), el lote no se publica y no se borra nada: se reintenta en
+        la próxima.
+
+        Returns:
+            int: N° de segmentos compactados (0 si no había o hubo conflicto)
+        """
+        segs = self.segmentos()
+        if not segs:
+            return 0
+
+        contenidos = self._leer_todo(segs)
+        base, sha = contenidos[self.ARCHIVO]
+        if base is None:
+            return 0
+        registros = list(base) if isinstance(base, list) else []
+
+        leidos = []
+        for seq, path, sha_seg in segs:
+            datos, sha_leido = contenidos[path]
+            if datos is None:
+                break  # respetar el orden: no saltar un segmento ilegible
+            registros.extend(datos if isinstance(datos, list) else [datos])
+            leidos.append((path, sha_seg or sha_leido))
+
+        if not leidos:
+            return 0
+        lote = self.backend.lote(mensaje).escribir(self.ARCHIVO, registros, si_sha=sha)
+        for path, sha_seg in leidos:
+            lote.borrar(path, si_sha=sha_seg)
+        return len(leidos) if lote.publicar() else 0
@@ -0,0 +1,94 @@
+"""
+modules/cache_contenido.py
+Cache local de contenidos descargados de GitHub (por ruta + sha del blob),
+revalidado con ETag / If-None-Match
+"""
+import copy
+import threading
+import time
+
+
+class EntradaCache:
+    """Objeto ya parseado + metadatos para revalidarlo"""
+
+    __slots__ = ("etag", "sha", "datos", "guardado")
+
+    def __init__(self, etag, sha, datos):
+        self.etag = etag
+        self.sha = sha
+        self.datos = datos
+        self.guardado = time.time()
+
+
+class CacheContenido:
+    """
+    Cache compartida por todo el proceso (todas las sesiones de Streamlit).
+
+    - Dentro del TTL se responde sin tocar la red.
+    - Pasado el TTL se revalida con If-None-Match: un 304 reutiliza el objeto ya
+      parseado (y GitHub no lo descuenta del rate limit).
+    - Si llega un 200 con el mismo sha de blob, tampoco se vuelve a decodificar.
+
+    Los datos se entregan como copia superficial: los llamadores pueden hacer
+    append/extend sobre la lista, pero no deben modificar los dicts internos.
+    """
+
+    def __init__(self, ttl=15):
+        self.ttl = ttl
+        self._entradas = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, ruta):
+        with self._lock:
+            return self._entradas.get(ruta)
+
+    def vigente(self, entrada):
+        return entrada is not None and (time.time() - entrada.guardado) < self.ttl
+
+    def guardar(self, ruta, etag, sha, datos):
+        with self._lock:
+            self._entradas[ruta] = EntradaCache(etag, sha, datos)
+
+    def tocar(self, ruta):
+        """Renueva el TTL tras un 304"""
+        with self._lock:
+            e = self._entradas.get(ruta)
+            if e:
+                e.guardado = time.time()
+
+    def expirar(self, ruta=None):
+        """Fuerza revalidación (conserva ETag y datos: si no cambió, será un 304)"""
+        with self._lock:
+            entradas = [self._entradas.get(ruta)] if ruta else list(self._entradas.values())
+            for e in entradas:
+                if e:
+                    e.guardado = 0
+
+    def invalidar(self, ruta=None):
+        """Olvida la entrada (o todas)"""
+        with self._lock:
+            if ruta:
+                self._entradas.pop(ruta, None)
+            else:
+                self._entradas.clear()
+
+    @staticmethod
+    def copia(datos):
+        if isinstance(datos, list):
+            return list(datos)
+        if isinstance(datos, dict):
+            return dict(datos)
+        return copy.copy(datos)
+
+
+_CACHE_GITHUB = None
+_CACHE_LOCK = threading.Lock()
+
+
+def cache_github(ttl=15):
+    """Instancia única por proceso para los contenidos de GitHub"""
+    global _CACHE_GITHUB
+    with _CACHE_LOCK:
+        if _CACHE_GITHUB is None:
+            _CACHE_GITHUB = CacheContenido(ttl=ttl)
+        return _CACHE_GITHUB
@@ -0,0 +1,184 @@
+"""
+modules/cache_llm.py
+Cache de respuestas del modelo direccionada por contenido: misma entrada (modelo,
+versión del prompt, lecciones, borrador, texto del usuario) => misma respuesta,
+sin volver a llamar a la API. LRU en memoria + capa opcional en disco.
+"""
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+def huella(valor):
+    """Digest estable de cualquier estructura JSON (orden de claves incluido)"""
+    crudo = json.dumps(valor, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(crudo.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def normalizar_texto(texto):
+    """Espacios colapsados y sin bordes; se respetan mayúsculas (series, modelos)"""
+    return re.sub(r"\s+", " ", str(texto or "")).strip()
+
+
+class CacheRespuestasLLM:
+    """
+    - Memoria: OrderedDict LRU acotado a `max_entradas`, con TTL por entrada.
+    - Disco (opcional): un JSON por clave en `directorio`; sobrevive reinicios y
+      se promueve a memoria al leerlo. Se poda a `max_disco` archivos.
+    - Contadores de aciertos / fallos para el panel técnico.
+
+    Solo tiene sentido con temperature=0: la misma entrada da la misma salida.
+    """
+
+    def __init__(self, ttl=1800, max_entradas=256, directorio=None, max_disco=2000):
+        """
+        Args:
+            ttl: Segundos de validez de una respuesta
+            max_entradas: Tope de la LRU en memoria
+            directorio: Carpeta de la capa en disco (None/"" = solo memoria)
+            max_disco: Tope de archivos en disco
+        """
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.directorio = directorio or None
+        self.max_disco = max_disco
+        self._entradas = OrderedDict()  # clave -> (guardado, valor)
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.expirados = 0
+        self.desalojos = 0
+
+    @staticmethod
+    def clave(modelo, version_prompt, lecciones, borrador, texto):
+        return huella({
+            "modelo": modelo,
+            "prompt": version_prompt,
+            "lecciones": huella(lecciones or []),
+            "borrador": borrador or [],
+            "texto": normalizar_texto(texto),
+        })
+
+    # ---------------------------
+    # Lectura / escritura
+    # ---------------------------
+    def obtener(self, clave):
+        """
+        Returns:
+            Copia profunda del valor guardado (el llamador puede modificarla) o None
+        """
+        ahora = time.time()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if ahora - entrada[0] < self.ttl:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return copy.deepcopy(entrada[1])
+                del self._entradas[clave]
+                self.expirados += 1
+
+        entrada = self._leer_disco(clave, ahora)
+        with self._lock:
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            self.aciertos_disco += 1
+            self._poner(clave, entrada)
+            return copy.deepcopy(entrada[1])
+
+    def guardar(self, clave, valor):
+        entrada = (time.time(), copy.deepcopy(valor))
+        with self._lock:
+            self._poner(clave, entrada)
+        self._escribir_disco(clave, entrada)
+
+    def _poner(self, clave, entrada):
+        self._entradas[clave] = entrada
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+            self.desalojos += 1
+
+    def vaciar(self):
+        with self._lock:
+            self._entradas.clear()
+        if self.directorio and os.path.isdir(self.directorio):
+            for nombre in os.listdir(self.directorio):
+                if nombre.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.directorio, nombre))
+                    except OSError:
+                        pass
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "aciertos_disco": self.aciertos_disco,
+                "fallos": self.fallos,
+                "tasa_acierto": round(self.aciertos / consultas, 3) if consultas else None,
+                "expirados": self.expirados,
+                "desalojos": self.desalojos,
+            }
+
+    # ---------------------------
+    # Capa en disco
+    # ---------------------------
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def _leer_disco(self, clave, ahora):
+        if not self.directorio:
+            return None
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                d = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if ahora - d.get("guardado", 0) >= self.ttl:
+            with self._lock:
+                self.expirados += 1
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+            return None
+        return d["guardado"], d["valor"]
+
+    def _escribir_disco(self, clave, entrada):
+        if not self.directorio:
+            return
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            tmp = f"{self._ruta(clave)}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"guardado": entrada[0], "valor": entrada[1]}, f, ensure_ascii=False)
+            os.replace(tmp, self._ruta(clave))
+            self._podar_disco()
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Cache LLM: no se pudo guardar en disco ({e})")
+
+    def _podar_disco(self):
+        archivos = [
+            os.path.join(self.directorio, n) for n in os.listdir(self.directorio) if n.endswith(".json")
+        ]
+        if len(archivos) <= self.max_disco:
+            return
+        archivos.sort(key=os.path.getmtime)
+        for ruta in archivos[:len(archivos) - self.max_disco]:
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
@@ -0,0 +1,48 @@
+"""
+modules/concurrencia.py
+Pool de hilos compartido para E/S remota: las lecturas independientes (GitHub,
+GLPI) salen en paralelo y cada acción tarda lo que la más lenta, no la suma
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+_PREFIJO = "laia-io"
+
+
+def pool_io(hilos=8):
+    """Instancia única por proceso (la comparten todas las sesiones de Streamlit)"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix=_PREFIJO)
+        return _POOL
+
+
+def lanzar(fn, *args, **kwargs):
+    """
+    Ejecuta fn en el pool sin esperar.
+
+    Returns:
+        concurrent.futures.Future
+    """
+    return pool_io().submit(fn, *args, **kwargs)
+
+
+def en_paralelo(tareas, timeout=None):
+    """
+    Corre varias llamadas independientes a la vez y espera todas.
+
+    Args:
+        tareas: dict nombre -> callable sin argumentos
+        timeout: Segundos máximos de espera por tarea (None = sin límite)
+
+    Returns:
+        dict: nombre -> resultado. Si una tarea lanzó excepción, se propaga
+    """
+    # Desde un hilo del pool se corre en línea: esperar al propio pool puede trabarlo
+    if len(tareas) <= 1 or threading.current_thread().name.startswith(_PREFIJO):
+        return {nombre: fn() for nombre, fn in tareas.items()}
+    futuros = {nombre: lanzar(fn) for nombre, fn in tareas.items()}
+    return {nombre: f.result(timeout=timeout) for nombre, f in futuros.items()}
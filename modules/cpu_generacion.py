@@ -0,0 +1,129 @@
+"""
+modules/cpu_generacion.py
+Clasificador de generación de CPU (Intel Core / AMD Ryzen, ordinales en español
+e inglés) compartido por el cálculo de stock, el chat y las reglas de obsolescencia
+"""
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Generación máxima que se considera obsoleta (chatarrización), por fabricante.
+# Ryzen 1000/2000 (2017-2018) son contemporáneos de Intel 7ma-9na.
+OBSOLETA_MAX = {"intel": 9, "amd": 2}
+
+ORDINALES = {
+    # Español
+    "cuarta": 4, "quinta": 5, "sexta": 6, "septima": 7, "séptima": 7,
+    "octava": 8, "novena": 9, "decima": 10, "décima": 10,
+    "undecima": 11, "undécima": 11, "onceava": 11,
+    "duodecima": 12, "duodécima": 12, "doceava": 12,
+    "decimotercera": 13, "treceava": 13, "decimocuarta": 14, "catorceava": 14,
+    # Inglés
+    "fourth": 4, "fifth": 5, "sixth": 6, "seventh": 7, "eighth": 8, "ninth": 9,
+    "tenth": 10, "eleventh": 11, "twelfth": 12, "thirteenth": 13, "fourteenth": 14,
+}
+
+# Una sola pasada: gana el primer patrón que aparece en el texto
+RE_GENERACION = re.compile(
+    r"""
+      \bi[3579]\s*-?\s*(?P<intel>\d{4,5})(?!\d)            # i5-8250u, i7 10510u, i5-1135g7
+    | \bryzen\s*[3579]\s*(?:pro\s*)?(?P<ryzen>[1-9])\d{3}(?!\d)  # ryzen 5 3500u, ryzen 7 pro 4750u
+    | \bgen(?:eraci[oó]n)?\.?\s*(?P<gen>\d{1,2})(?!\d)     # gen 8, generación 10
+    | (?<!\d)(?P<num_gen>\d{1,2})\s*gen                     # 8 gen, 10gen
+    | (?<!\d)(?P<num>\d{1,2})(?:th|st|nd|rd|ta|va|na|ma|ra|da|a|ª|º|°)(?![a-z])  # 8th, 8va, 10ma, 8ª
+    | \b(?P<palabra>""" + "|".join(sorted(ORDINALES, key=len, reverse=True)) + r""")\b
+    """,
+    re.VERBOSE,
+)
+RE_AMD = re.compile(r"\b(?:amd|ryzen)\b")
+
+VACIOS = {"", "n/a", "na", "nan", "none", "null", "-"}
+
+
+def normalizar(procesador):
+    """Clave de cache: minúsculas, espacios colapsados; '' si no hay dato"""
+    if procesador is None or (isinstance(procesador, float) and procesador != procesador):
+        return ""
+    p = " ".join(str(procesador).lower().split())
+    return "" if p in VACIOS else p
+
+
+@lru_cache(maxsize=4096)
+def analizar(p):
+    """
+    Args:
+        p: Procesador ya normalizado (ver normalizar)
+
+    Returns:
+        tuple: (fabricante, generacion) o (None, None) si no se puede inferir.
+               Para AMD la generación es la serie Ryzen (5600U => 5).
+    """
+    if not p:
+        return None, None
+    m = RE_GENERACION.search(p)
+    if not m:
+        return None, None
+
+    if m.group("intel"):
+        codigo = m.group("intel")
+        # 4 dígitos: 8250 => 8; pero 1135 / 1005 (10ma-13va móviles) => 11 / 10
+        if len(codigo) == 5 or codigo[0] == "1":
+            return "intel", int(codigo[:2])
+        return "intel", int(codigo[0])
+
+    if m.group("ryzen"):
+        return "amd", int(m.group("ryzen"))
+
+    fabricante = "amd" if RE_AMD.search(p) else "intel"
+    if m.group("palabra"):
+        return fabricante, ORDINALES[m.group("palabra")]
+    return fabricante, int(m.group("gen") or m.group("num_gen") or m.group("num"))
+
+
+def generacion(procesador):
+    """Returns: int o None (Intel: generación Core; AMD: serie Ryzen)"""
+    return analizar(normalizar(procesador))[1]
+
+
+def es_obsoleto(procesador):
+    fabricante, gen = analizar(normalizar(procesador))
+    return gen is not None and gen <= OBSOLETA_MAX[fabricante]
+
+
+def clasificar(procesador):
+    """
+    Returns:
+        str: 'obsoleto' o 'moderno' (sin dato o sin generación => 'moderno')
+    """
+    return "obsoleto" if es_obsoleto(procesador) else "moderno"
+
+
+def es_obsoleto_serie(serie):
+    """
+    Versión por lotes: clasifica una vez cada valor distinto y expande por código.
+
+    Args:
+        serie: pd.Series (o iterable) de procesadores
+
+    Returns:
+        np.ndarray: bool por fila
+    """
+    codigos, valores = pd.factorize(pd.Series(serie), use_na_sentinel=False)
+    por_valor = np.fromiter((es_obsoleto(v) for v in valores), dtype=bool, count=len(valores))
+    return por_valor[codigos]
+
+
+def clasificar_serie(serie):
+    """Returns: pd.Series 'obsoleto'/'moderno' con el mismo índice"""
+    serie = pd.Series(serie)
+    return pd.Series(
+        np.where(es_obsoleto_serie(serie), "obsoleto", "moderno"),
+        index=serie.index, name=serie.name,
+    )
+
+
+def info_cache():
+    """Aciertos/fallos del memo (para el panel de debug)"""
+    return analizar.cache_info()
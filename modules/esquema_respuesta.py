@@ -0,0 +1,135 @@
+"""
+modules/esquema_respuesta.py
+Esquema de la respuesta del modelo (el formato de salida de SYSTEM_PROMPT) como
+modelos pydantic: valida y normaliza lo que devuelve la API y genera el JSON
+Schema estricto que se le pasa en `response_format`.
+"""
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
+
+
+class ItemRespuesta(BaseModel):
+    """Un movimiento del borrador (mismas claves que el formato de SYSTEM_PROMPT)"""
+
+    model_config = ConfigDict(extra="ignore")
+
+    categoria_item: str = ""
+    tipo: str = ""
+    equipo: str = ""
+    marca: str = ""
+    modelo: str = ""
+    serie: str = ""
+    cantidad: int = 1
+    estado: str = ""
+    procesador: str = ""
+    ram: str = ""
+    disco: str = ""
+    reporte: str = ""
+    origen: str = ""
+    destino: str = ""
+    pasillo: str = ""
+    estante: str = ""
+    repisa: str = ""
+    guia: str = ""
+    fecha_llegada: str = ""
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _texto(cls, v, info):
+        if info.field_name == "cantidad":
+            if v is None or str(v).strip() == "":
+                return 1
+            return v
+        if v is None:
+            return ""
+        if isinstance(v, (int, float)):
+            return str(v)
+        return v
+
+
+class RespuestaLAIA(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    status: Literal["READY", "QUESTION", "IDLE"] = "QUESTION"
+    missing_info: str = ""
+    items: list[ItemRespuesta] = []
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def _status(cls, v):
+        return str(v or "QUESTION").strip().upper()
+
+    @field_validator("missing_info", mode="before")
+    @classmethod
+    def _missing(cls, v):
+        return "" if v is None else v
+
+
+class ItemLote(ItemRespuesta):
+    """Item devuelto en modo lote: `fila` es su N° en el ESTADO ACTUAL del trozo (0 = nuevo)"""
+
+    fila: int = 0
+
+    @field_validator("fila", mode="before")
+    @classmethod
+    def _fila(cls, v):
+        return 0 if v is None or str(v).strip() == "" else v
+
+
+class RespuestaLote(RespuestaLAIA):
+    items: list[ItemLote] = []
+
+
+def esquema_json(lote=False):
+    """
+    JSON Schema para `response_format={"type": "json_schema", ...}` en modo strict:
+    todas las claves requeridas y sin propiedades extra.
+
+    Args:
+        lote: Esquema del modo por trozos (cada item lleva además `fila`)
+    """
+    modelo_item = ItemLote if lote else ItemRespuesta
+    props_item = {
+        nombre: {"type": "integer" if campo.annotation is int else "string"}
+        for nombre, campo in modelo_item.model_fields.items()
+    }
+    return {
+        "type": "object",
+        "properties": {
+            "status": {"type": "string", "enum": ["READY", "QUESTION", "IDLE"]},
+            "missing_info": {"type": "string"},
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": props_item,
+                    "required": list(props_item),
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["status", "missing_info", "items"],
+        "additionalProperties": False,
+    }
+
+
+def validar(texto_json, lote=False):
+    """
+    Args:
+        texto_json: JSON devuelto por el modelo
+        lote: Validar contra RespuestaLote (items con `fila`)
+
+    Returns:
+        tuple: (dict normalizado o None, errores legibles para el pase de reparación)
+    """
+    if not texto_json:
+        return None, "no hay JSON en la respuesta"
+    try:
+        modelo = RespuestaLote if lote else RespuestaLAIA
+        return modelo.model_validate_json(texto_json).model_dump(), ""
+    except ValidationError as e:
+        errores = "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'json'}: {err['msg']}" for err in e.errors()[:8]
+        )
+        return None, errores
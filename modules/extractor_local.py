@@ -0,0 +1,404 @@
+"""
+modules/extractor_local.py
+Extractor por reglas para mensajes de inventario bien formados ("recibí 10
+teclados guía 0310", listas de series/CPU/RAM/disco pegadas de una hoja): arma
+los items del esquema sin llamar al modelo. Si queda texto sin entender o algún
+dato es ambiguo, devuelve None y el mensaje va a AIEngine.
+"""
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from modules import cpu_generacion
+from modules.esquema_respuesta import RespuestaLAIA
+
+# Misma longitud que el original: los spans sirven para recortar el texto con mayúsculas
+_SIN_TILDES = str.maketrans("áéíóúüñÁÉÍÓÚÜÑ", "aeiouunAEIOUUN")
+
+NUMEROS = {
+    "un": 1, "una": 1, "uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5,
+    "seis": 6, "siete": 7, "ocho": 8, "nueve": 9, "diez": 10,
+}
+
+# palabra -> (equipo, categoria_item)
+EQUIPOS = {
+    "laptop": ("Laptop", "Computo"), "laptops": ("Laptop", "Computo"),
+    "portatil": ("Laptop", "Computo"), "portatiles": ("Laptop", "Computo"),
+    "cpu": ("CPU", "Computo"), "cpus": ("CPU", "Computo"),
+    "servidor": ("Servidor", "Computo"), "servidores": ("Servidor", "Computo"),
+    "tablet": ("Tablet", "Computo"), "tablets": ("Tablet", "Computo"),
+    "aio": ("All-in-One", "Computo"), "all-in-one": ("All-in-One", "Computo"),
+    "monitor": ("Monitor", "Pantalla"), "monitores": ("Monitor", "Pantalla"),
+    "pantalla": ("Pantalla", "Pantalla"), "pantallas": ("Pantalla", "Pantalla"),
+    "teclado": ("Teclado", "Periferico"), "teclados": ("Teclado", "Periferico"),
+    "mouse": ("Mouse", "Periferico"), "mouses": ("Mouse", "Periferico"),
+    "impresora": ("Impresora", "Periferico"), "impresoras": ("Impresora", "Periferico"),
+    "parlante": ("Parlantes", "Periferico"), "parlantes": ("Parlantes", "Periferico"),
+    "bocina": ("Parlantes", "Periferico"), "bocinas": ("Parlantes", "Periferico"),
+    "camara": ("Cámara", "Periferico"), "camaras": ("Cámara", "Periferico"),
+    "webcam": ("Cámara", "Periferico"), "webcams": ("Cámara", "Periferico"),
+    "cargador": ("Cargador", "Periferico"), "cargadores": ("Cargador", "Periferico"),
+    "toner": ("Tóner", "Periferico"), "toners": ("Tóner", "Periferico"),
+}
+
+MARCAS = {
+    "dell": "Dell", "hp": "HP", "lenovo": "Lenovo", "asus": "Asus", "acer": "Acer",
+    "apple": "Apple", "samsung": "Samsung", "lg": "LG", "logitech": "Logitech",
+    "genius": "Genius", "epson": "Epson", "canon": "Canon", "brother": "Brother",
+    "xerox": "Xerox", "microsoft": "Microsoft", "msi": "MSI", "toshiba": "Toshiba",
+    "viewsonic": "ViewSonic", "aoc": "AOC", "benq": "BenQ", "kingston": "Kingston",
+}
+
+# Lugares conocidos (se aceptan aunque vengan en minúsculas)
+LUGARES = {
+    "quito", "guayaquil", "cuenca", "ambato", "riobamba", "loja", "machala", "manta",
+    "portoviejo", "esmeraldas", "ibarra", "latacunga", "santo domingo", "babahoyo",
+    "quevedo", "milagro", "tulcan", "otavalo", "azogues", "puyo", "tena", "macas",
+    "zamora", "salinas", "daule", "duran", "chone", "guaranda", "lago agrio", "sangolqui",
+    "bodega", "stock", "matriz",
+}
+
+# Palabras que no aportan dato (no bajan la confianza)
+RELLENO = {
+    "de", "del", "la", "el", "los", "las", "y", "con", "en", "un", "una", "me", "nos", "se",
+    "hoy", "ayer", "que", "por", "favor", "pf", "porfa", "estos", "estas", "este", "esta",
+    "equipo", "equipos", "nuevo", "nuevos", "nueva", "nuevas", "buen", "buenos", "buenas",
+    "estado", "ram", "memoria", "disco", "n", "no", "nro", "numero", "gb", "tb", "ssd", "hdd",
+    "nvme", "intel", "core", "procesador", "gen", "generacion", "fecha", "llegada",
+}
+
+RE_RECIBIDO = re.compile(r"\b(?:recibi|recibimos|recibido|recibidos|llego|llegaron|ingreso|ingresaron|ingresa|entrada\s+de)\b")
+RE_ENVIADO = re.compile(r"\b(?:envie|enviamos|enviado|enviados|envio|mande|mandamos|despache|despachamos|despacho|salida\s+de)\b")
+RE_EQUIPO = re.compile(
+    r"(?:\b(?P<cant>\d{1,3}|" + "|".join(NUMEROS) + r")\s+)?\b(?P<eq>"
+    + "|".join(sorted((re.escape(k) for k in EQUIPOS), key=len, reverse=True)) + r")\b"
+)
+RE_SERIE = re.compile(
+    r"\b(?:series?|s/n|sn|serial(?:es)?|ns)\s*[:#]?\s*"
+    r"(?P<lista>[a-z0-9][a-z0-9\-]{2,}(?:\s*(?:,|/|\by\b)\s*[a-z0-9][a-z0-9\-]{2,})*)"
+)
+RE_GUIA = re.compile(r"\bguia\s*(?:n[o°º.]?\s*)?[:#]?\s*(?P<guia>(?=[a-z\-]*\d)[a-z0-9][a-z0-9\-]*)\b")
+RE_GUIA_PALABRA = re.compile(r"\bguias?\b")
+RE_CPU = re.compile(r"\b(?P<linea>i[3579])(?:\s*-\s*|\s+|)(?P<resto>(?:\S+\s*){0,3})")
+RE_RYZEN = re.compile(r"\bryzen\s*[3579](?:\s*pro)?\s*\d{4}[a-z]{0,2}\b")
+RE_DISCO = re.compile(
+    r"\b(?:disco\s*(?:de\s*)?)?(?P<n>\d{1,4})\s*(?P<u>gb|tb|g|t)?\s*(?:de\s*)?(?P<tipo>ssd|hdd|nvme|m\.2)\b"
+    r"|\bdisco\s*(?:de\s*)?(?P<n2>\d{1,4})\s*(?P<u2>gb|tb)\b"
+)
+RE_RAM = re.compile(
+    r"\b(?P<n>\d{1,3})\s*(?:gb|g)\s*(?:de\s*)?(?:ram|ddr\d?|memoria)\b"
+    r"|\b(?:ram|memoria)\s*(?:de\s*)?(?P<n2>\d{1,3})\s*(?:gb|g)?\b"
+    r"|\b(?P<n3>\d{1,2})\s*gb\b"
+)
+RE_FECHA = re.compile(r"\b(?P<d>\d{1,2})[/\-](?P<m>\d{1,2})[/\-](?P<a>\d{4})\b|\b(?P<iso>\d{4}-\d{2}-\d{2})\b|\b(?P<rel>hoy|ayer)\b")
+RE_LUGAR = re.compile(
+    r"\b(?P<marca>desde|hacia|para|origen\s*:?|destino\s*:?|a\s+la\s+agencia|a\s+agencia|al|a|de)\s+"
+    r"(?P<lugar>[a-z][a-z0-9\-]*(?:\s+[a-z0-9][a-z0-9\-]*){0,2})"
+)
+RE_DANADO = re.compile(r"\b(?:danad[oa]s?|mal(?:o|a|os|as)?|roto|rota|rotos|rotas|quemad[oa]s?|obsolet[oa]s?)\b")
+
+REQUERIDOS_COMPUTO = ("modelo", "serie", "procesador", "ram", "disco")
+
+
+def _hoy(dias=0):
+    return (datetime.now(timezone.utc) - timedelta(hours=5, days=dias)).strftime("%Y-%m-%d")
+
+
+class ExtractorLocal:
+    """
+    Una instancia por proceso (la tiene ChatTab). `extraer` devuelve el mismo
+    dict que AIEngine.procesar_input (con local=True) o None si hay que ir al
+    modelo. La confianza es la fracción de palabras del mensaje que alguna regla
+    explicó; por debajo de `umbral` se deriva.
+    """
+
+    def __init__(self, umbral=0.85):
+        self.umbral = umbral
+        self.resueltos = 0
+        self.derivados = 0
+        self.motivos = {}
+        self.segundos = 0.0
+        self._lock = threading.Lock()
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.resueltos + self.derivados
+            return {
+                "resueltos_local": self.resueltos,
+                "derivados_ia": self.derivados,
+                "tasa_local": round(self.resueltos / total, 3) if total else None,
+                "ms_promedio": round(1000 * self.segundos / total, 2) if total else None,
+                "motivos": dict(self.motivos),
+            }
+
+    def extraer(self, texto, borrador=None):
+        """
+        Args:
+            texto: Mensaje del usuario
+            borrador: Borrador actual (si hay, el mensaje puede ser una corrección => IA)
+
+        Returns:
+            dict o None
+        """
+        t0 = time.perf_counter()
+        resultado, motivo = self._extraer(texto, borrador)
+        with self._lock:
+            self.segundos += time.perf_counter() - t0
+            if resultado is None:
+                self.derivados += 1
+                self.motivos[motivo] = self.motivos.get(motivo, 0) + 1
+            else:
+                self.resueltos += 1
+        return resultado
+
+    # ---------------------------
+    # Reglas
+    # ---------------------------
+    def _extraer(self, texto, borrador):
+        original = str(texto or "").strip()
+        if not original:
+            return None, "vacío"
+        if borrador:
+            return None, "hay borrador"
+
+        t = original.translate(_SIN_TILDES).lower()
+        usado = bytearray(len(t))
+
+        def marcar(ini, fin):
+            usado[ini:fin] = b"\x01" * (fin - ini)
+
+        recibido = [m for m in RE_RECIBIDO.finditer(t)]
+        enviado = [m for m in RE_ENVIADO.finditer(t)]
+        if bool(recibido) == bool(enviado):
+            return None, "sin tipo de movimiento"
+        tipo = "Recibido" if recibido else "Enviado"
+        for m in recibido + enviado:
+            marcar(*m.span())
+
+        if RE_DANADO.search(t):
+            return None, "estado a interpretar"
+
+        equipos = list(RE_EQUIPO.finditer(t))
+        if not equipos:
+            return None, "sin equipo"
+
+        # Datos del mensaje completo
+        guias = {m.group("guia") for m in RE_GUIA.finditer(t)}
+        if len(guias) > 1:
+            return None, "varias guías"
+        if not guias and RE_GUIA_PALABRA.search(t):
+            return None, "guía sin número"
+        guia = ""
+        for m in RE_GUIA.finditer(t):
+            marcar(*m.span())
+            guia = original[m.start("guia"):m.end("guia")]
+
+        fecha = ""
+        for m in RE_FECHA.finditer(t):
+            marcar(*m.span())
+            if m.group("rel"):
+                fecha = _hoy(1 if m.group("rel") == "ayer" else 0)
+            elif m.group("iso"):
+                fecha = m.group("iso")
+            else:
+                fecha = f"{m.group('a')}-{int(m.group('m')):02d}-{int(m.group('d')):02d}"
+
+        # Lugares: (origen|destino, texto, posición). Más de uno del mismo tipo => IA
+        lugares = []
+        pos = 0
+        while (m := RE_LUGAR.search(t, pos)):
+            pos = m.end("marca")
+            if m.group("marca") == "de" and not original[m.start("lugar")].isupper():
+                continue  # "de" solo con nombre propio: "de Quito", no "i5 de 8va"
+            palabras = []
+            for w in re.finditer(r"\S+", m.group("lugar")):
+                pal = w.group()
+                if (pal in EQUIPOS or pal in MARCAS or pal in NUMEROS or pal in RELLENO or pal.isdigit()
+                        or pal in ("guia", "serie", "a", "al", "para", "hacia", "desde")):
+                    break
+                palabras.append(w)
+            if not palabras:
+                continue
+            fin_lugar = m.start("lugar") + palabras[-1].end()
+            lugar = original[m.start("lugar"):fin_lugar]
+            if lugar.lower().translate(_SIN_TILDES) in LUGARES:
+                lugar = lugar.title() if lugar.islower() else lugar
+            elif not all(w[0].isupper() for w in lugar.split()):
+                return None, "lugar dudoso"  # "para reemplazo", "a Quito urgente"
+            if "agencia" in m.group("marca"):
+                lugar = f"Agencia {lugar}"
+            clave = m.group("marca").split()[0].rstrip(":")
+            lugares.append(("origen" if clave in ("desde", "origen", "de") else "destino", lugar, m.start()))
+            marcar(m.start(), fin_lugar)
+            pos = fin_lugar
+        for tipo_lugar in ("origen", "destino"):
+            if sum(1 for l in lugares if l[0] == tipo_lugar) > 1:
+                return None, f"varios {tipo_lugar}s"
+        if tipo == "Enviado" and not any(l[0] == "destino" for l in lugares):
+            return None, "envío sin destino"
+
+        # Un tramo por equipo: desde su cantidad hasta el próximo equipo (o fin de línea)
+        items, tramo_de = [], []
+        for n, m in enumerate(equipos):
+            fin = equipos[n + 1].start() if n + 1 < len(equipos) else len(t)
+            salto = t.find("\n", m.end(), fin)
+            fin = salto if salto != -1 else fin
+            nuevos, motivo = self._items_de_tramo(original, t, m, fin, marcar, tipo)
+            if nuevos is None:
+                return None, motivo
+            items.extend(nuevos)
+            tramo_de.extend([n] * len(nuevos))
+
+        # Confianza: palabras que ninguna regla explicó
+        palabras = list(re.finditer(r"[a-z0-9]+", t))
+        sueltas = [p.group() for p in palabras if not any(usado[p.start():p.end()]) and p.group() not in RELLENO]
+        confianza = 1 - len(sueltas) / max(1, len(palabras))
+        if confianza < self.umbral:
+            return None, "baja confianza"
+
+        for it, n in zip(items, tramo_de):
+            it["tipo"] = tipo
+            it["guia"] = guia
+            origen = self._lugar_de_item(lugares, "origen", n, equipos)
+            destino = self._lugar_de_item(lugares, "destino", n, equipos)
+            if tipo == "Enviado" and not destino:
+                return None, "envío sin destino"
+            periferico = it["categoria_item"] == "Periferico"
+            if tipo == "Recibido":
+                it["fecha_llegada"] = fecha
+                it["origen"] = origen
+                it["destino"] = destino or ("Stock" if periferico else "Bodega")
+            else:
+                it["origen"] = origen or ("Stock" if periferico else "Bodega")
+                it["destino"] = destino
+            if it["procesador"] and cpu_generacion.es_obsoleto(it["procesador"]):
+                it["estado"] = "Obsoleto / Pendiente Chatarrización"
+                it["destino"] = "CHATARRA / BAJA"
+
+        status, faltantes = self._faltantes(items, tipo)
+        res = RespuestaLAIA.model_validate({"status": status, "missing_info": faltantes, "items": items}).model_dump()
+        mensaje = faltantes or f"{len(items)} item(s) listos para enviar."
+        return {
+            "mensaje": mensaje, "json_response": res, "raw_content": "",
+            "local": True, "confianza": round(confianza, 3),
+        }, None
+
+    @staticmethod
+    def _lugar_de_item(lugares, tipo_lugar, n, equipos):
+        """
+        Un lugar antes del primer equipo o en el tramo del último vale para todos
+        ("recibí de Quito: ...", "envié 2 mouse y 3 teclados a Cuenca"); uno en el
+        tramo de otro equipo es solo de ese equipo.
+        """
+        for clave, lugar, p in lugares:
+            if clave != tipo_lugar:
+                continue
+            tramo = next((i for i in range(len(equipos) - 1, -1, -1) if equipos[i].start() <= p), None)
+            if tramo is None or tramo == len(equipos) - 1 or tramo == n:
+                return lugar
+        return ""
+
+    def _items_de_tramo(self, original, t, m, fin, marcar, tipo):
+        ini = m.start()
+        marcar(*m.span())
+        equipo, categoria = EQUIPOS[m.group("eq")]
+        cant = m.group("cant")
+        cantidad = 1 if cant is None else (NUMEROS.get(cant) or int(cant))
+
+        base = {
+            "categoria_item": categoria, "equipo": equipo, "marca": "", "modelo": "", "serie": "",
+            "cantidad": cantidad, "estado": "Nuevo" if re.search(r"\bnuev[oa]s?\b", t) else "Bueno",
+            "procesador": "", "ram": "", "disco": "",
+        }
+
+        series = []
+        for s in RE_SERIE.finditer(t, ini, fin):
+            marcar(*s.span())
+            lista = original[s.start("lista"):s.end("lista")]
+            series.extend(x for x in re.split(r"\s*(?:,|/|\by\b)\s*", lista) if x and any(c.isdigit() for c in x))
+
+        # Marca + modelo (hasta 3 palabras que no sean otro dato)
+        for palabra in re.finditer(r"[a-z0-9\-]+", t[ini:fin]):
+            marca = MARCAS.get(palabra.group())
+            if not marca:
+                continue
+            a = ini + palabra.start()
+            marcar(a, ini + palabra.end())
+            base["marca"] = marca
+            modelo = []
+            for sig in re.finditer(r"[a-z0-9\-\.]+", t[ini + palabra.end():fin]):
+                w = sig.group()
+                if (w in RELLENO or w in EQUIPOS or w in ("serie", "series", "guia", "s/n", "sn")
+                        or re.fullmatch(r"i[3579](-\S+)?|ryzen|\d+(gb|tb|g|t)|ssd|hdd", w) or len(modelo) == 3):
+                    break
+                s0 = ini + palabra.end() + sig.start()
+                modelo.append(original[s0:s0 + len(w)])
+                marcar(s0, s0 + len(w))
+            base["modelo"] = " ".join(modelo)
+            break
+        if not base["marca"] and categoria == "Periferico":
+            base["marca"] = "N/A"
+
+        cpu = RE_CPU.search(t, ini, fin)
+        if cpu:
+            fab, gen = cpu_generacion.analizar(cpu_generacion.normalizar(cpu.group(0)))
+            if gen is None:
+                return None, "procesador sin generación"
+            base["procesador"] = f"Intel Core {cpu.group('linea')} - {gen}th Gen"
+            marcar(cpu.start(), cpu.end("linea"))
+            for w in re.finditer(r"\S+", cpu.group("resto")):
+                pal = w.group()
+                if not (cpu_generacion.RE_GENERACION.search(pal) or re.fullmatch(r"\d{4,5}[a-z0-9]*|de|gen", pal)):
+                    break
+                a = cpu.start("resto") + w.start()
+                marcar(a, a + len(pal))
+        ryzen = RE_RYZEN.search(t, ini, fin)
+        if ryzen:
+            if cpu:
+                return None, "dos procesadores"
+            base["procesador"] = "AMD " + original[ryzen.start():ryzen.end()].title()
+            marcar(*ryzen.span())
+
+        disco = RE_DISCO.search(t, ini, fin)
+        if disco:
+            marcar(*disco.span())
+            n = disco.group("n") or disco.group("n2")
+            u = (disco.group("u") or disco.group("u2") or ("TB" if len(n) == 1 else "GB")).upper()
+            u = {"G": "GB", "T": "TB"}.get(u, u)
+            tipo_disco = (disco.group("tipo") or "").upper()
+            base["disco"] = f"{n}{u} {tipo_disco}".strip()
+
+        rams = [r for r in RE_RAM.finditer(t, ini, fin) if not (disco and r.start() < disco.end() and r.end() > disco.start())]
+        if len(rams) > 1:
+            return None, "ram ambigua"
+        if rams:
+            r = rams[0]
+            marcar(*r.span())
+            base["ram"] = f"{r.group('n') or r.group('n2') or r.group('n3')}GB"
+
+        if len(series) > 1:
+            if cant is not None and cantidad != len(series):
+                return None, "cantidad y series no coinciden"
+            return [dict(base, serie=s, cantidad=1) for s in series], None
+        if series:
+            if cantidad > 1:
+                return None, "cantidad y series no coinciden"
+            base["serie"] = series[0]
+        elif cantidad > 1 and categoria != "Periferico":
+            return None, "cantidad sin series"
+        return [base], None
+
+    def _faltantes(self, items, tipo):
+        """Regla 3 del prompt: faltantes agrupados por serie (o marca/equipo)"""
+        partes = []
+        for it in items:
+            falta = []
+            if it["categoria_item"] == "Computo":
+                falta += [k for k in REQUERIDOS_COMPUTO if not it.get(k)]
+            if tipo == "Recibido" and not it.get("fecha_llegada"):
+                falta.append("fecha de llegada")
+            if falta:
+                ident = it["serie"] or " ".join(x for x in (it["marca"], it["equipo"]) if x and x != "N/A")
+                partes.append(f"Serie [{ident}]: Falta {', '.join(falta)}.")
+        return ("QUESTION" if partes else "READY"), " ".join(partes)
@@ -1,70 +1,252 @@
-import requests
-import json
-import base64
 import streamlit as st
+import threading
 import time
 
+from config.settings import Config
+from modules.buzon_log import BuzonLog
+from modules.cache_contenido import cache_github
+from modules.concurrencia import en_paralelo, lanzar, pool_io
+from modules.lote_git import LoteGit
+from modules.snapshot_columnar import SnapshotsLocales
+from modules.storage import GitHubBackend, SQLiteBackend
+
 class GitHubHandler:
-    def __init__(self):
-        try:
-            self.token = st.secrets["GITHUB_TOKEN"]
-            self.user = "Soporte1jaher"
-            self.repo = "inventario-jaher"
-        except:
-            st.error("❌ GITHUB_TOKEN no configurado en Secrets")
-            self.token = None
-
-        self.headers = {
-            "Authorization": f"token {self.token}",
-            "Cache-Control": "no-cache"
-        }
-        self.base_url = f"https://api.github.com/repos/{self.user}/{self.repo}/contents"
+    def __init__(self, backend=None, replica=None, token=None, api_url=None, cache=None):
+        """
+        Args:
+            backend: StorageBackend principal. Si es None se arma según Config.STORAGE_BACKEND
+            replica: StorageBackend donde se replican las escrituras (GitHub por defecto
+                     cuando el principal es SQLite y Config.REPLICAR_GITHUB está activo)
+            token: Token de GitHub; si es None se toma de los Secrets de Streamlit
+            api_url: Raíz de la API (por defecto Config.GITHUB_API_URL)
+            cache: CacheContenido propia (por defecto la compartida del proceso)
+        """
+        self.user = Config.GITHUB_USER
+        self.repo = Config.GITHUB_REPO
+        if token is not None:
+            self.token = token
+        else:
+            try:
+                self.token = st.secrets["GITHUB_TOKEN"]
+            except:
+                st.error("❌ GITHUB_TOKEN no configurado en Secrets")
+                self.token = None
+
+        self.remoto = GitHubBackend(
+            self.token, self.user, self.repo,
+            cache=cache or cache_github(Config.CACHE_TTL_SEG),
+            snapshots=SnapshotsLocales(Config.SNAPSHOT_DIR) if Config.SNAPSHOT_COLUMNAR else None,
+            archivos_snapshot=Config.SNAPSHOT_ARCHIVOS,
+            api_url=api_url or Config.GITHUB_API_URL,
+        )
+        self.headers = self.remoto.headers
+        self.base_url = self.remoto.base_url
+
+        pool_io(Config.IO_HILOS)
+        self._precargas = {}  # archivo -> Future de una lectura ya lanzada
+        self._precargas_lock = threading.Lock()
+
+        if backend is None:
+            if Config.STORAGE_BACKEND == "sqlite":
+                backend = SQLiteBackend(Config.SQLITE_PATH)
+                if replica is None and Config.REPLICAR_GITHUB:
+                    replica = self.remoto
+            else:
+                backend = self.remoto
+
+        self.backend = backend
+        self.replica = replica if replica is not backend else None
+
+        # El buzón va segmentado solo donde lo lee el robot (GitHub)
+        self.buzon = None
+        destino_robot = self.replica or self.backend
+        if Config.BUZON_SEGMENTADO and isinstance(destino_robot, GitHubBackend):
+            self.buzon = BuzonLog(
+                destino_robot,
+                compactar_cada=Config.BUZON_COMPACTAR_CADA,
+                compactar_seg=Config.BUZON_COMPACTAR_SEG,
+            )
+
+    # --- ENRUTAMIENTO ENTRE BACKEND LOCAL Y RÉPLICA ---
+
+    def _backend_para(self, archivo):
+        """Archivos que el backend principal no maneja (ej. config_glpi.json) van a GitHub"""
+        return self.backend if self.backend.soporta(archivo) else self.remoto
+
+    def _sincronizar(self, archivo):
+        """
+        Baja de la réplica los cambios que hizo el robot (historico, buzon consumido...).
+        Solo aplica con backend SQLite + réplica; respeta Config.SYNC_INTERVALO_SEG.
+        """
+        if not self.replica or not isinstance(self.backend, SQLiteBackend):
+            return
+        if not self.backend.soporta(archivo):
+            return
+
+        sha_local, ultima = self.backend.estado_sincronizacion(archivo)
+        if ultima and (time.time() - ultima) < Config.SYNC_INTERVALO_SEG:
+            return
+
+        datos, sha = self.replica.leer(archivo)
+        if datos is None:
+            return  # sin red: seguimos con la copia local
+        if sha and sha == sha_local:
+            self.backend.marcar_sincronizado(archivo, sha)
+            return
+        self.backend.escribir(archivo, datos, sha_remoto=sha)
 
     def obtener_github(self, archivo):
-        """Descarga y decodifica archivos JSON desde GitHub (REPLICADO)"""
-        timestamp = int(time.time())
-        url = f"{self.base_url}/{archivo}?t={timestamp}"  
+        """Descarga y decodifica archivos JSON (backend local o GitHub)"""
+        self._esperar_precarga(archivo)
+        self._sincronizar(archivo)
+        return self._backend_para(archivo).leer(archivo)
+
+    # --- LECTURAS EN PARALELO ---
+
+    def obtener_varios(self, *archivos):
+        """
+        Varios archivos a la vez: tarda lo que el más lento, no la suma.
+
+        Returns:
+            dict: archivo -> (datos, sha) como obtener_github
+        """
+        return en_paralelo({a: (lambda a=a: self.obtener_github(a)) for a in archivos})
+
+    def precargar(self, *archivos):
+        """
+        Lanza la lectura en segundo plano y vuelve enseguida: cuando la pestaña
+        pida el archivo lo encuentra en la cache (o espera solo lo que falte).
+        No relanza una precarga que todavía está en curso.
+        """
+        with self._precargas_lock:
+            for archivo in archivos:
+                previa = self._precargas.get(archivo)
+                if previa is None or previa.done():
+                    self._precargas[archivo] = lanzar(self._leer_precarga, archivo)
+
+    def _leer_precarga(self, archivo):
+        self._sincronizar(archivo)
+        return self._backend_para(archivo).leer(archivo)
+
+    def _esperar_precarga(self, archivo):
+        with self._precargas_lock:
+            futuro = self._precargas.get(archivo)
+        if futuro is None or futuro.done() or futuro.cancel():
+            return  # cancel(): seguía en cola, más rápido leerlo directo
         try:
-            resp = requests.get(url, headers=self.headers, timeout=10)
-            if resp.status_code == 200:
-                d = resp.json()
-                contenido = base64.b64decode(d['content']).decode('utf-8')
-                return json.loads(contenido), d['sha']
-            elif resp.status_code == 404:
-                return [], None
-            return None, None
-        except:
-            return None, None
+            futuro.result()
+        except Exception as e:
+            print(f"Precarga {archivo}: {e}")
+
+    def obtener_columnas(self, archivo, columnas=None):
+        """
+        Solo esas columnas del documento (snapshot Parquet si está al día, si no el JSON).
+
+        Returns:
+            pd.DataFrame indexado por posición en el JSON, o None si hubo error
+        """
+        self._sincronizar(archivo)
+        return self._backend_para(archivo).leer_columnas(archivo, columnas)
+
+    def obtener_archivo(self, archivo):
+        """Alias usado por GLPIConnector y la documentación (MAPA_FUNCIONES.md)"""
+        return self.obtener_github(archivo)
+
+    def refrescar(self, archivo=None):
+        """Botón 🔄 Refrescar: revalida contra GitHub en la próxima lectura (304 si no cambió)"""
+        self.remoto.refrescar(archivo)
+        if isinstance(self.backend, SQLiteBackend):
+            self.backend.marcar_desactualizado(archivo)
 
     def enviar_github(self, archivo, datos_nuevos, mensaje="Actualización LAIA"):
         """Agrega datos a una lista (APPEND) - REPLICADO"""
-        contenido_actual, sha = self.obtener_github(archivo)
-        if not isinstance(contenido_actual, list):
-            contenido_actual = []
-         
-        if isinstance(datos_nuevos, list):
-            contenido_actual.extend(datos_nuevos)
-        else:
-            contenido_actual.append(datos_nuevos)
-         
-        payload = {
-            "message": mensaje,
-            "content": base64.b64encode(json.dumps(contenido_actual, indent=4).encode()).decode(),
-            "sha": sha if sha else None
-        }
-        resp = requests.put(f"{self.base_url}/{archivo}", headers=self.headers, json=payload)
-        return resp.status_code in [200, 201]
+        if archivo == Config.FILE_BUZON and self.buzon:
+            return self._agregar_buzon(datos_nuevos, mensaje)
+
+        backend = self._backend_para(archivo)
+        ok = backend.agregar(archivo, datos_nuevos, mensaje)
+        if ok and self.replica and backend is not self.replica:
+            # El robot de la PC lee desde GitHub: sin réplica la escritura no cuenta
+            ok = self.replica.agregar(archivo, datos_nuevos, mensaje)
+        return ok
 
     def enviar_github_directo(self, archivo, datos, mensaje="LAIA Update"):
         """Sobrescribe el archivo (REPLICADO)"""
-        _, sha = self.obtener_github(archivo)
-        payload = {
-            "message": mensaje,
-            "content": base64.b64encode(json.dumps(datos, indent=4).encode()).decode(),
-            "sha": sha if sha else None
-        }
-        resp = requests.put(f"{self.base_url}/{archivo}", headers=self.headers, json=payload)
-        return resp.status_code in [200, 201]
+        backend = self._backend_para(archivo)
+        ok = backend.escribir(archivo, datos, mensaje)
+        if ok and self.replica and backend is not self.replica:
+            ok = self.replica.escribir(archivo, datos, mensaje)
+        return ok
+
+    # --- VARIOS ARCHIVOS EN UN COMMIT ---
+
+    def lote(self, mensaje="LAIA Update"):
+        """
+        Cambios a buzon/lecciones/pedido/historico publicados como un solo commit
+        (Git Data API). Con SQLite se aplican también en la copia local.
+
+        Returns:
+            LoteGit: acumular con escribir()/agregar()/borrar() y cerrar con publicar()
+        """
+        remoto = self.replica or self.backend
+        if not isinstance(remoto, GitHubBackend):
+            remoto = None  # SQLite sin réplica: el lote queda solo en local
+        local = self.backend if self.backend is not remoto else None
+        if remoto is None:
+            return LoteGit(None, mensaje, local=local)
+        return remoto.lote(mensaje, local=local, buzon=self.buzon)
+
+    # --- MÉTRICAS DE ESCRITURA ---
+
+    def metricas_escritura(self):
+        """Conflictos y reintentos por archivo + últimas escrituras (panel de debug)"""
+        return {"por_archivo": self.remoto.metricas.resumen(), "recientes": self.remoto.metricas.recientes()}
+
+    def ultima_escritura(self, archivo):
+        """Returns: dict con ok/intentos/conflictos de la última escritura a GitHub, o None"""
+        return self.remoto.metricas.ultima(archivo)
+
+    def explicar_fallo(self, archivo, por_defecto):
+        """Mensaje para la UI: distingue 'chocó con otros operadores' de un error de red/permiso"""
+        u = self.ultima_escritura(archivo)
+        if u and not u["ok"] and u["conflictos"]:
+            return (
+                f"❌ Otros operadores escribieron {archivo} al mismo tiempo "
+                f"({u['conflictos']} conflictos en {u['intentos']} intentos). Vuelve a intentar."
+            )
+        return por_defecto
+
+    # --- BUZÓN SEGMENTADO ---
+
+    def _agregar_buzon(self, datos_nuevos, mensaje):
+        """O(lote): copia local (si hay SQLite) + segmento nuevo en GitHub, sin leer el buzón"""
+        if self.backend is not self.buzon.backend:
+            if not self.backend.agregar(Config.FILE_BUZON, datos_nuevos, mensaje):
+                return False
+        return self.buzon.agregar(datos_nuevos, mensaje)
+
+    def leer_buzon(self):
+        """Buzón completo tal como lo debe procesar el robot (compactado + segmentos)"""
+        if self.buzon:
+            return self.buzon.leer()
+        data, _ = self.obtener_github(Config.FILE_BUZON)
+        return data if isinstance(data, list) else []
+
+    def compactar_buzon(self):
+        """Consolida los segmentos pendientes en buzon.json. Returns: int segmentos"""
+        return self.buzon.compactar() if self.buzon else 0
+
+    # --- CONSULTAS INDEXADAS ---
+
+    def buscar_por_serie(self, serie):
+        """Registros del histórico con esa serie (índice SQLite si está activo)"""
+        self._sincronizar("historico.json")
+        return self._backend_para("historico.json").buscar("historico.json", "serie", serie)
+
+    def buscar_por_guia(self, guia):
+        """Registros del histórico con esa guía (índice SQLite si está activo)"""
+        self._sincronizar("historico.json")
+        return self._backend_para("historico.json").buscar("historico.json", "guia", guia)
 
     # --- MÉTODOS DE COMPATIBILIDAD PARA TABS (CHAT Y LIMPIEZA) ---
 
@@ -72,6 +254,9 @@ class GitHubHandler:
         data, _ = self.obtener_github("historico.json")
         return data if isinstance(data, list) else []
 
+    def obtener_historico_columnas(self, columnas=None):
+        return self.obtener_columnas(Config.FILE_HISTORICO, columnas)
+
     def obtener_lecciones(self):
         data, _ = self.obtener_github("lecciones.json")
         return data if isinstance(data, list) else []
@@ -86,7 +271,10 @@ class GitHubHandler:
         return self.enviar_github("buzon.json", datos, "Registro LAIA desde Chat")
 
     def aprender_leccion(self, error, correccion):
-        """Guarda errores para la memoria de la IA"""
+        """
+        Guarda errores para la memoria de la IA. La escritura toma el sha de la
+        lectura recién hecha (cache), sin otro GET antes del PUT.
+        """
         lecciones = self.obtener_lecciones()
         nueva = {
             "fecha": time.strftime("%Y-%m-%d %H:%M"),
@@ -94,8 +282,8 @@ class GitHubHandler:
             "como_debe_hacerlo": correccion
         }
         lecciones.append(nueva)
-        # Solo guardamos las últimas 15 lecciones
-        return self.enviar_github_directo("lecciones.json", lecciones[-15:], "LAIA: Nueva lección aprendida")
+        # Se guardan todas: al prompt solo llegan las relevantes (IndiceLecciones)
+        return self.enviar_github_directo("lecciones.json", lecciones, "LAIA: Nueva lección aprendida")
 
     def enviar_a_buzon(self, datos):
         """ Envía registros nuevos al buzon.json para que el Robot los procese """
@@ -2,17 +2,19 @@
 modules/glpi_connector.py
 Manejo de conexiones y consultas a GLPI
 """
-import requests
 import re
 from modules.github_handler import GitHubHandler
+from modules.http_session import sesion_propia
 
 class GLPIConnector:
     """Conector para GLPI"""
     
-    def __init__(self):
-        self.github = GitHubHandler()
+    def __init__(self, github=None):
+        self.github = github or GitHubHandler()
         self.session = None
         self.base_url = None
+        # La config se baja en paralelo desde ya; conectar() solo espera lo que falte
+        self.github.precargar("config_glpi.json")
     
     def conectar(self):
         """
@@ -27,7 +29,9 @@ class GLPIConnector:
             return None, "Fallo: El link de túnel en GitHub no existe."
         
         base_url = config["url_glpi"]
-        session = requests.Session()
+        # Cookies propias de este conector (cada login empieza con el jar vacío);
+        # las conexiones keep-alive salen del pool "glpi" del proceso
+        session = sesion_propia("glpi")
         
         session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -58,7 +62,8 @@ class GLPIConnector:
             response = session.post(
                 f"{base_url}/front/login.php", 
                 data=payload, 
-                allow_redirects=True
+                allow_redirects=True,
+                timeout=15
             )
             
             # 3. Verificación de sesión activa
@@ -70,7 +75,7 @@ class GLPIConnector:
                         re.IGNORECASE
                     )
                     p_id = p_match.group(1) if p_match else "4"
-                    session.get(f"{base_url}/front/selectprofile.php?profiles_id={p_id}")
+                    session.get(f"{base_url}/front/selectprofile.php?profiles_id={p_id}", timeout=10)
                 
                 self.session = session
                 self.base_url = base_url
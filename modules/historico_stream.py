@@ -0,0 +1,227 @@
+"""
+modules/historico_stream.py
+Ingesta por streaming de historico.json: base64 / bytes crudos -> registros uno a
+uno (parseo incremental del arreglo JSON) -> buffers por columna, sin armar el
+texto completo ni la lista intermedia de dicts
+"""
+import base64
+import codecs
+import json
+import re
+
+import pandas as pd
+
+from modules import registros
+
+TAM_TROZO = 1 << 16  # 64 KB
+
+_SEPARADORES = re.compile(r"[\s,]*")
+_FIN_VALOR = frozenset(" \t\r\n,]")
+_DECODER = json.JSONDecoder()
+
+
+# ---------------------------
+# Fuentes de bytes
+# ---------------------------
+def trozos_base64(texto, tam=TAM_TROZO):
+    """
+    Decodifica el `content` de la Contents API de a trozos (GitHub lo parte en
+    líneas de 60 caracteres).
+
+    Args:
+        texto: str base64 (con o sin saltos de línea)
+        tam: Caracteres base64 por trozo
+
+    Yields:
+        bytes
+    """
+    resto = ""
+    for i in range(0, len(texto or ""), tam):
+        bloque = resto + "".join(texto[i:i + tam].split())
+        corte = len(bloque) - len(bloque) % 4
+        resto = bloque[corte:]
+        if corte:
+            yield base64.b64decode(bloque[:corte])
+    if resto:
+        yield base64.b64decode(resto + "=" * (-len(resto) % 4))
+
+
+# ---------------------------
+# Parseo incremental
+# ---------------------------
+def _textos(trozos):
+    """bytes (o str) -> str, respetando caracteres UTF-8 partidos entre trozos"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for t in trozos:
+        texto = t if isinstance(t, str) else decoder.decode(t)
+        if texto:
+            yield texto
+    final = decoder.decode(b"", final=True)
+    if final:
+        yield final
+
+
+def iterar_json(trozos):
+    """
+    Elementos de un arreglo JSON, uno a uno, a medida que llegan los trozos.
+    En memoria solo queda el trozo actual + el elemento incompleto.
+
+    Args:
+        trozos: Iterable de bytes/str (trozos_base64, iter_content...)
+
+    Yields:
+        Cada elemento del arreglo
+
+    Raises:
+        ValueError: si el documento no es un arreglo JSON válido
+    """
+    textos = _textos(trozos)
+    buf, i, fin = "", 0, False
+
+    def cargar():
+        nonlocal buf, i, fin
+        try:
+            buf = buf[i:] + next(textos)
+        except StopIteration:
+            buf, fin = buf[i:], True
+        i = 0
+
+    # Apertura del arreglo
+    while True:
+        while i < len(buf) and buf[i].isspace():
+            i += 1
+        if i < len(buf) or fin:
+            break
+        cargar()
+    if i >= len(buf) or buf[i] != "[":
+        raise ValueError("Se esperaba un arreglo JSON")
+    i += 1
+
+    while True:
+        i = _SEPARADORES.match(buf, i).end()
+        if i >= len(buf):
+            if fin:
+                raise ValueError("Arreglo JSON sin cerrar")
+            cargar()
+            continue
+        if buf[i] == "]":
+            return
+        try:
+            valor, j = _DECODER.raw_decode(buf, i)
+        except json.JSONDecodeError:
+            if fin:
+                raise
+            cargar()  # elemento partido entre trozos
+            continue
+        # Un número cortado ("3." / "4e") parsea solo su prefijo: el valor está
+        # completo únicamente si lo sigue un separador
+        if not fin and (j >= len(buf) or buf[j] not in _FIN_VALOR):
+            cargar()
+            continue
+        i = j
+        yield valor
+
+
+def cargar_json(trozos):
+    """
+    json.loads por trozos: los arreglos se arman elemento a elemento (sin el
+    texto completo en memoria); cualquier otro documento se parsea al final.
+    """
+    textos = iter(_textos(trozos))
+    inicio = []
+    for t in textos:
+        inicio.append(t)
+        if t.strip():
+            break
+
+    def todo():
+        yield from inicio
+        yield from textos
+
+    if "".join(inicio).lstrip().startswith("["):
+        return list(iterar_json(todo()))
+    return json.loads("".join(todo()))
+
+
+# ---------------------------
+# Buffers columnares
+# ---------------------------
+class HistoricoColumnar:
+    """
+    Histórico saneado por columnas: mismas columnas que StockTab._sanear_historial,
+    sin las órdenes de borrado (registros.es_comando).
+
+    - Cada registro se normaliza (registros.a_dict / limpiar) y se descarta si es
+      una orden de borrado, sin guardar el dict.
+    - Los valores repetidos de columnas de baja cardinalidad (marca, destino,
+      estado...) comparten el mismo objeto str.
+    """
+
+    ALTA_CARDINALIDAD = {"serie", "guia", "fecha_registro", "reporte"}
+    FALTANTE = float("nan")
+
+    def __init__(self):
+        self.columnas = {}     # columna -> lista de valores
+        self.posiciones = []   # posición en historico.json de cada fila
+        self.comandos = 0
+        self._claves = {}      # clave cruda -> columna ("" = basura)
+        self._vocab = {}       # columna -> {valor: valor}
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    @classmethod
+    def desde(cls, registros_iter):
+        """
+        Args:
+            registros_iter: Iterable de registros (lista ya cargada o iterar_json)
+        """
+        col = cls()
+        for pos, reg in enumerate(registros_iter):
+            col.agregar(pos, reg)
+        return col
+
+    def agregar(self, pos, registro):
+        """Returns: bool (False si se descartó: comando o tipo no soportado)"""
+        reg = registros.a_dict(registro)
+        if reg is None:
+            return False
+        if registros.es_comando(reg):
+            self.comandos += 1
+            return False
+
+        n = len(self.posiciones)
+        llenas = 0
+        for k, v in reg.items():
+            col = self._claves.get(k)
+            if col is None:
+                col = self._claves[k] = registros.clave(k) or ""
+            if not col:
+                continue
+            columna = self.columnas.get(col)
+            if columna is None:
+                columna = self.columnas[col] = [self.FALTANTE] * n
+                if col not in self.ALTA_CARDINALIDAD:
+                    self._vocab[col] = {}
+            if isinstance(v, str):
+                vocab = self._vocab.get(col)
+                if vocab is not None:
+                    v = vocab.setdefault(v, v)
+            if len(columna) > n:
+                columna[n] = v  # misma columna con otra capitalización: gana la última
+                continue
+            columna.append(v)
+            llenas += 1
+
+        self.posiciones.append(pos)
+        if llenas < len(self.columnas):
+            for columna in self.columnas.values():
+                if len(columna) == n:
+                    columna.append(self.FALTANTE)
+        return True
+
+    def dataframe(self):
+        """DataFrame indexado por posición en el histórico"""
+        if not self.posiciones:
+            return pd.DataFrame()
+        return pd.DataFrame(self.columnas, index=self.posiciones)
@@ -0,0 +1,185 @@
+"""
+modules/http_session.py
+Sesiones HTTP compartidas por proceso: pool de conexiones keep-alive, timeouts
+por llamada y reintentos con backoff exponencial + jitter
+"""
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class SesionHTTP:
+    """
+    Envoltorio de requests.Session.
+
+    - Reutiliza conexiones TLS (keep-alive) con un pool acotado por host.
+    - Reintenta 5xx, 409 y 429 con backoff exponencial y jitter completo.
+    - Ante un corte de red solo repite GET/HEAD/DELETE/OPTIONS; POST/PUT/PATCH
+      solo si la conexión no llegó a abrirse (el servidor no vio nada).
+    - Respeta Retry-After y los headers de rate limit de GitHub
+      (X-RateLimit-Remaining / X-RateLimit-Reset).
+    - Siempre manda timeout (las llamadas sin timeout colgaban el rerun).
+    """
+
+    REINTENTAR_EN = (409, 429, 500, 502, 503, 504)
+    # PUT no: un PUT de la Contents API que entró pero cuya respuesta se perdió,
+    # repetido con el sha viejo, vuelve 409/422 y el llamador reaplicaría el append
+    METODOS_IDEMPOTENTES = ("GET", "HEAD", "DELETE", "OPTIONS")
+
+    def __init__(self, pool_conexiones=4, pool_max=16, reintentos=3,
+                 backoff_base=0.5, backoff_max=8.0, timeout=(5, 20), espera_max=60, adaptador=None):
+        """
+        Args:
+            pool_conexiones: N° de pools por host que se mantienen abiertos
+            pool_max: Conexiones máximas por pool
+            reintentos: Reintentos por llamada (además del primer intento)
+            backoff_base: Segundos base del backoff exponencial
+            backoff_max: Tope de espera entre reintentos
+            timeout: (conexión, lectura) por defecto en segundos
+            espera_max: Máximo que se espera por un rate limit antes de rendirse
+            adaptador: HTTPAdapter ya creado (pool compartido con otra sesión)
+        """
+        self.reintentos = reintentos
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.espera_max = espera_max
+
+        self.adaptador = adaptador or HTTPAdapter(
+            pool_connections=pool_conexiones, pool_maxsize=pool_max, pool_block=False
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self.adaptador)
+        self.session.mount("http://", self.adaptador)
+
+    def derivar(self):
+        """Sesión nueva (cookies y headers propios) sobre el mismo pool de conexiones"""
+        return SesionHTTP(
+            reintentos=self.reintentos, backoff_base=self.backoff_base, backoff_max=self.backoff_max,
+            timeout=self.timeout, espera_max=self.espera_max, adaptador=self.adaptador,
+        )
+
+    @property
+    def headers(self):
+        return self.session.headers
+
+    @property
+    def cookies(self):
+        return self.session.cookies
+
+    # ---------------------------
+    # Esperas
+    # ---------------------------
+    def _backoff(self, intento):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** intento)))
+
+    def _espera_servidor(self, resp):
+        """Segundos que pide el servidor (Retry-After o reset del rate limit); None si no pide"""
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+
+        if resp.headers.get("X-RateLimit-Remaining") == "0":
+            reset = resp.headers.get("X-RateLimit-Reset")
+            if reset and reset.isdigit():
+                return max(0.0, int(reset) - time.time()) + 1
+        return None
+
+    def _es_rate_limit(self, resp):
+        return resp.status_code == 429 or (
+            resp.status_code == 403 and resp.headers.get("X-RateLimit-Remaining") == "0"
+        )
+
+    # ---------------------------
+    # Request
+    # ---------------------------
+    def request(self, metodo, url, timeout=None, reintentos=None, reintentar_en=None, **kwargs):
+        """
+        Args:
+            metodo: GET, PUT, POST...
+            url: URL absoluta
+            timeout: Timeout de esta llamada (por defecto el de la sesión)
+            reintentos: Reintentos de esta llamada (por defecto los de la sesión)
+            reintentar_en: Códigos HTTP que se reintentan (por defecto REINTENTAR_EN)
+
+        Returns:
+            requests.Response: la última respuesta (aunque sea de error)
+
+        Raises:
+            requests.RequestException: si el último intento falló por red
+        """
+        metodo = metodo.upper()
+        timeout = timeout or self.timeout
+        reintentos = self.reintentos if reintentos is None else reintentos
+        reintentar_en = self.REINTENTAR_EN if reintentar_en is None else reintentar_en
+
+        intento = 0
+        while True:
+            try:
+                resp = self.session.request(metodo, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # POST/PUT/PATCH no se repiten a ciegas: solo si la conexión ni se abrió
+                seguro = metodo in self.METODOS_IDEMPOTENTES or isinstance(e, requests.ConnectTimeout)
+                if intento >= reintentos or not seguro:
+                    raise
+                time.sleep(self._backoff(intento))
+                intento += 1
+                continue
+
+            rate_limit = self._es_rate_limit(resp)
+            if intento >= reintentos or not (rate_limit or resp.status_code in reintentar_en):
+                return resp
+
+            espera = self._espera_servidor(resp)
+            if espera is None:
+                espera = self._backoff(intento)
+            if espera > self.espera_max:
+                return resp  # rate limit largo: mejor devolver el error que colgar la UI
+            time.sleep(espera)
+            intento += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+
+_SESIONES = {}
+_SESIONES_LOCK = threading.Lock()
+
+
+def obtener_sesion(nombre="github", **opciones):
+    """
+    Sesión única por nombre y por proceso ("github", "glpi"...).
+    Las opciones solo se usan la primera vez que se crea.
+    """
+    with _SESIONES_LOCK:
+        sesion = _SESIONES.get(nombre)
+        if sesion is None:
+            sesion = SesionHTTP(**opciones)
+            _SESIONES[nombre] = sesion
+        return sesion
+
+
+def sesion_propia(nombre, **opciones):
+    """
+    Para servicios con login por cookie (GLPI): cada llamador tiene su propio
+    jar de cookies y headers, pero las conexiones salen del pool de `nombre`.
+    """
+    return obtener_sesion(nombre, **opciones).derivar()
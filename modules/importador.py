@@ -0,0 +1,228 @@
+"""
+modules/importador.py
+Importación masiva de manifiestos (xlsx / csv): lectura por streaming, mapeo
+difuso de encabezados a las columnas del histórico y normalización de filas
+al formato de los items del Chat.
+"""
+import csv
+import difflib
+import io
+import re
+import unicodedata
+from datetime import date, datetime
+
+from openpyxl import load_workbook
+
+from modules.extractor_local import EQUIPOS, MARCAS
+
+# Encabezados habituales en los manifiestos -> columna destino
+ALIAS = {
+    "fecha_registro": ("fecha registro", "fecha de registro", "registrado"),
+    "guia": ("guia", "guia remision", "guia de remision", "n guia", "numero guia", "nro guia", "tracking"),
+    "tipo": ("tipo", "movimiento", "tipo movimiento", "tipo de movimiento"),
+    "origen": ("origen", "desde", "procedencia", "proveedor", "remitente"),
+    "destino": ("destino", "hacia", "agencia destino", "destinatario", "ubicacion"),
+    "categoria_item": ("categoria", "categoria item", "tipo equipo", "clase"),
+    "equipo": ("equipo", "descripcion", "articulo", "item", "producto", "dispositivo"),
+    "marca": ("marca", "fabricante", "brand"),
+    "modelo": ("modelo", "model"),
+    "serie": ("serie", "serial", "n serie", "numero de serie", "nro serie", "s n", "sn", "service tag"),
+    "estado": ("estado", "condicion"),
+    "procesador": ("procesador", "cpu", "processor"),
+    "ram": ("ram", "memoria", "memoria ram"),
+    "disco": ("disco", "almacenamiento", "disco duro", "hdd", "ssd", "storage"),
+    "reporte": ("reporte", "observacion", "observaciones", "comentario", "notas", "detalle"),
+    "cantidad": ("cantidad", "cant", "qty", "unidades"),
+    "fecha_llegada": ("fecha llegada", "fecha de llegada", "llegada", "fecha ingreso", "fecha recepcion", "fecha"),
+    "pasillo": ("pasillo",),
+    "estante": ("estante",),
+    "repisa": ("repisa",),
+}
+
+FILAS_ENCABEZADO = 10  # filas que se revisan buscando el encabezado
+
+
+def _clave(texto):
+    """Minúsculas sin tildes ni signos: 'N° de Serie' -> 'n de serie'"""
+    t = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode().lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", t).split())
+
+
+_ALIAS_NORM = {_clave(a): col for col, alias in ALIAS.items() for a in (col.replace("_", " "),) + alias}
+
+
+def mapear_encabezados(encabezados, columnas):
+    """
+    Args:
+        encabezados: Encabezados del archivo
+        columnas: Columnas destino válidas
+
+    Returns:
+        dict: encabezado -> columna destino (o None si no se reconoce)
+    """
+    validas = set(columnas)
+    mapa, usadas = {}, set()
+    pendientes = []
+    for enc in encabezados:
+        col = _ALIAS_NORM.get(_clave(enc))
+        if col in validas and col not in usadas:
+            mapa[enc] = col
+            usadas.add(col)
+        else:
+            pendientes.append(enc)
+
+    candidatos = [a for a, c in _ALIAS_NORM.items() if c in validas]
+    for enc in pendientes:
+        col = None
+        parecidos = difflib.get_close_matches(_clave(enc), candidatos, n=3, cutoff=0.75)
+        for p in parecidos:
+            if _ALIAS_NORM[p] not in usadas:
+                col = _ALIAS_NORM[p]
+                usadas.add(col)
+                break
+        mapa[enc] = col
+    return mapa
+
+
+# ---------------------------
+# Lectura
+# ---------------------------
+def _filas_xlsx(datos):
+    wb = load_workbook(io.BytesIO(datos), read_only=True, data_only=True)
+    try:
+        for fila in wb.worksheets[0].iter_rows(values_only=True):
+            yield list(fila)
+    finally:
+        wb.close()
+
+
+def _filas_csv(datos):
+    try:
+        texto = datos.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        texto = datos.decode("latin-1")
+    try:
+        dialecto = csv.Sniffer().sniff(texto[:4096], delimiters=",;\t|")
+    except csv.Error:
+        dialecto = csv.excel
+    yield from csv.reader(io.StringIO(texto), dialecto)
+
+
+def leer_manifiesto(nombre, datos, columnas):
+    """
+    Args:
+        nombre: Nombre del archivo (la extensión decide el lector)
+        datos: bytes del archivo
+        columnas: Columnas destino (para ubicar la fila de encabezado)
+
+    Returns:
+        tuple: (encabezados, filas como dicts encabezado -> valor)
+    """
+    filas = _filas_xlsx(datos) if nombre.lower().endswith((".xlsx", ".xlsm")) else _filas_csv(datos)
+
+    # Encabezado: la primera fila (de las primeras N) con más columnas reconocidas
+    previas = []
+    encabezados = None
+    mejor = 0
+    for n, fila in enumerate(filas):
+        previas.append(fila)
+        reconocidas = sum(1 for c in mapear_encabezados([x for x in fila if x not in (None, "")], columnas).values() if c)
+        if reconocidas > mejor:
+            mejor, encabezados = reconocidas, n
+        if n + 1 >= FILAS_ENCABEZADO:
+            break
+    if encabezados is None:
+        return [], []
+
+    cab = [str(x).strip() if x not in (None, "") else f"columna_{i + 1}" for i, x in enumerate(previas[encabezados])]
+    registros = []
+
+    def agregar(fila):
+        if not any(v not in (None, "") and str(v).strip() for v in fila):
+            return
+        registros.append({cab[i]: v for i, v in enumerate(fila[:len(cab)])})
+
+    for fila in previas[encabezados + 1:]:
+        agregar(fila)
+    for fila in filas:
+        agregar(fila)
+    return cab, registros
+
+
+# ---------------------------
+# Normalización
+# ---------------------------
+def _texto(v):
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))  # series numéricas leídas como 123456.0
+    if isinstance(v, (datetime, date)):
+        return v.strftime("%Y-%m-%d")
+    return str(v).strip()
+
+
+def _cantidad(v):
+    try:
+        n = int(float(str(v).replace(",", ".")))
+        return n if n > 0 else 1
+    except (TypeError, ValueError):
+        return 1
+
+
+def normalizar_filas(registros, mapa, defaults):
+    """
+    Args:
+        registros: Filas leídas (encabezado -> valor)
+        mapa: encabezado -> columna destino (None = se ignora)
+        defaults: Valores para columnas vacías (tipo, guia, origen, destino, fecha_llegada...)
+
+    Returns:
+        list: Items con las mismas claves que el borrador del Chat
+    """
+    items = []
+    for reg in registros:
+        it = {}
+        for enc, col in mapa.items():
+            if col:
+                valor = _texto(reg.get(enc))
+                if valor or col not in it:
+                    it[col] = valor
+        for col, valor in defaults.items():
+            if not it.get(col) and valor:
+                it[col] = valor
+
+        it["cantidad"] = _cantidad(it.get("cantidad"))
+        tipo = _clave(it.get("tipo"))
+        it["tipo"] = "Enviado" if tipo.startswith(("envi", "sal", "desp")) else "Recibido"
+
+        equipo = _clave(it.get("equipo"))
+        conocido = next((EQUIPOS[w] for w in equipo.split() if w in EQUIPOS), None)
+        if conocido and not it.get("categoria_item"):
+            it["categoria_item"] = conocido[1]
+        if conocido and equipo in EQUIPOS:
+            it["equipo"] = conocido[0]
+        marca = MARCAS.get(_clave(it.get("marca")))
+        if marca:
+            it["marca"] = marca
+
+        periferico = "perif" in _clave(it.get("categoria_item"))
+        if periferico and not it.get("marca"):
+            it["marca"] = "N/A"
+        if not it.get("destino") and it["tipo"] == "Recibido":
+            it["destino"] = "Stock" if periferico else "Bodega"
+        if not it.get("origen") and it["tipo"] == "Enviado":
+            it["origen"] = "Stock" if periferico else "Bodega"
+        items.append(it)
+    return items
+
+
+def series_duplicadas(items):
+    """Series repetidas dentro del mismo archivo (N/A y vacías no cuentan)"""
+    vistas, dup = set(), set()
+    for it in items:
+        s = _clave(it.get("serie"))
+        if not s or s in ("n a", "na"):
+            continue
+        (dup if s in vistas else vistas).add(s)
+    return dup
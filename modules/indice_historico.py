@@ -0,0 +1,302 @@
+"""
+modules/indice_historico.py
+Índice invertido en memoria sobre historico.json: mapas exactos por columna
+(serie, guía...) + índice de trigramas para búsqueda de texto libre
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from modules import cpu_generacion, registros
+
+
+class IndiceHistorico:
+    """
+    Búsqueda por substring sin recorrer todas las filas × columnas.
+
+    - Vocabulario por columna: valor normalizado -> vid. Cada vid guarda las
+      posiciones del histórico donde aparece (el histórico repite mucho: marcas,
+      destinos, estados...).
+    - Trigramas: cada trigrama apunta a los vids que lo contienen. Una consulta
+      toma la lista más corta de sus trigramas y verifica `q in valor` solo ahí.
+    - Incremental: igual que el StockLedger, si el histórico solo creció se
+      indexan las filas nuevas; si se reescribió, se reconstruye.
+
+    Las posiciones devueltas son índices en historico.json (mismo índice que
+    usan los DataFrames de StockTab y CleaningTab).
+    """
+
+    N = 3
+    NAT_NS = np.iinfo(np.int64).min
+    CAMPOS = tuple(registros.ESQUEMA) + ("gen_cpu",)
+    VACIO = "n/a"
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self.reconstrucciones = 0
+        self.version = 0  # sube con cada cambio (clave para caches de páginas)
+
+    def _reset(self):
+        self.n_filas = 0
+        self._ultima = None
+        self.posiciones = []  # todas las filas indexadas (sin comandos), en orden
+        self._ordenes = {}    # (campo, descendente) -> np.ndarray de posiciones
+        self._fechas = {}     # vid de fecha_registro -> ns (NaT = NAT_NS), se parsea una vez
+        self._vocab = {c: {} for c in self.CAMPOS}  # campo -> valor -> vid
+        self._valores = []  # vid -> (campo, valor)
+        self._filas = []    # vid -> [posiciones]
+        self._gramas = {}   # trigrama -> [vids]
+
+    @classmethod
+    def normalizar(cls, valor):
+        """Igual que lo que ve el usuario: minúsculas, sin bordes, vacío => 'n/a'"""
+        if valor is None or (isinstance(valor, float) and valor != valor):
+            return cls.VACIO
+        v = str(valor).lower().strip()
+        return cls.VACIO if v in ("", "nan", "none") else v
+
+    # ---------------------------
+    # Construcción
+    # ---------------------------
+    def sincronizar(self, hist):
+        """
+        Returns:
+            int: N° de registros indexados en esta llamada
+        """
+        hist = hist or []
+        with self._lock:
+            n = self.n_filas
+            if n <= len(hist) and (n == 0 or registros.huella(hist[n - 1]) == self._ultima):
+                if len(hist) > n:
+                    self._indexar(hist, n)
+                    self.version += 1
+                return len(hist) - n
+
+            self._reset()
+            self.reconstrucciones += 1
+            self.version += 1
+            self._indexar(hist, 0)
+            return len(hist)
+
+    def _indexar(self, hist, desde):
+        filas, posiciones = [], []
+        for pos in range(desde, len(hist)):
+            reg = registros.a_dict(hist[pos])
+            if reg is None or registros.es_comando(reg):
+                continue
+            filas.append(reg)
+            posiciones.append(pos)
+
+        self.posiciones.extend(posiciones)
+        self._ordenes = {}
+        if filas:
+            df = pd.DataFrame(filas)
+            df.columns = [str(c).strip().lower() for c in df.columns]
+            df = df.loc[:, ~df.columns.duplicated()].reindex(columns=list(registros.ESQUEMA))
+            df["gen_cpu"] = cpu_generacion.clasificar_serie(df["procesador"]).to_numpy()
+            pos_arr = np.asarray(posiciones)
+
+            for campo in self.CAMPOS:
+                # Una entrada por valor distinto: factorize + agrupar posiciones por código
+                codigos, valores = pd.factorize(self._normalizar_serie(df[campo]))
+                valores = valores.tolist()  # iterar un Index de arrow valor a valor es lento
+                pos_orden = pos_arr[np.argsort(codigos, kind="stable")].tolist()
+                fines = np.cumsum(np.bincount(codigos, minlength=len(valores))).tolist()
+
+                vocab = self._vocab[campo]
+                if not vocab:
+                    # Reconstrucción: todos los valores son nuevos, sin bucle por valor
+                    base = len(self._valores)
+                    nuevos = list(range(base, base + len(valores)))
+                    vocab.update(zip(valores, nuevos))
+                    self._valores.extend((campo, v) for v in valores)
+                    self._filas.extend(pos_orden[a:b] for a, b in zip([0] + fines[:-1], fines))
+                    self._indexar_gramas(nuevos)
+                    continue
+
+                nuevos = []
+                inicio = 0
+                for valor, fin in zip(valores, fines):
+                    vid = vocab.get(valor)
+                    if vid is None:
+                        vid = len(self._valores)
+                        vocab[valor] = vid
+                        self._valores.append((campo, valor))
+                        self._filas.append([])
+                        nuevos.append(vid)
+                    self._filas[vid].extend(pos_orden[inicio:fin])
+                    inicio = fin
+                self._indexar_gramas(nuevos)
+
+        self.n_filas = len(hist)
+        self._ultima = registros.huella(hist[-1]) if hist else None
+
+    @classmethod
+    def _normalizar_serie(cls, serie):
+        """normalizar() vectorizado"""
+        s = serie.astype(str).str.lower().str.strip().fillna(cls.VACIO)
+        return s.mask(s.isin(["", "nan", "none"]), cls.VACIO)
+
+    def _indexar_gramas(self, vids):
+        if len(vids) < 2000:
+            for vid in vids:
+                valor = self._valores[vid][1]
+                for g in {valor[i:i + self.N] for i in range(len(valor) - self.N + 1)}:
+                    self._gramas.setdefault(g, []).append(vid)
+            return
+
+        # Lotes grandes (reconstrucción): trigramas por posición con str.slice
+        # sobre todos los valores a la vez, en vez de un bucle por valor
+        valores = pd.Series([self._valores[v][1] for v in vids])
+        ids = np.asarray(vids, dtype=np.int64)
+        largos = valores.str.len().to_numpy()
+        gramas, duenos = [], []
+        k = 0
+        while True:
+            sel = largos >= k + self.N
+            if not sel.any():
+                break
+            valores, ids, largos = valores[sel], ids[sel], largos[sel]
+            gramas.append(valores.str.slice(k, k + self.N))
+            duenos.append(ids)
+            k += 1
+        if not gramas:
+            return
+
+        # Pares (trigrama, vid) únicos, ordenados por trigrama y luego por vid
+        codigos, unicos = pd.factorize(pd.concat(gramas, ignore_index=True))
+        base = int(ids.max()) + 1 if len(ids) else 1
+        claves = np.sort(codigos.astype(np.int64) * base + np.concatenate(duenos))
+        claves = claves[np.r_[True, claves[1:] != claves[:-1]]]
+        codigos, duenos = np.divmod(claves, base)
+        fines = np.cumsum(np.bincount(codigos, minlength=len(unicos))).tolist()
+        duenos = duenos.tolist()
+        inicio = 0
+        for g, fin in zip(unicos.tolist(), fines):
+            self._gramas.setdefault(g, []).extend(duenos[inicio:fin])
+            inicio = fin
+
+    # ---------------------------
+    # Consultas
+    # ---------------------------
+    def exacto(self, campo, valor):
+        """Posiciones cuyo campo es exactamente valor (serie, guía...)"""
+        with self._lock:
+            vid = self._vocab.get(campo, {}).get(self.normalizar(valor))
+            return set(self._filas[vid]) if vid is not None else set()
+
+    def existe(self, campo, valor):
+        with self._lock:
+            return self.normalizar(valor) in self._vocab.get(campo, {})
+
+    def buscar(self, texto, campos=None):
+        """
+        Posiciones donde algún campo contiene texto (mismo criterio que
+        str.contains sobre cada columna).
+
+        Args:
+            texto: Consulta libre
+            campos: Restringe a estas columnas (None = todas)
+
+        Returns:
+            set: Posiciones en el histórico
+        """
+        q = str(texto or "").lower().strip()
+        if not q:
+            return set()
+
+        with self._lock:
+            if len(q) >= self.N:
+                listas = [self._gramas.get(q[i:i + self.N]) for i in range(len(q) - self.N + 1)]
+                if any(lista is None for lista in listas):
+                    return set()
+                candidatos = min(listas, key=len)
+            else:
+                candidatos = range(len(self._valores))
+
+            out = set()
+            for vid in candidatos:
+                campo, valor = self._valores[vid]
+                if (campos is None or campo in campos) and q in valor:
+                    out.update(self._filas[vid])
+            return out
+
+    def filtrar(self, df, texto, campos=None):
+        """df (indexado por posición en el histórico) reducido a las filas que matchean"""
+        if df is None or df.empty or not str(texto or "").strip():
+            return df
+        return df[df.index.isin(self.buscar(texto, campos))].copy()
+
+    # ---------------------------
+    # Orden (para paginar sin ordenar DataFrames)
+    # ---------------------------
+    def orden(self, campo="fecha_registro", descendente=True):
+        """
+        Posiciones de todas las filas ordenadas por campo. Se ordenan los valores
+        distintos (no las filas) y se expanden sus posiciones; queda cacheado
+        hasta el próximo cambio del histórico.
+
+        Fechas no parseables / vacías van siempre al final.
+
+        Returns:
+            np.ndarray: Posiciones en el histórico
+        """
+        with self._lock:
+            clave = (campo, descendente)
+            if clave not in self._ordenes:
+                self._ordenes[clave] = self._calcular_orden(campo, descendente)
+            return self._ordenes[clave]
+
+    def _calcular_orden(self, campo, descendente):
+        vocab = self._vocab.get(campo, {})
+        if not vocab:
+            return np.asarray(self.posiciones, dtype=np.int64)
+
+        valores = list(vocab)
+        vids = np.fromiter(vocab.values(), dtype=np.int64, count=len(valores))
+        if campo == "fecha_registro":
+            # Solo se parsean las fechas nuevas desde el último orden
+            faltan = [v for v in vids.tolist() if v not in self._fechas]
+            if faltan:
+                textos = pd.Series([self._valores[v][1] for v in faltan])
+                try:
+                    parseadas = pd.to_datetime(textos, errors="coerce", format="mixed")
+                except ValueError:  # p. ej. zonas horarias mezcladas
+                    parseadas = pd.to_datetime(textos, errors="coerce", utc=True, format="mixed").dt.tz_localize(None)
+                ns = parseadas.to_numpy(dtype="datetime64[ns]").view(np.int64)
+                self._fechas.update(zip(faltan, ns.tolist()))
+            claves = np.fromiter((self._fechas[v] for v in vids.tolist()), dtype=np.int64, count=len(vids))
+            validos = claves != self.NAT_NS
+            orden = np.argsort(claves, kind="stable")
+            orden = orden[validos[orden]]
+            sin_dato = np.flatnonzero(~validos)
+        else:
+            orden = np.argsort(np.asarray(valores, dtype=object), kind="stable")
+            sin_dato = np.array([], dtype=np.int64)
+
+        def expandir(idx, invertir):
+            grupos = [self._filas[v] for v in vids[idx]]
+            if invertir:
+                grupos = [g[::-1] for g in reversed(grupos)]
+            total = sum(len(g) for g in grupos)
+            return np.fromiter((p for g in grupos for p in g), dtype=np.int64, count=total)
+
+        return np.concatenate([expandir(orden, descendente), expandir(sin_dato, False)])
+
+    def seleccionar(self, orden, incluir=None, excluir=None):
+        """
+        Filtra un orden (ver orden()) sin perderlo.
+
+        Args:
+            orden: np.ndarray de posiciones
+            incluir: Iterable de posiciones permitidas (None = todas)
+            excluir: Iterable de posiciones a quitar
+        """
+        mascara = np.ones(len(orden), dtype=bool)
+        if incluir is not None:
+            mascara &= np.isin(orden, np.fromiter(incluir, dtype=np.int64))
+        if excluir:
+            mascara &= ~np.isin(orden, np.fromiter(excluir, dtype=np.int64))
+        return orden[mascara]
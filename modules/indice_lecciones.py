@@ -0,0 +1,112 @@
+"""
+modules/indice_lecciones.py
+Índice BM25 en memoria sobre lecciones.json (lo_que_hizo_mal + como_debe_hacerlo):
+al prompt van solo las lecciones relevantes para el mensaje del usuario.
+"""
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from modules.cache_llm import huella
+
+# Palabras que no distinguen una lección de otra
+VACIAS = {
+    "el", "la", "los", "las", "un", "una", "unos", "unas", "de", "del", "al", "a", "en",
+    "y", "o", "que", "se", "por", "para", "con", "sin", "su", "sus", "lo", "le", "les",
+    "es", "son", "no", "si", "debe", "deben", "hacer", "hizo", "cuando", "como", "pero",
+    "mas", "muy", "ya", "me", "mi", "te", "este", "esta", "esto", "ese", "esa",
+}
+
+
+def terminos(texto):
+    """Minúsculas sin tildes, sin palabras vacías y con el plural simple recortado"""
+    t = unicodedata.normalize("NFKD", str(texto or "")).encode("ascii", "ignore").decode().lower()
+    salida = []
+    for p in re.findall(r"[a-z0-9]+", t):
+        if p in VACIAS or len(p) < 2:
+            continue
+        if len(p) > 4 and p.endswith("es"):
+            p = p[:-2]
+        elif len(p) > 3 and p.endswith("s"):
+            p = p[:-1]
+        salida.append(p)
+    return salida
+
+
+class IndiceLecciones:
+    """
+    BM25 clásico (k1, b) sobre cada lección. Se reconstruye solo cuando cambia el
+    contenido de lecciones.json (huella), así que consultar en cada mensaje no
+    vuelve a tokenizar nada.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._huella = None
+        self._fuente = None
+        self.lecciones = []
+        self._tf = []       # por lección: Counter de términos
+        self._largos = []
+        self._idf = {}
+        self._promedio = 0.0
+        self.reconstrucciones = 0
+
+    def sincronizar(self, lecciones):
+        """
+        Returns:
+            bool: True si el índice se reconstruyó
+        """
+        lecciones = [l for l in (lecciones or []) if isinstance(l, dict)]
+        with self._lock:
+            if lecciones is self._fuente:
+                return False
+            clave = huella(lecciones)
+            if clave == self._huella:
+                self._fuente = lecciones
+                return False
+
+            tf = [Counter(terminos(f"{l.get('lo_que_hizo_mal', '')} {l.get('como_debe_hacerlo', '')}")) for l in lecciones]
+            df = Counter(t for c in tf for t in c)
+            n = len(lecciones)
+            self._idf = {t: math.log(1 + (n - d + 0.5) / (d + 0.5)) for t, d in df.items()}
+            self._tf = tf
+            self._largos = [sum(c.values()) for c in tf]
+            self._promedio = (sum(self._largos) / n) if n else 0.0
+            self.lecciones = lecciones
+            self._fuente = lecciones
+            self._huella = clave
+            self.reconstrucciones += 1
+            return True
+
+    def relevantes(self, texto, k=8):
+        """
+        Args:
+            texto: Mensaje del usuario
+            k: Máximo de lecciones a devolver
+
+        Returns:
+            list: Hasta k lecciones con puntaje > 0, en su orden original (cronológico)
+        """
+        consulta = set(terminos(texto))
+        with self._lock:
+            if not consulta or not self.lecciones or k <= 0:
+                return []
+            puntajes = []
+            for i, tf in enumerate(self._tf):
+                s = 0.0
+                norma = self.k1 * (1 - self.b + self.b * self._largos[i] / (self._promedio or 1))
+                for t in consulta:
+                    f = tf.get(t)
+                    if f:
+                        s += self._idf[t] * f * (self.k1 + 1) / (f + norma)
+                if s > 0:
+                    puntajes.append((s, i))
+            elegidos = sorted(i for _, i in sorted(puntajes, key=lambda x: (-x[0], -x[1]))[:k])
+            return [self.lecciones[i] for i in elegidos]
+
+    def estadisticas(self):
+        return {"lecciones": len(self.lecciones), "terminos": len(self._idf), "reconstrucciones": self.reconstrucciones}
@@ -0,0 +1,346 @@
+"""
+modules/lote_git.py
+Varios archivos en un solo commit vía Git Data API (blobs -> tree -> commit -> ref),
+con reintento del lote completo si otro escritor movió la rama entre medio
+"""
+import base64
+import hashlib
+import json
+import random
+import time
+
+import requests
+
+from modules import historico_stream, snapshot_columnar
+from modules.concurrencia import en_paralelo
+
+SIN_CONDICION = object()  # se escribe sea cual sea el sha vigente del archivo
+
+
+def sha_blob(contenido):
+    """sha que GitHub le asigna al blob (el de git: sha1 de "blob <n>\\0" + bytes)"""
+    return hashlib.sha1(b"blob %d\0" % len(contenido) + contenido).hexdigest()
+
+
+def serializar(datos):
+    """Mismo formato que escribe GitHubBackend por Contents API (lo lee el robot)"""
+    return json.dumps(datos, indent=4).encode()
+
+
+class ConflictoLote(Exception):
+    """Un archivo condicionado (si_sha) cambió: el lote no se publica"""
+
+
+class LoteGit:
+    """
+    Cambios acumulados que se publican como un único commit.
+
+    Las operaciones se guardan como intenciones, no como contenido final: en cada
+    intento se releen los archivos del commit cabeza y se vuelven a aplicar, así
+    un reintento por non-fast-forward no pisa lo que otro escribió entre medio.
+    Los agregar() a buzon.json (con buzón segmentado) van a un segmento nuevo
+    dentro del mismo commit, como BuzonLog.agregar.
+
+    Uso:
+        lote = github.lote("LAIA: Registro + lección")
+        lote.agregar("buzon.json", registros)
+        lote.escribir("lecciones.json", lecciones)
+        ok = lote.publicar()
+    """
+
+    MAX_INTENTOS = 4
+    TAM_INLINE = 512 * 1024  # hasta acá el contenido va dentro del tree (sin POST de blob)
+
+    def __init__(self, backend, mensaje="LAIA Update", local=None, buzon=None):
+        """
+        Args:
+            backend: GitHubBackend donde se hace el commit (None = solo local)
+            mensaje: Mensaje del commit
+            local: StorageBackend donde se aplican antes los mismos cambios (SQLite) o None
+            buzon: BuzonLog si el buzón va segmentado
+        """
+        self.backend = backend
+        self.mensaje = mensaje
+        self.local = local
+        self.buzon = buzon
+        self._ops = []
+        self.commit = None
+        self.intentos = 0
+        self.conflictos = 0
+
+    def __len__(self):
+        return len(self._ops)
+
+    # ---------------------------
+    # Operaciones
+    # ---------------------------
+    def escribir(self, archivo, datos, si_sha=SIN_CONDICION):
+        """Sobrescribe. si_sha: solo si el blob vigente es ese (None = que no exista)"""
+        self._ops.append(("escribir", archivo, datos, si_sha))
+        return self
+
+    def escribir_bytes(self, archivo, contenido):
+        """Archivo binario (ej. snapshot .parquet)"""
+        self._ops.append(("bytes", archivo, contenido, SIN_CONDICION))
+        return self
+
+    def agregar(self, archivo, datos_nuevos):
+        """APPEND sobre la versión del commit cabeza de cada intento"""
+        nuevos = datos_nuevos if isinstance(datos_nuevos, list) else [datos_nuevos]
+        self._ops.append(("agregar", archivo, list(nuevos), SIN_CONDICION))
+        return self
+
+    def borrar(self, archivo, si_sha=SIN_CONDICION):
+        self._ops.append(("borrar", archivo, None, si_sha))
+        return self
+
+    # ---------------------------
+    # Publicación
+    # ---------------------------
+    def publicar(self):
+        """
+        Returns:
+            bool: True si el commit quedó en la rama (o no había cambios)
+        """
+        if not self._ops:
+            return True
+        if self.local is not None and not self._aplicar_local():
+            return False
+        if self.backend is None:
+            return True
+
+        t0 = time.time()
+        ok = self._publicar_remoto()
+        self._registrar(ok, time.time() - t0)
+        if ok:
+            self._compactar_buzon()
+        return ok
+
+    def _publicar_remoto(self):
+        for intento in range(self.MAX_INTENTOS):
+            self.intentos = intento + 1
+            try:
+                if self._intentar():
+                    return True
+            except ConflictoLote as e:
+                self.conflictos += 1
+                print(f"Lote no publicado: {e}")
+                return False
+            except Exception as e:
+                print(f"Lote no publicado: error de red/API ({e})")
+                return False
+            self.conflictos += 1
+            time.sleep(random.uniform(0, min(2.0, 0.25 * 2 ** self.intentos)))  # la rama avanzó
+        print(f"Lote no publicado: la rama siguió moviéndose ({self.MAX_INTENTOS} intentos)")
+        return False
+
+    def _registrar(self, ok, segundos):
+        """Métricas por archivo escrito (los borrados no cuentan como escritura)"""
+        archivos = {archivo for tipo, archivo, _, _ in self._ops if tipo != "borrar"}
+        for archivo in sorted(archivos):
+            self.backend.metricas.registrar(archivo, ok, self.intentos, self.conflictos, segundos, via="lote")
+
+    def _aplicar_local(self):
+        for tipo, archivo, datos, _ in self._ops:
+            if not self.local.soporta(archivo):
+                continue
+            if tipo == "escribir" and not self.local.escribir(archivo, datos, self.mensaje):
+                return False
+            if tipo == "agregar" and not self.local.agregar(archivo, datos, self.mensaje):
+                return False
+        return True
+
+    def _intentar(self):
+        """
+        Un intento completo sobre la cabeza actual.
+
+        Returns:
+            bool: False si el ref update no fue fast-forward (hay que reintentar)
+        """
+        b = self.backend
+        rama = b.rama()
+        cabeza = self._cabeza(rama)
+        arbol_base = self._json(b.http.get(self._url(f"git/commits/{cabeza}"), headers=b.headers, timeout=(5, 15)))["tree"]["sha"]
+        shas = self._shas_arbol(arbol_base)
+
+        json_finales, binarios = self._resolver(shas)
+
+        contenidos = {}
+        for archivo, datos in json_finales.items():
+            contenidos[archivo] = serializar(datos)
+            if b.lleva_snapshot(archivo):
+                parquet = snapshot_columnar.generar(datos, sha_blob(contenidos[archivo]))
+                if parquet:
+                    binarios[snapshot_columnar.nombre_snapshot(archivo)] = parquet
+        contenidos.update(binarios)
+
+        entradas = self._entradas(contenidos)
+        if not entradas:
+            return True
+        resp = b.http.post(self._url("git/trees"), headers=b.headers, timeout=(5, 60),
+                           json={"base_tree": arbol_base, "tree": entradas})
+        arbol = self._json(resp)["sha"]
+        resp = b.http.post(self._url("git/commits"), headers=b.headers, timeout=(5, 30),
+                           json={"message": self.mensaje, "tree": arbol, "parents": [cabeza]})
+        commit = self._json(resp)["sha"]
+        # Sin reintentos por 5xx: si el ref ya se movió, la repetición vuelve 422 y el
+        # lote se publicaría dos veces (ej. un segundo segmento con los mismos registros)
+        try:
+            resp = b.http.patch(self._url(f"git/refs/heads/{rama}"), headers=b.headers, timeout=(5, 30),
+                                json={"sha": commit, "force": False}, reintentar_en=(429,))
+        except requests.RequestException:
+            resp = None  # respuesta perdida: el ref pudo haberse movido igual
+        if resp is None or resp.status_code == 422 or resp.status_code >= 500:
+            if self._cabeza(rama) != commit:
+                return False  # non-fast-forward (o el PATCH no entró): reintentar
+        else:
+            self._json(resp)
+
+        self.commit = commit
+        self._recordar(json_finales, contenidos)
+        return True
+
+    def _cabeza(self, rama):
+        """sha al que apunta hoy la rama"""
+        b = self.backend
+        resp = b.http.get(self._url(f"git/ref/heads/{rama}"), headers=b.headers, timeout=(5, 15))
+        return self._json(resp)["object"]["sha"]
+
+    def _resolver(self, shas):
+        """
+        Aplica las operaciones sobre el árbol de la cabeza.
+
+        Returns:
+            tuple: (archivo -> datos JSON finales, archivo -> bytes o None si se borra)
+        """
+        for tipo, archivo, _, si_sha in self._ops:
+            if si_sha is not SIN_CONDICION and shas.get(archivo) != si_sha:
+                raise ConflictoLote(f"{archivo} cambió desde que se leyó")
+
+        por_leer = {
+            archivo for tipo, archivo, _, _ in self._ops
+            if tipo == "agregar" and not self._va_a_segmento(archivo) and archivo in shas
+        }
+        actuales = en_paralelo({a: (lambda a=a: self._leer_blob(a, shas[a])) for a in por_leer})
+
+        json_finales, binarios, nuevos_buzon = {}, {}, []
+        for tipo, archivo, datos, _ in self._ops:
+            if tipo == "escribir":
+                json_finales[archivo] = datos
+                binarios.pop(archivo, None)
+            elif tipo == "bytes":
+                binarios[archivo] = datos
+                json_finales.pop(archivo, None)
+            elif tipo == "agregar" and self._va_a_segmento(archivo):
+                nuevos_buzon.extend(datos)
+            elif tipo == "agregar":
+                base = json_finales.get(archivo, actuales.get(archivo, []))
+                json_finales[archivo] = (list(base) if isinstance(base, list) else []) + datos
+            elif tipo == "borrar":
+                json_finales.pop(archivo, None)
+                if archivo in shas:
+                    binarios[archivo] = None
+                else:
+                    binarios.pop(archivo, None)
+
+        if nuevos_buzon:
+            segs = sorted(
+                (seq, path, sha) for path, sha in shas.items()
+                if path.startswith(self.buzon.CARPETA + "/") and (seq := self.buzon._seq_de(path)) is not None
+            )
+            segmento = self.buzon._nombre(self.buzon._siguiente_seq(segs))
+            binarios[segmento] = json.dumps(nuevos_buzon, ensure_ascii=False).encode()
+        return json_finales, binarios
+
+    def _va_a_segmento(self, archivo):
+        return self.buzon is not None and archivo == self.buzon.ARCHIVO
+
+    def _entradas(self, contenidos):
+        """Entradas del tree; lo grande o binario sube antes como blob (en paralelo)"""
+        b = self.backend
+        entradas, blobs = [], {}
+        for archivo, contenido in contenidos.items():
+            entrada = {"path": archivo, "mode": "100644", "type": "blob"}
+            if contenido is None:
+                entrada["sha"] = None
+            elif len(contenido) <= self.TAM_INLINE and self._es_texto(contenido):
+                entrada["content"] = contenido.decode("utf-8")
+            else:
+                entrada["sha"] = sha_blob(contenido)
+                blobs[archivo] = contenido
+            entradas.append(entrada)
+
+        def subir(contenido):
+            resp = b.http.post(self._url("git/blobs"), headers=b.headers, timeout=(5, 120), json={
+                "content": base64.b64encode(contenido).decode(), "encoding": "base64",
+            })
+            return self._json(resp)["sha"]
+
+        subidos = en_paralelo({a: (lambda c=c: subir(c)) for a, c in blobs.items()})
+        for archivo, sha in subidos.items():
+            if sha != sha_blob(blobs[archivo]):
+                raise ValueError(f"sha inesperado para el blob de {archivo}")
+        return entradas
+
+    @staticmethod
+    def _es_texto(contenido):
+        try:
+            contenido.decode("utf-8")
+            return True
+        except UnicodeDecodeError:
+            return False
+
+    def _recordar(self, json_finales, contenidos):
+        """Tras el commit: cache de contenidos al día y snapshots locales guardados"""
+        b = self.backend
+        for archivo, contenido in contenidos.items():
+            url = f"{b.base_url}/{archivo}"
+            if b.cache:
+                if archivo in json_finales:
+                    b.cache.guardar(url, None, sha_blob(contenido), json_finales[archivo])
+                else:
+                    b.cache.invalidar(url)
+            b._invalidar_carpeta(archivo)
+        for archivo in json_finales:
+            nombre = snapshot_columnar.nombre_snapshot(archivo)
+            if b.lleva_snapshot(archivo) and contenidos.get(nombre):
+                b.snapshots.guardar(archivo, contenidos[nombre])
+
+    def _compactar_buzon(self):
+        if self.buzon is not None and any(self._va_a_segmento(a) for _, a, _, _ in self._ops):
+            self.buzon.compactar_si_toca()
+
+    # ---------------------------
+    # Git Data API
+    # ---------------------------
+    def _url(self, ruta):
+        return f"{self.backend.repo_url}/{ruta}"
+
+    @staticmethod
+    def _json(resp):
+        if resp.status_code not in (200, 201):
+            raise ValueError(f"HTTP {resp.status_code}")
+        return resp.json()
+
+    def _shas_arbol(self, arbol):
+        """ruta -> sha de los blobs de ese tree (un tree no cambia: basta comparar su sha)"""
+        b = self.backend
+        clave = self._url("git/trees")  # una sola entrada: el último tree usado como base
+        entrada = b.cache.obtener(clave) if b.cache else None
+        if entrada is not None and entrada.sha == arbol:
+            return entrada.datos
+        url = self._url(f"git/trees/{arbol}?recursive=1")
+        datos = self._json(b.http.get(url, headers=b.headers, timeout=(5, 30)))
+        shas = {x["path"]: x["sha"] for x in datos.get("tree", []) if x.get("type") == "blob"}
+        if b.cache:
+            b.cache.guardar(clave, None, arbol, shas)
+        return shas
+
+    def _leer_blob(self, archivo, sha):
+        """Contenido del archivo en la cabeza: de la cache si es el mismo blob"""
+        b = self.backend
+        entrada = b.cache.obtener(f"{b.base_url}/{archivo}") if b.cache else None
+        if entrada is not None and entrada.sha == sha:
+            return entrada.datos
+        d = self._json(b.http.get(self._url(f"git/blobs/{sha}"), headers=b.headers, timeout=(5, 60)))
+        return historico_stream.cargar_json(historico_stream.trozos_base64(d["content"]))
@@ -0,0 +1,70 @@
+"""
+modules/metricas_escritura.py
+Contadores de las escrituras a GitHub: intentos, conflictos de sha y reintentos
+por archivo (panel de debug de Stock Real)
+"""
+import threading
+import time
+from collections import deque
+
+
+class MetricasEscritura:
+    """
+    Una instancia por backend (compartida por todas las sesiones del proceso).
+    Cada escritura registra cuántos intentos hizo y cuántos chocaron con otro
+    escritor (409/422 por sha, secuencia de segmento tomada o ref que avanzó).
+    """
+
+    RECIENTES = 50
+
+    def __init__(self):
+        self._por_archivo = {}
+        self._recientes = deque(maxlen=self.RECIENTES)
+        self._lock = threading.Lock()
+
+    def registrar(self, archivo, ok, intentos=1, conflictos=0, segundos=0.0, via="contents"):
+        """
+        Args:
+            archivo: Archivo (o "lote" para un commit de varios)
+            ok: Si la escritura quedó
+            intentos: PUT/commits intentados
+            conflictos: Intentos rechazados porque otro escribió antes
+            segundos: Duración total con reintentos
+            via: "contents", "segmento" o "lote"
+        """
+        with self._lock:
+            m = self._por_archivo.setdefault(archivo, {
+                "escrituras": 0, "fallidas": 0, "conflictos": 0, "reintentos": 0,
+                "max_intentos": 0, "segundos": 0.0,
+            })
+            m["escrituras"] += 1
+            m["fallidas"] += 0 if ok else 1
+            m["conflictos"] += conflictos
+            m["reintentos"] += max(0, intentos - 1)
+            m["max_intentos"] = max(m["max_intentos"], intentos)
+            m["segundos"] += segundos
+            self._recientes.append({
+                "archivo": archivo, "via": via, "ok": ok, "intentos": intentos,
+                "conflictos": conflictos, "seg": round(segundos, 3), "ts": time.time(),
+            })
+
+    def resumen(self):
+        """Returns: dict archivo -> contadores (con seg_promedio)"""
+        with self._lock:
+            out = {}
+            for archivo, m in self._por_archivo.items():
+                out[archivo] = dict(m, seg_promedio=round(m["segundos"] / m["escrituras"], 3))
+                del out[archivo]["segundos"]
+            return out
+
+    def recientes(self, n=10):
+        with self._lock:
+            return list(self._recientes)[-n:]
+
+    def ultima(self, archivo):
+        """Última escritura registrada de ese archivo (o None)"""
+        with self._lock:
+            for r in reversed(self._recientes):
+                if r["archivo"] == archivo:
+                    return dict(r)
+            return None
@@ -0,0 +1,92 @@
+"""
+modules/paginacion.py
+Vista paginada de tablas grandes del histórico: filtro y orden vienen del índice
+(posiciones), y solo se arma el DataFrame de la página visible + vecinas
+"""
+import numpy as np
+import pandas as pd
+
+
+class VistaPaginada:
+    """
+    Modelo de vista por páginas.
+
+    - `posiciones` ya viene filtrado y ordenado (IndiceHistorico.orden/seleccionar).
+    - `materializar(posiciones)` arma el DataFrame de esas filas (índice = posición).
+    - Se materializa un bloque [página - vecinas, página + vecinas] de una vez y
+      se guarda en `cache` (p. ej. un dict de session_state) con la `firma` de
+      la vista: pasar a la página siguiente no vuelve a tocar el histórico.
+    """
+
+    TAMANOS = (50, 100, 300, 1000)
+    MAX_BLOQUES = 8
+
+    def __init__(self, posiciones, materializar, tamano=100, vecinas=1, cache=None, firma=None):
+        """
+        Args:
+            posiciones: Posiciones en el histórico, en el orden a mostrar
+            materializar: Callable(lista de posiciones) -> DataFrame
+            tamano: Filas por página
+            vecinas: Páginas que se materializan a cada lado de la visible
+            cache: dict donde guardar bloques ya armados (None = sin cache)
+            firma: Identifica datos + filtro + orden (si cambia, el cache no sirve)
+        """
+        self.posiciones = np.asarray(posiciones, dtype=np.int64)
+        self.materializar = materializar
+        self.tamano = max(1, int(tamano))
+        self.vecinas = max(0, int(vecinas))
+        self.cache = cache
+        self.firma = firma
+
+    @property
+    def total(self):
+        return len(self.posiciones)
+
+    @property
+    def paginas(self):
+        return max(1, -(-self.total // self.tamano))
+
+    def acotar(self, pagina):
+        return min(max(1, int(pagina)), self.paginas)
+
+    def rango(self, pagina):
+        """Returns: (inicio, fin) de la página (1-based) dentro de posiciones"""
+        pagina = self.acotar(pagina)
+        inicio = (pagina - 1) * self.tamano
+        return inicio, min(inicio + self.tamano, self.total)
+
+    def pagina(self, n):
+        """DataFrame de la página n (1-based), en el orden de posiciones"""
+        n = self.acotar(n)
+        if self.total == 0:
+            return pd.DataFrame()
+
+        # Bloque alineado a (2 * vecinas + 1) páginas para que las vecinas caigan
+        # en el mismo bloque y se reutilice al navegar
+        ancho = 2 * self.vecinas + 1
+        bloque = (n - 1) // ancho
+        ini_bloque = bloque * ancho * self.tamano
+        fin_bloque = min(ini_bloque + ancho * self.tamano, self.total)
+
+        df = self._bloque(bloque, ini_bloque, fin_bloque)
+        inicio, fin = self.rango(n)
+        return df.iloc[inicio - ini_bloque:fin - ini_bloque]
+
+    def _bloque(self, bloque, inicio, fin):
+        clave = (self.firma, self.tamano, bloque)
+        if self.cache is not None and clave in self.cache:
+            return self.cache[clave]
+
+        posiciones = self.posiciones[inicio:fin].tolist()
+        df = self.materializar(posiciones)
+        if not df.empty:
+            df = df.reindex(posiciones)
+
+        if self.cache is not None:
+            # Solo sirven los bloques de la firma actual (y unos pocos)
+            for k in [k for k in self.cache if k[0] != self.firma]:
+                del self.cache[k]
+            while len(self.cache) >= self.MAX_BLOQUES:
+                del self.cache[next(iter(self.cache))]
+            self.cache[clave] = df
+        return df
@@ -0,0 +1,202 @@
+"""
+modules/prompt_llm.py
+Arma los mensajes para la API con un presupuesto de tokens: prefijo estático
+primero (SYSTEM_PROMPT + lecciones, memoizado), historial reciente textual y el
+más viejo resumido, y el borrador como tabla compacta (cabecera + filas).
+tiktoken es opcional: sin él se estima ~4 caracteres por token.
+"""
+import threading
+from collections import OrderedDict
+
+try:
+    import tiktoken
+except ImportError:  # sin tiktoken: estimación por caracteres
+    tiktoken = None
+
+from modules.cache_llm import huella
+
+# Sobrecosto por mensaje del formato chat (rol + separadores)
+TOKENS_POR_MENSAJE = 4
+_VACIOS = {"", "none", "null"}
+_NA = {"n/a", "na"}
+
+_codificadores = {}
+
+
+def contar_tokens(texto, modelo="gpt-4o-mini"):
+    """Tokens de un texto con el codificador del modelo (o len/4 sin tiktoken)"""
+    texto = texto or ""
+    if tiktoken is None:
+        return len(texto) // 4 + 1
+    enc = _codificadores.get(modelo)
+    if enc is None:
+        try:
+            enc = tiktoken.encoding_for_model(modelo)
+        except (KeyError, ValueError):
+            enc = tiktoken.get_encoding("o200k_base")
+        _codificadores[modelo] = enc
+    return len(enc.encode(texto))
+
+
+def tokens_mensajes(mensajes, modelo="gpt-4o-mini"):
+    return sum(contar_tokens(m.get("content"), modelo) + TOKENS_POR_MENSAJE for m in mensajes)
+
+
+def _celda(v):
+    s = "" if v is None else str(v)
+    return s.replace("|", "/").replace("\n", " ").strip()
+
+
+def compactar_borrador(items):
+    """
+    Borrador como tabla: una cabecera con las columnas y una fila por item.
+    Las columnas vacías en todos los items o N/A en todos se nombran una sola vez
+    en lugar de repetirse por fila (sin perder información).
+
+    Returns:
+        str: "[]" si no hay items
+    """
+    items = [it for it in (items or []) if isinstance(it, dict)]
+    if not items:
+        return "[]"
+
+    columnas = list(OrderedDict.fromkeys(k for it in items for k in it))
+    vacias, todas_na, visibles = [], [], []
+    for col in columnas:
+        valores = {_celda(it.get(col)).lower() for it in items}
+        if valores <= _VACIOS:
+            vacias.append(col)
+        elif valores <= _NA:
+            todas_na.append(col)
+        else:
+            visibles.append(col)
+
+    lineas = [f"{len(items)} items. Columnas separadas por |; celda vacía = sin dato."]
+    if vacias:
+        lineas.append(f"Vacías en todos: {', '.join(vacias)}")
+    if todas_na:
+        lineas.append(f"N/A en todos: {', '.join(todas_na)}")
+    lineas.append("#|" + "|".join(visibles))
+    for n, it in enumerate(items, 1):
+        lineas.append(f"{n}|" + "|".join(_celda(it.get(col)) for col in visibles))
+    return "\n".join(lineas)
+
+
+def resumir_turno(texto, max_chars=120):
+    t = " ".join(str(texto or "").split())
+    return t if len(t) <= max_chars else t[:max_chars - 1] + "…"
+
+
+class ConstructorPrompt:
+    """
+    Orden de los mensajes (lo estable primero, para que el cache de prompts del
+    proveedor reutilice el prefijo entre turnos):
+
+        SYSTEM_PROMPT -> lecciones -> resumen de turnos viejos -> turnos recientes
+        -> ESTADO ACTUAL (borrador compacto) -> mensaje del usuario
+
+    El borrador y el mensaje del usuario van siempre completos; lo que no entra en
+    el presupuesto se recorta de las lecciones (las más viejas primero) y del
+    historial (los turnos más viejos pasan al resumen).
+    """
+
+    def __init__(self, system_prompt, modelo="gpt-4o-mini", presupuesto=6000, presupuesto_lecciones=1500):
+        """
+        Args:
+            system_prompt: Prompt fijo del sistema
+            modelo: Modelo (elige el codificador de tokens)
+            presupuesto: Tokens máximos del prompt completo
+            presupuesto_lecciones: Tope de tokens para el bloque de lecciones
+        """
+        self.system_prompt = system_prompt
+        self.modelo = modelo
+        self.presupuesto = presupuesto
+        self.presupuesto_lecciones = presupuesto_lecciones
+        self._prefijos = OrderedDict()  # huella de lecciones -> (mensajes, tokens)
+        self._lock = threading.Lock()
+        self.ultimo = {}
+
+    # ---------------------------
+    # Prefijo estático
+    # ---------------------------
+    def prefijo(self, lecciones):
+        """
+        Returns:
+            tuple: (mensajes de sistema + lecciones, tokens) — memoizado por lecciones
+        """
+        clave = huella(lecciones or [])
+        with self._lock:
+            if clave in self._prefijos:
+                self._prefijos.move_to_end(clave)
+                return self._prefijos[clave]
+
+        lineas, usados = [], 0
+        for l in reversed(lecciones or []):  # las más recientes tienen prioridad
+            linea = f"- {l.get('lo_que_hizo_mal', '')} -> {l.get('como_debe_hacerlo', '')}"
+            t = contar_tokens(linea, self.modelo) + 1
+            if usados + t > self.presupuesto_lecciones:
+                break
+            lineas.append(linea)
+            usados += t
+        memoria_err = "\n".join(reversed(lineas))
+
+        mensajes = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "system", "content": f"LECCIONES TÉCNICAS:\n{memoria_err}"},
+        ]
+        resultado = (mensajes, tokens_mensajes(mensajes, self.modelo))
+        with self._lock:
+            self._prefijos[clave] = resultado
+            while len(self._prefijos) > 8:
+                self._prefijos.popitem(last=False)
+        return resultado
+
+    # ---------------------------
+    # Prompt completo
+    # ---------------------------
+    def construir(self, user_input, lecciones, borrador_actual, historial_mensajes):
+        """
+        Returns:
+            list: Mensajes para chat.completions.create
+        """
+        prefijo, t_prefijo = self.prefijo(lecciones)
+        estado = {"role": "system", "content": f"ESTADO ACTUAL:\n{compactar_borrador(borrador_actual)}"}
+        usuario = {"role": "user", "content": user_input}
+        fijos = t_prefijo + tokens_mensajes([estado, usuario], self.modelo)
+
+        # Turnos recientes textuales mientras alcance; el resto al resumen
+        restante = self.presupuesto - fijos
+        historial = [m for m in (historial_mensajes or []) if (m.get("content") or "").strip()]
+        recientes = []
+        for m in reversed(historial):
+            t = contar_tokens(m["content"], self.modelo) + TOKENS_POR_MENSAJE
+            if t > restante:
+                break
+            recientes.insert(0, {"role": m.get("role", "user"), "content": m["content"]})
+            restante -= t
+        viejos = historial[:len(historial) - len(recientes)]
+
+        resumen = []
+        if viejos:
+            lineas = []
+            for m in reversed(viejos):
+                linea = f"- {resumir_turno(m['content'])}"
+                t = contar_tokens(linea, self.modelo) + 1
+                if t > restante - TOKENS_POR_MENSAJE:
+                    break
+                lineas.insert(0, linea)
+                restante -= t
+            if lineas:
+                resumen = [{"role": "system", "content": "TURNOS ANTERIORES (resumen):\n" + "\n".join(lineas)}]
+
+        mensajes = prefijo + resumen + recientes + [estado, usuario]
+        self.ultimo = {
+            "tokens": tokens_mensajes(mensajes, self.modelo),
+            "prefijo": t_prefijo,
+            "presupuesto": self.presupuesto,
+            "turnos_textuales": len(recientes),
+            "turnos_resumidos": len(viejos),
+            "lecciones": len(lecciones or []),
+            "tiktoken": tiktoken is not None,
+        }
+        return mensajes
@@ -0,0 +1,76 @@
+"""
+modules/recursos.py
+Registro de recursos compartidos por proceso (al estilo de st.cache_resource):
+clientes de OpenAI/GitHub y objetos de pestañas se crean una sola vez
+"""
+import threading
+import time
+
+
+class RegistroRecursos:
+    """
+    Crea cada recurso una sola vez por proceso y lo comparte entre sesiones.
+
+    - Thread-safe: Streamlit atiende cada sesión en su propio hilo. Dos sesiones
+      pidiendo el mismo recurso a la vez esperan a una única creación.
+    - Mide cuánto tardó cada creación (para el panel de debug).
+    - Si la fábrica falla, no se guarda nada y el próximo pedido reintenta.
+    """
+
+    def __init__(self):
+        self._recursos = {}
+        self._tiempos = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _lock_de(self, nombre):
+        with self._lock:
+            lock = self._locks.get(nombre)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[nombre] = lock
+            return lock
+
+    def obtener(self, nombre, fabrica):
+        """
+        Args:
+            nombre: Clave única del recurso ("github", "ai_engine", "chat_tab"...)
+            fabrica: Callable sin argumentos que crea el recurso
+
+        Returns:
+            object: El recurso (creado ahora o reutilizado)
+        """
+        recurso = self._recursos.get(nombre)
+        if recurso is not None:
+            return recurso
+
+        with self._lock_de(nombre):
+            recurso = self._recursos.get(nombre)
+            if recurso is None:
+                t0 = time.perf_counter()
+                recurso = fabrica()
+                self._tiempos[nombre] = time.perf_counter() - t0
+                self._recursos[nombre] = recurso
+            return recurso
+
+    def tiempos(self):
+        """Returns: dict nombre -> segundos que tomó crearlo"""
+        return dict(self._tiempos)
+
+    def liberar(self, nombre=None):
+        """Descarta un recurso (o todos) para que se vuelva a crear"""
+        with self._lock:
+            if nombre:
+                self._recursos.pop(nombre, None)
+                self._tiempos.pop(nombre, None)
+            else:
+                self._recursos.clear()
+                self._tiempos.clear()
+
+
+registro = RegistroRecursos()
+
+
+def recurso(nombre, fabrica):
+    """Atajo sobre el registro global del proceso"""
+    return registro.obtener(nombre, fabrica)
@@ -0,0 +1,185 @@
+"""
+modules/refresco_historico.py
+Hilo en segundo plano que mantiene en memoria la última versión de historico.json
+(snapshot inmutable y versionado): las pestañas leen el último publicado sin
+esperar a la red en cada clic
+"""
+import threading
+import time
+
+
+class SnapshotHistorico:
+    """
+    Una versión publicada del histórico. No se modifica nunca: cada cambio es un
+    snapshot nuevo con version + 1 (los dicts internos tampoco deben tocarse).
+    """
+
+    __slots__ = ("version", "sha", "registros", "obtenido")
+
+    def __init__(self, version, sha, registros, obtenido):
+        self.version = version
+        self.sha = sha
+        self.registros = registros  # tuple
+        self.obtenido = obtenido
+
+    def __len__(self):
+        return len(self.registros)
+
+
+class RefrescoHistorico:
+    """
+    Worker por proceso (compartido por todas las sesiones).
+
+    - Cada `intervalo` segundos relee el archivo vía GitHubHandler.obtener_github,
+      que revalida con ETag (un 304 no baja ni parsea nada).
+    - Si cambió el sha, arma un SnapshotHistorico nuevo, corre los callbacks
+      `al_publicar` (ledger, índice) y recién entonces lo publica: quien lea el
+      snapshot nuevo ya encuentra ledger e índice al día.
+    - La publicación es un cambio de referencia bajo un Condition: los lectores
+      ven la versión anterior completa o la nueva completa.
+    - `tareas` corren en cada vuelta del mismo hilo (ej. compactar el buzón para
+      que un envío suelto llegue a buzon.json aunque nadie vuelva a escribir).
+    """
+
+    REINTENTO_ERROR_SEG = 5
+
+    def __init__(self, github, archivo="historico.json", intervalo=30, al_publicar=(), tareas=()):
+        """
+        Args:
+            github: GitHubHandler
+            archivo: Documento a mantener
+            intervalo: Segundos entre revisiones
+            al_publicar: Callables(registros) que se ejecutan antes de publicar
+            tareas: Callables sin argumentos que se ejecutan en cada vuelta
+        """
+        self.github = github
+        self.archivo = archivo
+        self.intervalo = intervalo
+        self.al_publicar = list(al_publicar)
+        self.tareas = list(tareas)
+
+        self._actual = None
+        self._cond = threading.Condition()
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+        self._leyendo = False
+
+        self.lecturas = 0
+        self.publicaciones = 0
+        self.revisado = None
+        self.ultimo_error = None
+
+    # ---------------------------
+    # Hilo
+    # ---------------------------
+    def iniciar(self):
+        with self._cond:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, name=f"refresco-{self.archivo}", daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        self._despertar.set()
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            for fn in self.tareas:
+                try:
+                    fn()
+                except Exception as e:
+                    print(f"Refresco {self.archivo}: tarea {getattr(fn, '__qualname__', fn)} falló ({e})")
+            self._refrescar()
+            espera = self.REINTENTO_ERROR_SEG if self.ultimo_error else self.intervalo
+            self._despertar.wait(espera)
+            self._despertar.clear()
+
+    def _refrescar(self):
+        with self._cond:
+            self._leyendo = True
+        try:
+            datos, sha = self.github.obtener_github(self.archivo)
+        except Exception as e:
+            datos, sha = None, None
+            print(f"Refresco {self.archivo}: {e}")
+
+        nuevo = None
+        actual = self._actual
+        if datos is not None:
+            registros = tuple(datos) if isinstance(datos, list) else ()
+            cambio = actual is None or sha != actual.sha or (sha is None and registros != actual.registros)
+            if cambio:
+                version = actual.version + 1 if actual else 1
+                nuevo = SnapshotHistorico(version, sha, registros, time.time())
+                for fn in self.al_publicar:
+                    try:
+                        fn(registros)
+                    except Exception as e:
+                        print(f"Refresco {self.archivo}: callback {getattr(fn, '__qualname__', fn)} falló ({e})")
+
+        with self._cond:
+            if nuevo is not None:
+                self._actual = nuevo
+                self.publicaciones += 1
+            if datos is None:
+                self.ultimo_error = f"No se pudo leer {self.archivo}"
+            else:
+                self.ultimo_error = None
+                self.revisado = time.time()
+            self.lecturas += 1
+            self._leyendo = False
+            self._cond.notify_all()
+
+    # ---------------------------
+    # API para las pestañas
+    # ---------------------------
+    def actual(self, timeout=30):
+        """
+        Último snapshot publicado, sin esperar a la red. Solo la primera vez
+        (proceso recién levantado) espera a la primera lectura.
+
+        Returns:
+            SnapshotHistorico o None si todavía no se pudo leer nunca
+        """
+        snap = self._actual
+        if snap is not None:
+            return snap
+        self.iniciar()
+        with self._cond:
+            self._cond.wait_for(lambda: self._actual is not None or self.lecturas > 0, timeout)
+            return self._actual
+
+    def forzar(self, timeout=20):
+        """
+        Botón Refrescar: revalida ya contra GitHub (sin esperar el intervalo) y
+        espera esa lectura.
+
+        Returns:
+            SnapshotHistorico: el vigente después de releer
+        """
+        self.iniciar()
+        self.github.refrescar(self.archivo)
+        with self._cond:
+            # Una lectura en curso pudo empezar antes de expirar la cache: esperar la siguiente
+            objetivo = self.lecturas + (2 if self._leyendo else 1)
+        self._despertar.set()
+        with self._cond:
+            self._cond.wait_for(lambda: self.lecturas >= objetivo, timeout)
+            return self._actual
+
+    def estado(self):
+        """Para el panel de debug"""
+        snap = self._actual
+        return {
+            "version": snap.version if snap else None,
+            "sha": snap.sha if snap else None,
+            "registros": len(snap) if snap else 0,
+            "edad_seg": round(time.time() - snap.obtenido, 1) if snap else None,
+            "revisado_hace_seg": round(time.time() - self.revisado, 1) if self.revisado else None,
+            "lecturas": self.lecturas,
+            "publicaciones": self.publicaciones,
+            "error": self.ultimo_error,
+        }
@@ -0,0 +1,69 @@
+"""
+modules/registros.py
+Helpers por registro del histórico (versión fila a fila del saneo de StockTab:
+columnas basura y órdenes de borrado) y huellas para detectar cambios sin recorrer todo
+"""
+import hashlib
+import json
+
+# Mismo esquema/orden que StockTab.base_cols
+ESQUEMA = [
+    "fecha_registro", "guia", "tipo", "origen", "destino", "categoria_item",
+    "equipo", "marca", "modelo", "serie", "estado", "procesador", "ram",
+    "disco", "reporte", "cantidad",
+]
+
+COMANDOS = {"delete", "borrar_por_indices", "borrar_todo", "borrar"}
+COLUMNAS_META = {"action", "accion", "source", "instruction", "count", "indices", "idx_list", "mat", "meta"}
+
+# Campos que identifican un movimiento (el robot puede agregar otros al fusionarlo)
+CAMPOS_HUELLA = ("fecha_registro", "tipo", "equipo", "marca", "modelo", "serie", "guia", "cantidad", "destino")
+
+
+def a_dict(x):
+    """dict tal cual; lista/tupla => dict por orden de ESQUEMA; otro => None"""
+    if isinstance(x, dict):
+        return x
+    if isinstance(x, (list, tuple)):
+        return {k: (x[i] if i < len(x) else "") for i, k in enumerate(ESQUEMA)}
+    return None
+
+
+def es_comando(registro):
+    """True si el registro es una orden (borrado) y no un movimiento"""
+    acc = registro.get("action", registro.get("accion"))
+    if acc is not None:
+        return str(acc).strip().lower() in COMANDOS
+
+    ind = registro.get("indices")
+    if ind is not None and ("instruction" in registro or "source" in registro):
+        s = str(ind).strip()
+        return s.startswith("[") and s.endswith("]") and s != "[]"
+    return False
+
+
+def clave(k):
+    """Nombre de columna normalizado; None si es basura (0, 1, 2... o meta de comandos)"""
+    ks = str(k).strip().lower()
+    if ks.isdigit() or ks in COLUMNAS_META:
+        return None
+    return ks
+
+
+def limpiar(registro):
+    """Normaliza claves y quita columnas basura (0, 1, 2... y meta de comandos)"""
+    out = {}
+    for k, v in registro.items():
+        ks = clave(k)
+        if ks is not None:
+            out[ks] = v
+    return out
+
+
+def huella(registro):
+    """Hash corto y estable de un movimiento (16 hex)"""
+    if not isinstance(registro, dict):
+        base = json.dumps(registro, ensure_ascii=False, default=str)
+    else:
+        base = "\x1f".join(str(registro.get(c, "")).strip().lower() for c in CAMPOS_HUELLA)
+    return hashlib.blake2b(base.encode("utf-8"), digest_size=8).hexdigest()
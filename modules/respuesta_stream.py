@@ -0,0 +1,145 @@
+"""
+modules/respuesta_stream.py
+Lectura incremental de la respuesta del modelo mientras llega por streaming:
+el texto que ve el usuario (lo hablado antes del primer "{", como
+AIEngine.extraer_json, más "missing_info" a medida que se escribe) y cada item
+del arreglo "items" apenas se cierra su objeto, sin esperar al resto.
+"""
+import json
+
+
+def _cadena_parcial(crudo):
+    """Contenido de una cadena JSON a medio llegar (sin la comilla final)"""
+    for corte in range(7):  # un escape incompleto al final ("\\", "\\u00") se descarta
+        try:
+            return json.loads(f'"{crudo[:len(crudo) - corte]}"')
+        except ValueError:
+            continue
+    return ""
+
+
+class LectorRespuesta:
+    """
+    Recorre cada carácter una sola vez. Lleva la profundidad de llaves/corchetes,
+    si está dentro de una cadena y la última clave del objeto raíz:
+
+    - Mientras se escribe el valor de "missing_info" se entrega el texto parcial
+      (con salida estructurada el modelo no habla fuera del JSON y eso es lo que
+      muestra _reply).
+    - Dentro de "items", cada objeto que se cierra se parsea con json.loads y se
+      entrega la lista acumulada.
+
+    Uso:
+        lector = LectorRespuesta()
+        for fragmento in stream:
+            for tipo, valor in lector.alimentar(fragmento):
+                ...  # ("texto", texto_acumulado) | ("items", items_completos_hasta_ahora)
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.texto = ""
+        self.items = None
+
+        self._pos = 0
+        self._inicio_json = None
+        self._hablado = ""
+        self._aviso = ""
+        self._profundidad = 0
+        self._en_cadena = False
+        self._escape = False
+        self._inicio_cadena = None
+        self._ultima_cadena = None
+        self._clave = None
+        self._inicio_aviso = None
+        self._inicio_items = None
+        self._inicio_item = None
+
+    def alimentar(self, fragmento):
+        """
+        Args:
+            fragmento: Texto nuevo recibido del stream
+
+        Returns:
+            list: Eventos ("texto", str) / ("items", list) producidos por este fragmento
+        """
+        if not fragmento:
+            return []
+        self.buffer += fragmento
+
+        if self._inicio_json is None:
+            llave = self.buffer.find("{", self._pos)
+            hasta = llave if llave != -1 else len(self.buffer)
+            self._hablado = self.buffer[:hasta].strip()
+            if llave == -1:
+                self._pos = len(self.buffer)
+                return self._eventos(False)
+            self._inicio_json = llave
+            self._pos = llave
+
+        return self._eventos(self._escanear())
+
+    def _eventos(self, items_nuevos):
+        eventos = []
+        texto = f"{self._hablado}\n{self._aviso}".strip()
+        if texto != self.texto:
+            self.texto = texto
+            eventos.append(("texto", texto))
+        if items_nuevos:
+            eventos.append(("items", list(self.items)))
+        return eventos
+
+    def _escanear(self):
+        buf = self.buffer
+        nuevos = False
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+            if self._en_cadena:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._en_cadena = False
+                    if self._profundidad == 1:
+                        self._ultima_cadena = buf[self._inicio_cadena + 1:i]
+                    if self._inicio_aviso is not None:
+                        self._aviso = _cadena_parcial(buf[self._inicio_aviso:i])
+                        self._inicio_aviso = None
+                continue
+
+            if c == '"':
+                self._en_cadena = True
+                self._inicio_cadena = i
+                if self._profundidad == 1 and self._clave == "missing_info":
+                    self._inicio_aviso = i + 1
+            elif c == ":" and self._profundidad == 1:
+                self._clave = self._ultima_cadena
+            elif c == "," and self._profundidad == 1:
+                self._clave = None
+            elif c in "{[":
+                if c == "[" and self._profundidad == 1 and self._clave == "items":
+                    self._inicio_items = i
+                    self.items = []
+                elif c == "{" and self._profundidad == 2 and self._inicio_items is not None:
+                    self._inicio_item = i
+                self._profundidad += 1
+            elif c in "}]":
+                self._profundidad -= 1
+                if c == "}" and self._profundidad == 2 and self._inicio_item is not None:
+                    try:
+                        item = json.loads(buf[self._inicio_item:i + 1])
+                        if isinstance(item, dict):
+                            self.items.append(item)
+                            nuevos = True
+                    except ValueError:
+                        pass
+                    self._inicio_item = None
+                elif c == "]" and self._profundidad == 1 and self._inicio_items is not None:
+                    self._inicio_items = None
+
+        # missing_info a medio escribir: se muestra lo que va llegando
+        if self._inicio_aviso is not None:
+            self._aviso = _cadena_parcial(buf[self._inicio_aviso:])
+        self._pos = len(buf)
+        return nuevos
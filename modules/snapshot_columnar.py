@@ -0,0 +1,139 @@
+"""
+modules/snapshot_columnar.py
+Snapshot columnar (Parquet) de historico.json: se genera al escribir el JSON y se
+lee con proyección de columnas, sin parsear los campos que no se usan.
+pyarrow es opcional: sin él todo sigue leyendo el JSON.
+"""
+import io
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # sin pyarrow: solo JSON
+    pa = pq = None
+
+from modules.historico_stream import HistoricoColumnar
+
+COLUMNA_POS = "__pos"  # posición del registro en el JSON (la usan ledger e índice)
+META_FUENTE = b"laia_fuente_sha"
+
+
+def disponible():
+    return pq is not None
+
+
+def nombre_snapshot(archivo):
+    """historico.json -> historico.parquet (al lado del JSON en el repo)"""
+    return archivo.rsplit(".", 1)[0] + ".parquet"
+
+
+def _texto(v):
+    """Todas las columnas se guardan como texto (el JSON mezcla 1, "3", ""...)"""
+    if v is None or (isinstance(v, float) and v != v):
+        return None
+    if isinstance(v, str):
+        return v
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, ensure_ascii=False)
+    return str(v)
+
+
+def generar(registros, fuente_sha):
+    """
+    Args:
+        registros: Lista (o iterable) de registros del JSON
+        fuente_sha: sha del blob JSON del que sale (para saber si el snapshot está al día)
+
+    Returns:
+        bytes: Parquet (zstd) o None si pyarrow no está instalado
+    """
+    if pq is None:
+        return None
+    col = HistoricoColumnar.desde(registros)
+    arrays = {COLUMNA_POS: pa.array(col.posiciones, type=pa.int64())}
+    for nombre, valores in col.columnas.items():
+        arrays[nombre] = pa.array([_texto(v) for v in valores], type=pa.string())
+    tabla = pa.table(arrays).replace_schema_metadata({META_FUENTE: str(fuente_sha or "").encode()})
+    buf = io.BytesIO()
+    pq.write_table(tabla, buf, compression="zstd")
+    return buf.getvalue()
+
+
+def fuente(origen):
+    """sha del JSON con el que se generó el snapshot (None si no se puede leer)"""
+    if pq is None:
+        return None
+    try:
+        meta = pq.read_schema(origen).metadata or {}
+    except Exception:
+        return None
+    sha = meta.get(META_FUENTE, b"").decode()
+    return sha or None
+
+
+def leer(origen, columnas=None):
+    """
+    Lee solo las columnas pedidas.
+
+    Args:
+        origen: Ruta o bytes del Parquet
+        columnas: Columnas a cargar (None = todas). Las que no existen vuelven vacías.
+
+    Returns:
+        pd.DataFrame: indexado por posición en el JSON
+    """
+    if isinstance(origen, (bytes, bytearray)):
+        origen = io.BytesIO(origen)
+    nombres = pq.read_schema(origen).names
+    if columnas is None:
+        columnas = [c for c in nombres if c != COLUMNA_POS]
+    presentes = [c for c in columnas if c in nombres]
+    df = pq.read_table(origen, columns=[COLUMNA_POS] + presentes).to_pandas()
+    df.index = pd.Index(df.pop(COLUMNA_POS).to_numpy())
+    return df.reindex(columns=list(columnas))
+
+
+def proyectar(registros, columnas=None):
+    """Mismo resultado que leer(), armado desde los registros del JSON (sin pyarrow)"""
+    df = HistoricoColumnar.desde(registros).dataframe()
+    return df if columnas is None else df.reindex(columns=list(columnas))
+
+
+class SnapshotsLocales:
+    """
+    Copia local de los snapshots (bajados del repo o generados desde el JSON),
+    válida mientras su sha de origen coincida con el del JSON vigente.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+
+    def ruta(self, archivo):
+        return os.path.join(self.directorio, nombre_snapshot(archivo).replace("/", "_"))
+
+    def vigente(self, archivo, fuente_sha):
+        """Returns: ruta del snapshot local si corresponde a fuente_sha; si no, None"""
+        ruta = self.ruta(archivo)
+        if fuente_sha and os.path.exists(ruta) and fuente(ruta) == fuente_sha:
+            return ruta
+        return None
+
+    def guardar(self, archivo, contenido):
+        """Returns: ruta o None si no se pudo (sin pyarrow / disco)"""
+        if not contenido:
+            return None
+        ruta = self.ruta(archivo)
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            tmp = f"{ruta}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(contenido)
+            os.replace(tmp, ruta)
+            return ruta
+        except OSError as e:
+            print(f"Snapshot: no se pudo guardar {ruta} ({e})")
+            return None
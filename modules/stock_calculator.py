@@ -2,8 +2,13 @@
 modules/stock_calculator.py
 Lógica de cálculo de stock, clasificación y procesamiento de datos
 """
+import re
+
+import numpy as np
 import pandas as pd
 
+from modules import cpu_generacion
+
 class StockCalculator:
     """Calculador de stock e inventario"""
     
@@ -11,6 +16,7 @@ class StockCalculator:
     def extraer_generacion(procesador):
         """
         Clasifica un procesador como 'obsoleto' o 'moderno'
+        (ver modules/cpu_generacion.py)
         
         Args:
             procesador: String con el nombre del procesador
@@ -18,80 +24,173 @@ class StockCalculator:
         Returns:
             str: 'obsoleto' o 'moderno'
         """
-        if not procesador or str(procesador).strip().lower() in ['n/a', '', 'nan']:
-            return 'moderno'  # Si no sabemos, lo tratamos como moderno
-        
-        p = str(procesador).lower()
-        
-        # Lista de términos para equipos antiguos
-        obsoletos = ['4th', '5th', '6th', '7th', '8th', '9th', 
-                     '4ta', '5ta', '6ta', '7ta', '8va', '9na', 
-                     'gen 8', 'gen 9']
-        
-        if any(x in p for x in obsoletos):
-            return 'obsoleto'
-        
-        # Si detecta 10, 11, 12, 13, 14 es moderno
-        modernos = ['10th', '11th', '12th', '13th', '14th', 
-                    '10ma', '11va', '12va', '13va', '14va', 
-                    'gen 10', 'gen 11', 'gen 12']
-        
-        if any(x in p for x in modernos):
-            return 'moderno'
-        
-        return 'moderno'  # Por defecto, moderno
+        return cpu_generacion.clasificar(procesador)
     
+    # Patrones precompilados (mismas listas que procesar_saldo)
+    PERIFERICOS = [
+        'mouse', 'teclado', 'cable', 'hdmi', 'limpiador',
+        'cargador', 'toner', 'tinta', 'parlante', 'herramienta'
+    ]
+    RE_PERIFERICO = re.compile('|'.join(PERIFERICOS))
+    RE_DANADO = re.compile('dañado|obsoleto|chatarrización')
+    RE_ENTRADA = re.compile('recibido|ingreso|entrada|llegó')
+    RE_SALIDA = re.compile('enviado|salida|despacho|egreso|envio')
+    COLUMNAS_CLASIFICACION = ('equipo', 'estado', 'tipo', 'procesador', 'cantidad')
+    # Lo único que necesita calcular_stock_completo (proyección del snapshot columnar);
+    # marca/modelo son la clave de los saldos
+    COLUMNAS_STOCK = ('equipo', 'marca', 'modelo', 'estado', 'destino', 'tipo', 'cantidad', 'procesador')
+
+    @staticmethod
+    def _codificar(serie):
+        """
+        Normaliza una columna (astype(str).lower().strip()) trabajando solo sobre
+        sus valores únicos: factoriza en códigos + categorías, transforma las
+        categorías y reconstruye con take. En columnas de baja cardinalidad
+        (tipo, destino, estado, marca...) esto es casi gratis.
+
+        Returns:
+            tuple: (serie_normalizada, codigos, categorias_normalizadas)
+        """
+        s = serie.astype(str)
+        codigos, categorias = pd.factorize(s, use_na_sentinel=False)
+        categorias = categorias.str.lower().str.strip()
+        normalizada = pd.Series(categorias.take(codigos), index=s.index, dtype=s.dtype, name=serie.name)
+        return normalizada, codigos, categorias
+
+    @staticmethod
+    def _mascara(codigos, categorias, patron):
+        """str.contains(patron) evaluado una vez por categoría y expandido por código"""
+        por_categoria = np.asarray(categorias.str.contains(patron, na=False), dtype=bool)
+        return por_categoria[codigos]
+
+    @staticmethod
+    def _normalizar(df):
+        """
+        Limpieza estricta + columnas derivadas (cant_n, gen_cpu).
+
+        Returns:
+            tuple: (df_c, cods) con cods[col] = (codigos, categorias) de las
+                   columnas de clasificación
+        """
+        df_c = df.copy()
+        df_c.columns = df_c.columns.str.lower().str.strip()
+
+        # Las columnas que se clasifican van por categorías (cada regex corre una
+        # vez por valor distinto); el resto, str vectorizado.
+        cods = {}
+        for col in df_c.columns:
+            if col in StockCalculator.COLUMNAS_CLASIFICACION:
+                df_c[col], codigos, categorias = StockCalculator._codificar(df_c[col])
+                cods[col] = (codigos, categorias)
+            else:
+                df_c[col] = df_c[col].astype(str).str.lower().str.strip()
+
+        codigos, categorias = cods['cantidad']
+        cant_cat = pd.to_numeric(pd.Series(categorias), errors='coerce').fillna(0).to_numpy()
+        df_c['cant_n'] = pd.Series(cant_cat[codigos], index=df_c.index)
+
+        # CRÍTICO: Clasificar generación de CPU
+        codigos, categorias = cods['procesador']
+        obsoleto = cpu_generacion.es_obsoleto_serie(categorias)[codigos]
+        df_c['gen_cpu'] = np.where(obsoleto, 'obsoleto', 'moderno')
+
+        return df_c, cods
+
+    @staticmethod
+    def normalizar_historial(df):
+        """
+        Mismo df_completo que devuelve calcular_stock_completo, sin calcular
+        stock/bodega/dañados (para cuando esos vienen del StockLedger)
+        """
+        if df is None or df.empty:
+            return pd.DataFrame()
+        df_c, _ = StockCalculator._normalizar(df)
+        return df_c
+
+    @staticmethod
+    def clasificar_registro(registro):
+        """
+        Reglas de calcular_stock_completo aplicadas a UN registro (para el ledger incremental)
+
+        Args:
+            registro: dict del histórico
+
+        Returns:
+            dict: clave (equipo, marca, modelo) o None si falta alguno, val (saldo con signo, solo periféricos),
+                  es_periferico, bodega (bool), danado (bool)
+        """
+        def norm(campo):
+            # Faltante/None/NaN queda como None (igual que NaN en el DataFrame:
+            # no matchea ningún patrón y groupby descarta esa clave)
+            v = registro.get(campo)
+            if v is None or (isinstance(v, float) and v != v):
+                return None
+            return str(v).lower().strip()
+
+        equipo, estado, tipo = norm('equipo') or "", norm('estado') or "", norm('tipo') or ""
+        clave = (norm('equipo'), norm('marca'), norm('modelo'))
+        try:
+            cant = float(norm('cantidad'))
+            if cant != cant:  # NaN
+                cant = 0.0
+        except (TypeError, ValueError):
+            cant = 0.0
+
+        es_periferico = StockCalculator.RE_PERIFERICO.search(equipo) is not None
+        es_danado = StockCalculator.RE_DANADO.search(estado) is not None
+        obsoleto = cpu_generacion.es_obsoleto(norm('procesador'))
+
+        val = 0.0
+        if es_periferico:
+            if StockCalculator.RE_ENTRADA.search(tipo):
+                val = cant
+            elif StockCalculator.RE_SALIDA.search(tipo):
+                val = -cant
+
+        return {
+            'clave': None if None in clave else clave,
+            'val': val,
+            'es_periferico': es_periferico,
+            'bodega': norm('destino') == 'bodega' and not es_periferico and not es_danado and not obsoleto,
+            'danado': es_danado or obsoleto,
+        }
+
     @staticmethod
     def calcular_stock_completo(df):
         """
         Calcula el stock completo: periféricos, bodega, dañados
-        
+
         Args:
             df: DataFrame con el historial completo
-        
+
         Returns:
             tuple: (df_stock, df_bodega, df_danados, df_completo)
         """
         if df is None or df.empty:
             return (pd.DataFrame(), pd.DataFrame(), 
                     pd.DataFrame(), pd.DataFrame())
-        
-        df_c = df.copy()
-        df_c.columns = df_c.columns.str.lower().str.strip()
-        
-        # Limpieza estricta
-        for col in df_c.columns:
-            df_c[col] = df_c[col].astype(str).str.lower().str.strip()
-        
-        df_c['cant_n'] = pd.to_numeric(df_c['cantidad'], errors='coerce').fillna(0)
-        
-        # CRÍTICO: Clasificar generación de CPU
-        df_c['gen_cpu'] = df_c['procesador'].apply(StockCalculator.extraer_generacion)
-        
-        # Definiciones de tipos
-        perifericos_list = [
-            'mouse', 'teclado', 'cable', 'hdmi', 'limpiador',
-            'cargador', 'toner', 'tinta', 'parlante', 'herramienta'
-        ]
-        
+
+        df_c, cods = StockCalculator._normalizar(df)
+
         # Máscaras Booleanas
-        es_periferico = df_c['equipo'].str.contains('|'.join(perifericos_list), na=False)
-        es_dañado = df_c['estado'].str.contains('dañado|obsoleto|chatarrización', na=False)
+        es_periferico = pd.Series(
+            StockCalculator._mascara(*cods['equipo'], StockCalculator.RE_PERIFERICO.pattern), index=df_c.index
+        )
+        es_dañado = pd.Series(
+            StockCalculator._mascara(*cods['estado'], StockCalculator.RE_DANADO.pattern), index=df_c.index
+        )
         es_destino_bodega = df_c['destino'] == 'bodega'
-        
+
         # --- 1. STOCK (Solo Periféricos para balance) ---
         df_p = df_c[es_periferico].copy()
-        
+
         if not df_p.empty:
-            def procesar_saldo(row):
-                t = row['tipo']
-                if any(x in t for x in ['recibido', 'ingreso', 'entrada', 'llegó']):
-                    return row['cant_n']
-                if any(x in t for x in ['enviado', 'salida', 'despacho', 'egreso', 'envio']):
-                    return -row['cant_n']
-                return 0
-            
-            df_p['val'] = df_p.apply(procesar_saldo, axis=1)
+            codigos, categorias = cods['tipo']
+            entra = StockCalculator._mascara(codigos, categorias, StockCalculator.RE_ENTRADA.pattern)
+            sale = StockCalculator._mascara(codigos, categorias, StockCalculator.RE_SALIDA.pattern)
+            sel = es_periferico.to_numpy()
+            cant = df_p['cant_n'].to_numpy()
+            df_p['val'] = np.select([entra[sel], sale[sel]], [cant, -cant], 0)
             st_res = (
                 df_p.groupby(['equipo', 'marca', 'modelo'])
                 .agg({'val': 'sum'})
@@ -100,7 +199,7 @@ class StockCalculator:
             st_res = st_res[st_res['val'] > 0]
         else:
             st_res = pd.DataFrame(columns=['equipo', 'marca', 'modelo', 'val'])
-        
+
         # --- 2. BODEGA (Solo Equipos MODERNOS en Bodega) ---
         bod_res = df_c[
             es_destino_bodega &
@@ -108,12 +207,12 @@ class StockCalculator:
             ~es_dañado &
             (df_c['gen_cpu'] == 'moderno')
         ].copy()
-        
+
         # --- 3. DAÑADOS / OBSOLETOS ---
         danados_res = df_c[es_dañado | (df_c['gen_cpu'] == 'obsoleto')].copy()
-        
+
         return st_res, bod_res, danados_res, df_c
-    
+
     @staticmethod
     def aplicar_reglas_obsolescencia(borrador):
         """
@@ -0,0 +1,257 @@
+"""
+modules/stock_ledger.py
+Ledger materializado de stock: aplica cada movimiento nuevo como delta en vez de
+recalcular STOCK / BODEGA / DAÑADOS desde cero en cada render
+"""
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+from modules import registros
+from modules.stock_calculator import StockCalculator
+
+
+class EntradaLedger:
+    """Lo que aportó un registro del histórico (para poder revertirlo)"""
+
+    __slots__ = ("huella", "clave", "val", "bodega", "danado")
+
+    def __init__(self, huella, clave, val, bodega, danado):
+        self.huella = huella
+        self.clave = clave
+        self.val = val
+        self.bodega = bodega
+        self.danado = danado
+
+    def __getstate__(self):
+        return (self.huella, self.clave, self.val, self.bodega, self.danado)
+
+    def __setstate__(self, estado):
+        self.huella, self.clave, self.val, self.bodega, self.danado = estado
+
+
+class StockLedger:
+    """
+    Saldos por (equipo, marca, modelo) + posiciones de BODEGA y DAÑADOS.
+
+    Checkpoint: N° de registros del histórico ya aplicados y la huella del último.
+    En cada sincronización:
+      1. Si el histórico sigue empezando igual (misma huella en N-1) => solo se
+         aplican los registros N.. (costo proporcional a lo nuevo).
+      2. Si el robot ya ejecutó una orden de borrado registrada => se revierten
+         esas posiciones y se sigue desde ahí.
+      3. Si nada cuadra (el histórico se reescribió) => reconstrucción completa.
+
+    Los envíos al buzón que el robot aún no fusionó se suman como provisionales
+    (solo a los saldos) y se descartan cuando su huella aparece en el histórico.
+    """
+
+    VERSION = 2  # subir si cambian las reglas de clasificación (fuerza reconstrucción)
+    TTL_PROVISIONAL = 24 * 3600
+
+    def __init__(self, ruta=None):
+        """
+        Args:
+            ruta: Archivo donde se guarda el checkpoint (None = solo en memoria)
+        """
+        self.ruta = ruta
+        self._lock = threading.RLock()
+        self.version = 0  # sube con cada cambio (clave para caches de páginas)
+        self._reset()
+        self._cargar()
+
+    def _reset(self):
+        self.entradas = []          # EntradaLedger por registro del histórico
+        self.saldos = {}            # clave -> saldo confirmado (periféricos)
+        self.bodega = []            # posiciones en el histórico
+        self.danados = []           # posiciones en el histórico
+        self.provisionales = []     # (huella, clave, val, timestamp) enviados al buzón
+        self.borrados_pendientes = []  # listas de posiciones enviadas al robot
+        self.reconstrucciones = 0
+
+    # ---------------------------
+    # Persistencia
+    # ---------------------------
+    def _cargar(self):
+        if not self.ruta or not os.path.exists(self.ruta):
+            return
+        try:
+            with open(self.ruta, "rb") as f:
+                estado = pickle.load(f)
+            if estado.get("version") != self.VERSION:
+                return
+            self.entradas = estado["entradas"]
+            self.provisionales = estado["provisionales"]
+            self.borrados_pendientes = estado["borrados_pendientes"]
+            self._rehacer_indices()
+        except Exception as e:
+            print(f"Ledger: checkpoint ilegible, se reconstruye ({e})")
+            self._reset()
+
+    def _guardar(self):
+        self.version += 1
+        if not self.ruta:
+            return
+        estado = {
+            "version": self.VERSION,
+            "entradas": self.entradas,
+            "provisionales": self.provisionales,
+            "borrados_pendientes": self.borrados_pendientes,
+        }
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+            tmp = f"{self.ruta}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(estado, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.ruta)
+        except OSError as e:
+            print(f"Ledger: no se pudo guardar el checkpoint ({e})")
+
+    def _rehacer_indices(self):
+        """saldos/bodega/dañados a partir de las entradas (tras cargar o revertir)"""
+        self.saldos = {}
+        self.bodega = []
+        self.danados = []
+        for pos, e in enumerate(self.entradas):
+            self._sumar(pos, e)
+
+    # ---------------------------
+    # Deltas
+    # ---------------------------
+    def _entrada(self, registro):
+        reg = registros.a_dict(registro)
+        if reg is None or registros.es_comando(reg):
+            return EntradaLedger(registros.huella(registro), None, 0.0, False, False)
+        c = StockCalculator.clasificar_registro(registros.limpiar(reg))
+        clave = c["clave"] if c["es_periferico"] else None
+        return EntradaLedger(registros.huella(reg), clave, c["val"], c["bodega"], c["danado"])
+
+    def _sumar(self, pos, e, signo=1):
+        if e.clave is not None and e.val:
+            self.saldos[e.clave] = self.saldos.get(e.clave, 0.0) + signo * e.val
+        if signo > 0:
+            if e.bodega:
+                self.bodega.append(pos)
+            if e.danado:
+                self.danados.append(pos)
+
+    def _aplicar(self, hist, desde):
+        for pos in range(desde, len(hist)):
+            e = self._entrada(hist[pos])
+            self.entradas.append(e)
+            self._sumar(pos, e)
+            self._consumir_provisional(e.huella)
+
+    def _consumir_provisional(self, huella):
+        for i, p in enumerate(self.provisionales):
+            if p[0] == huella:
+                del self.provisionales[i]
+                return
+
+    def _coincide(self, hist, entradas):
+        n = len(entradas)
+        if n > len(hist):
+            return False
+        return n == 0 or registros.huella(hist[n - 1]) == entradas[n - 1].huella
+
+    # ---------------------------
+    # API
+    # ---------------------------
+    def sincronizar(self, hist):
+        """
+        Pone el ledger al día con el histórico.
+
+        Returns:
+            int: N° de registros nuevos aplicados (o total si hubo reconstrucción)
+        """
+        hist = hist or []
+        with self._lock:
+            n = len(self.entradas)
+            if self._coincide(hist, self.entradas):
+                nuevos = len(hist) - n
+                if nuevos:
+                    self._aplicar(hist, n)
+                    self._guardar()
+                return nuevos
+
+            if self._aplicar_borrados(hist):
+                n = len(self.entradas)
+                self._aplicar(hist, n)
+                self._guardar()
+                return len(hist) - n
+
+            self.reconstruir(hist)
+            return len(hist)
+
+    def reconstruir(self, hist):
+        with self._lock:
+            provisionales = self.provisionales
+            self._reset()
+            self.provisionales = provisionales
+            self.reconstrucciones += 1
+            self._aplicar(hist or [], 0)
+            self._guardar()
+
+    def _aplicar_borrados(self, hist):
+        """Si el robot ya ejecutó alguna orden pendiente, revierte esas posiciones"""
+        for i, idx_list in enumerate(self.borrados_pendientes):
+            quitar = {p for p in idx_list if 0 <= p < len(self.entradas)}
+            candidatas = [e for pos, e in enumerate(self.entradas) if pos not in quitar]
+            if self._coincide(hist, candidatas):
+                self.entradas = candidatas
+                self._rehacer_indices()
+                del self.borrados_pendientes[i]
+                return True
+        return False
+
+    def registrar_borrado(self, idx_list):
+        """Orden de borrado enviada al robot (se revierte cuando el robot la aplique)"""
+        with self._lock:
+            self.borrados_pendientes.append(sorted(int(x) for x in idx_list))
+            self._guardar()
+
+    def registrar_envio(self, datos):
+        """Movimientos enviados al buzón: cuentan como provisionales hasta que lleguen al histórico"""
+        lote = datos if isinstance(datos, list) else [datos]
+        ahora = time.time()
+        with self._lock:
+            for r in lote:
+                e = self._entrada(r)
+                if e.clave is not None and e.val:
+                    self.provisionales.append((e.huella, e.clave, e.val, ahora))
+            self._guardar()
+
+    # ---------------------------
+    # Vistas
+    # ---------------------------
+    def saldos_df(self, incluir_provisionales=True):
+        """Mismo formato que st_res de calcular_stock_completo"""
+        with self._lock:
+            saldos = dict(self.saldos)
+            if incluir_provisionales:
+                limite = time.time() - self.TTL_PROVISIONAL
+                self.provisionales = [p for p in self.provisionales if p[3] >= limite]
+                for _, clave, val, _ in self.provisionales:
+                    saldos[clave] = saldos.get(clave, 0.0) + val
+
+        filas = [(k[0], k[1], k[2], v) for k, v in sorted(saldos.items()) if v > 0]
+        return pd.DataFrame(filas, columns=["equipo", "marca", "modelo", "val"])
+
+    def filas(self, df_completo, grupo):
+        """
+        Registros de BODEGA o DAÑADOS (mismas filas que calcular_stock_completo).
+
+        Args:
+            df_completo: Histórico normalizado (StockCalculator.normalizar_historial)
+                         con la posición en el histórico como índice
+            grupo: "bodega" o "danados"
+        """
+        if df_completo is None or df_completo.empty:
+            return pd.DataFrame()
+        with self._lock:
+            posiciones = self.bodega if grupo == "bodega" else self.danados
+            mascara = df_completo.index.isin(posiciones)
+        return df_completo[mascara].copy()
@@ -0,0 +1,695 @@
+"""
+modules/storage.py
+Backends de almacenamiento detrás de GitHubHandler (GitHub Contents API o SQLite local)
+"""
+import base64
+import io
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from modules import historico_stream, snapshot_columnar
+from modules.http_session import obtener_sesion
+from modules.lote_git import LoteGit
+from modules.metricas_escritura import MetricasEscritura
+
+
+class StorageBackend:
+    """
+    Interfaz común de almacenamiento.
+
+    Cada archivo JSON del repo (historico, buzon, lecciones, pedido...) se trata
+    como un documento: una lista de registros o un dict. `version` es el sha del
+    blob en GitHub o un contador local; sirve para detectar cambios.
+    """
+
+    nombre = "base"
+
+    def soporta(self, archivo):
+        """Indica si este backend puede guardar el archivo"""
+        return True
+
+    def leer(self, archivo):
+        """
+        Returns:
+            tuple: (datos, version). ([], None) si no existe, (None, None) si hubo error
+        """
+        raise NotImplementedError
+
+    def escribir(self, archivo, datos, mensaje="LAIA Update"):
+        """Sobrescribe el documento completo. Returns: bool"""
+        raise NotImplementedError
+
+    def agregar(self, archivo, datos_nuevos, mensaje="Actualización LAIA"):
+        """Agrega registros a un documento lista (APPEND). Returns: bool"""
+        contenido, _ = self.leer(archivo)
+        if not isinstance(contenido, list):
+            contenido = []
+        if isinstance(datos_nuevos, list):
+            contenido.extend(datos_nuevos)
+        else:
+            contenido.append(datos_nuevos)
+        return self.escribir(archivo, contenido, mensaje)
+
+    def leer_columnas(self, archivo, columnas=None):
+        """
+        Registros de un documento lista como DataFrame, solo con esas columnas
+        (sin órdenes de borrado; índice = posición en el JSON).
+
+        Returns:
+            pd.DataFrame o None si hubo error
+        """
+        datos, _ = self.leer(archivo)
+        if datos is None:
+            return None
+        return snapshot_columnar.proyectar(datos if isinstance(datos, list) else [], columnas)
+
+    def buscar(self, archivo, campo, valor):
+        """Busca registros con campo == valor (sin distinguir mayúsculas)"""
+        datos, _ = self.leer(archivo)
+        if not isinstance(datos, list):
+            return []
+        v = str(valor or "").strip().lower()
+        return [
+            r for r in datos
+            if isinstance(r, dict) and str(r.get(campo, "") or "").strip().lower() == v
+        ]
+
+
+class GitHubBackend(StorageBackend):
+    """Documentos guardados como archivos JSON en el repo vía Contents API"""
+
+    nombre = "github"
+    REF_ARBOL = "HEAD"  # rama por defecto del repo (la misma que usa la Contents API)
+    MAX_INTENTOS = 5  # APPEND: relecturas + reintentos ante conflicto de sha
+    # 409/422 en un PUT es conflicto de sha: repetir el mismo payload no sirve.
+    # 5xx tampoco: el PUT pudo haber entrado y la repetición volvería 409/422
+    # (se reaplicaría el append). Solo 429, que GitHub rechaza sin procesar.
+    REINTENTAR_PUT = (429,)
+
+    def __init__(self, token, user, repo, cache=None, http=None, snapshots=None, archivos_snapshot=(),
+                 metricas=None, api_url="https://api.github.com"):
+        """
+        Args:
+            api_url: Raíz de la API (otra para GitHub Enterprise o el servidor falso de benchmarks/)
+            snapshots: SnapshotsLocales (None = sin snapshot columnar)
+            archivos_snapshot: Archivos JSON que llevan un .parquet al lado
+            metricas: MetricasEscritura (se crea una si no viene)
+        """
+        self.token = token
+        self.user = user
+        self.repo = repo
+        self.headers = {
+            "Authorization": f"token {self.token}",
+        }
+        self.repo_url = f"{api_url.rstrip('/')}/repos/{self.user}/{self.repo}"
+        self.base_url = f"{self.repo_url}/contents"
+        self.cache = cache
+        self.http = http or obtener_sesion("github")
+        self.snapshots = snapshots if snapshot_columnar.disponible() else None
+        self.archivos_snapshot = set(archivos_snapshot)
+        self._snapshots_viejos = {}  # archivo -> (sha .parquet, sha JSON) que no coincidieron
+        self._rama = None
+        self.metricas = metricas or MetricasEscritura()
+
+    def _get_condicional(self, archivo, url=None):
+        """
+        GET con revalidación por ETag.
+
+        Returns:
+            tuple: (entrada_cache, resp). Si resp es None, la entrada sirve tal cual
+        """
+        url = url or f"{self.base_url}/{archivo}"
+        entrada = self.cache.obtener(url) if self.cache else None
+        if self.cache and self.cache.vigente(entrada):
+            return entrada, None
+
+        headers = dict(self.headers)
+        if entrada and entrada.etag:
+            headers["If-None-Match"] = entrada.etag
+        resp = self.http.get(url, headers=headers, timeout=(5, 15))
+        if resp.status_code == 304 and entrada:
+            self.cache.tocar(url)
+            return entrada, None
+        return entrada, resp
+
+    def leer(self, archivo):
+        try:
+            entrada, resp = self._get_condicional(archivo)
+            if resp is None:
+                return self.cache.copia(entrada.datos), entrada.sha
+            if resp.status_code == 200:
+                d = resp.json()
+                if entrada and entrada.sha == d['sha']:
+                    datos = entrada.datos  # mismo blob: no se vuelve a parsear
+                elif d.get('encoding') == 'none' or (not d.get('content') and d.get('size')):
+                    # > 1 MB: la Contents API no trae el contenido, se baja crudo
+                    datos = self._leer_crudo(archivo)
+                else:
+                    # Base64 -> bytes -> registros por trozos (sin el texto completo en memoria)
+                    datos = historico_stream.cargar_json(historico_stream.trozos_base64(d['content']))
+                if self.cache:
+                    self.cache.guardar(f"{self.base_url}/{archivo}", resp.headers.get("ETag"), d['sha'], datos)
+                    return self.cache.copia(datos), d['sha']
+                return datos, d['sha']
+            elif resp.status_code == 404:
+                if self.cache:
+                    self.cache.invalidar(f"{self.base_url}/{archivo}")
+                return [], None
+            return None, None
+        except:
+            return None, None
+
+    def _get_crudo(self, archivo):
+        """GET del archivo como bytes crudos (streaming); el llamador cierra la respuesta"""
+        headers = dict(self.headers)
+        headers["Accept"] = "application/vnd.github.raw"
+        resp = self.http.get(f"{self.base_url}/{archivo}", headers=headers, timeout=(5, 60), stream=True)
+        resp.raise_for_status()
+        return resp
+
+    def _leer_crudo(self, archivo):
+        """Descarga el archivo como bytes crudos en streaming y lo parsea por trozos"""
+        resp = self._get_crudo(archivo)
+        try:
+            return historico_stream.cargar_json(resp.iter_content(historico_stream.TAM_TROZO))
+        finally:
+            resp.close()
+
+    # --- sha de los blobs sin bajar su contenido ---
+
+    def _url_arbol(self):
+        return f"{self.repo_url}/git/trees/{self.REF_ARBOL}?recursive=1"
+
+    def arbol(self):
+        """
+        Árbol completo del repo en un solo GET (revalidado con ETag como los contenidos).
+
+        Returns:
+            dict: ruta -> sha de cada blob (no modificar); None si hubo error
+        """
+        url = self._url_arbol()
+        try:
+            entrada, resp = self._get_condicional(None, url=url)
+            if resp is None:
+                return entrada.datos
+            if resp.status_code != 200:
+                return None
+            shas = {x["path"]: x["sha"] for x in resp.json().get("tree", []) if x.get("type") == "blob"}
+        except Exception:
+            return None
+        if self.cache:
+            self.cache.guardar(url, resp.headers.get("ETag"), None, shas)
+        return shas
+
+    def sha_de(self, archivo):
+        """
+        sha vigente del blob: el de la última lectura/escritura propia si sigue en
+        TTL, si no el del árbol cacheado. Sin árbol (error) se cae a leer el archivo.
+
+        Returns:
+            str o None si el archivo no existe
+        """
+        if self.cache:
+            entrada = self.cache.obtener(f"{self.base_url}/{archivo}")
+            if self.cache.vigente(entrada) and entrada.sha:
+                return entrada.sha
+        shas = self.arbol()
+        if shas is None:
+            _, sha = self.leer(archivo)
+            return sha
+        return shas.get(archivo)
+
+    # --- commits de varios archivos (Git Data API) ---
+
+    def rama(self):
+        """Rama por defecto del repo (se consulta una vez por proceso)"""
+        if self._rama is None:
+            try:
+                resp = self.http.get(self.repo_url, headers=self.headers, timeout=(5, 15))
+                if resp.status_code == 200:
+                    self._rama = resp.json().get("default_branch") or "main"
+            except Exception:
+                pass
+        return self._rama or "main"
+
+    def lote(self, mensaje="LAIA Update", local=None, buzon=None):
+        """Cambios a varios archivos publicados como un solo commit (ver LoteGit)"""
+        return LoteGit(self, mensaje, local=local, buzon=buzon)
+
+    # --- snapshot columnar (historico.parquet al lado de historico.json) ---
+
+    def lleva_snapshot(self, archivo):
+        return self.snapshots is not None and archivo in self.archivos_snapshot
+
+    def leer_columnas(self, archivo, columnas=None):
+        """
+        Proyección desde el snapshot Parquet si está al día con el JSON; si no
+        (p. ej. el robot reescribió el JSON), se arma desde el JSON y se guarda
+        como snapshot local para las próximas lecturas.
+        """
+        if not self.lleva_snapshot(archivo):
+            return super().leer_columnas(archivo, columnas)
+
+        sha = self.sha_de(archivo)
+        ruta = self.snapshots.vigente(archivo, sha) or self._bajar_snapshot(archivo, sha)
+        if ruta is None:
+            datos, sha = self.leer(archivo)
+            if datos is None:
+                return None
+            if not isinstance(datos, list):
+                datos = []
+            ruta = self.snapshots.guardar(archivo, snapshot_columnar.generar(datos, sha))
+            if ruta is None:
+                return snapshot_columnar.proyectar(datos, columnas)
+        try:
+            return snapshot_columnar.leer(ruta, columnas)
+        except Exception as e:
+            print(f"Snapshot ilegible ({e}), se usa el JSON")
+            return super().leer_columnas(archivo, columnas)
+
+    def _bajar_snapshot(self, archivo, sha_json):
+        """Baja el .parquet del repo si fue generado desde el JSON vigente"""
+        if not sha_json:
+            return None
+        nombre = snapshot_columnar.nombre_snapshot(archivo)
+        sha_parquet = self.sha_de(nombre)
+        if not sha_parquet or self._snapshots_viejos.get(archivo) == (sha_parquet, sha_json):
+            return None
+        try:
+            resp = self._get_crudo(nombre)
+            try:
+                contenido = resp.content
+            finally:
+                resp.close()
+        except Exception:
+            return None
+        if snapshot_columnar.fuente(io.BytesIO(contenido)) != sha_json:
+            self._snapshots_viejos[archivo] = (sha_parquet, sha_json)  # no volver a bajarlo
+            return None
+        return self.snapshots.guardar(archivo, contenido)
+
+    def _recordar_escritura(self, archivo, datos, resp):
+        """Tras escribir: la cache queda con lo que acabamos de subir (sin ETag => revalida)"""
+        if not self.cache:
+            return
+        url = f"{self.base_url}/{archivo}"
+        try:
+            sha = resp.json()["content"]["sha"]
+            self.cache.guardar(url, None, sha, datos)
+        except Exception:
+            self.cache.invalidar(url)
+
+    def escribir(self, archivo, datos, mensaje="LAIA Update"):
+        """Sobrescribe sin bajar el archivo: el sha sale de sha_de()"""
+        if self.lleva_snapshot(archivo):
+            return self.lote(mensaje).escribir(archivo, datos).publicar()
+        t0 = time.time()
+        intentos, conflictos = 1, 0
+        codigo = self._put(archivo, datos, self.sha_de(archivo), mensaje)
+        if codigo in (409, 422):
+            # Árbol desactualizado (escribió el robot): sha fresco y un reintento
+            self.refrescar_arbol()
+            intentos, conflictos = 2, 1
+            codigo = self._put(archivo, datos, self.sha_de(archivo), mensaje)
+        ok = codigo in (200, 201)
+        self.metricas.registrar(archivo, ok, intentos, conflictos + (codigo in (409, 422)), time.time() - t0)
+        return ok
+
+    def agregar(self, archivo, datos_nuevos, mensaje="Actualización LAIA"):
+        """
+        APPEND con control optimista: si otro escritor cambió el archivo entre la
+        lectura y el PUT (409/422 por sha), se relee, se vuelve a aplicar el append
+        sobre la versión nueva y se reintenta, hasta MAX_INTENTOS. Nunca se
+        sobrescribe a ciegas: sin lectura válida no hay PUT.
+        """
+        if self.lleva_snapshot(archivo):
+            return self.lote(mensaje).agregar(archivo, datos_nuevos).publicar()
+
+        nuevos = datos_nuevos if isinstance(datos_nuevos, list) else [datos_nuevos]
+        t0 = time.time()
+        intentos = conflictos = 0
+        while intentos < self.MAX_INTENTOS:
+            contenido_actual, sha = self.leer(archivo)  # tras un fallo la cache ya está invalidada
+            if contenido_actual is None:
+                break
+            if not isinstance(contenido_actual, list):
+                contenido_actual = []
+            intentos += 1
+            codigo = self._put(archivo, contenido_actual + nuevos, sha, mensaje)
+            if (codigo is None or codigo >= 500) and self._ya_escrito(archivo, nuevos):
+                codigo = 200  # sin respuesta o 5xx, pero el PUT entró: no se reaplica
+            if codigo in (200, 201):
+                self.metricas.registrar(archivo, True, intentos, conflictos, time.time() - t0)
+                return True
+            if codigo not in (409, 422):
+                break
+            conflictos += 1
+            time.sleep(self._espera_conflicto(intentos))
+
+        print(f"APPEND a {archivo} no se pudo completar ({intentos} intentos, {conflictos} conflictos)")
+        self.metricas.registrar(archivo, False, intentos, conflictos, time.time() - t0)
+        return False
+
+    def _ya_escrito(self, archivo, nuevos):
+        """
+        Tras un PUT sin respuesta (timeout/corte) o con 5xx: relee el archivo y
+        mira si ya termina con los registros de este append.
+        """
+        if self.cache:
+            self.cache.invalidar(f"{self.base_url}/{archivo}")
+        actual, _ = self.leer(archivo)
+        return isinstance(actual, list) and len(actual) >= len(nuevos) and actual[len(actual) - len(nuevos):] == nuevos
+
+    @staticmethod
+    def _espera_conflicto(intento):
+        """Backoff con jitter: dos operadores que chocaron no vuelven a chocar al mismo tiempo"""
+        return random.uniform(0, min(2.0, 0.2 * 2 ** intento))
+
+    def escribir_con_sha(self, archivo, datos, sha, mensaje="LAIA Update"):
+        """
+        Escritura condicional: GitHub la rechaza si el sha ya no es el vigente.
+        Con snapshot, JSON y .parquet van juntos en un solo commit (LoteGit).
+        """
+        if self.lleva_snapshot(archivo):
+            return self.lote(mensaje).escribir(archivo, datos, si_sha=sha).publicar()
+        t0 = time.time()
+        codigo = self._put(archivo, datos, sha, mensaje)
+        ok = codigo in (200, 201)
+        self.metricas.registrar(archivo, ok, 1, int(codigo in (409, 422)), time.time() - t0)
+        return ok
+
+    def _put(self, archivo, datos, sha, mensaje):
+        """Returns: código HTTP del PUT (None si no hubo respuesta)"""
+        payload = {
+            "message": mensaje,
+            "content": base64.b64encode(json.dumps(datos, indent=4).encode()).decode(),
+            "sha": sha if sha else None
+        }
+        try:
+            resp = self.http.put(
+                f"{self.base_url}/{archivo}", headers=self.headers, json=payload,
+                timeout=(5, 30), reintentar_en=self.REINTENTAR_PUT,
+            )
+        except Exception:
+            return None
+        if resp.status_code in [200, 201]:
+            self._recordar_escritura(archivo, datos, resp)
+            self._invalidar_carpeta(archivo)
+        elif self.cache:
+            self.cache.invalidar(f"{self.base_url}/{archivo}")
+        return resp.status_code
+
+    # --- primitivas para archivos segmentados (buzón append-only) ---
+
+    def listar(self, carpeta):
+        """
+        Returns:
+            list: [{"name", "path", "sha"}] de la carpeta; [] si no existe, None si hubo error
+        """
+        url = f"{self.base_url}/{carpeta}"
+        try:
+            entrada, resp = self._get_condicional(carpeta)
+            if resp is None:
+                return self.cache.copia(entrada.datos)
+            if resp.status_code == 200:
+                archivos = [
+                    {"name": x["name"], "path": x["path"], "sha": x["sha"]}
+                    for x in resp.json() if x.get("type") == "file"
+                ]
+                if self.cache:
+                    self.cache.guardar(url, resp.headers.get("ETag"), None, archivos)
+                    return self.cache.copia(archivos)
+                return archivos
+            if resp.status_code == 404:
+                if self.cache:
+                    self.cache.invalidar(url)
+                return []
+            return None
+        except:
+            return None
+
+    def crear(self, archivo, datos, mensaje="LAIA Update"):
+        """
+        Crea un archivo nuevo sin sobrescribir nada.
+
+        Returns:
+            str: "creado", "existe" (otro escritor ganó ese nombre) o "error"
+        """
+        payload = {
+            "message": mensaje,
+            "content": base64.b64encode(json.dumps(datos, ensure_ascii=False).encode()).decode(),
+        }
+        try:
+            # 409/422 aquí significa "ya existe": reintentar el mismo nombre no sirve
+            resp = self.http.put(
+                f"{self.base_url}/{archivo}", headers=self.headers, json=payload,
+                timeout=(5, 30), reintentar_en=self.REINTENTAR_PUT,
+            )
+        except:
+            resp = None
+        self._invalidar_carpeta(archivo)
+        if resp is not None and resp.status_code in [200, 201]:
+            self._recordar_escritura(archivo, datos, resp)
+            return "creado"
+        if resp is not None and resp.status_code in [409, 422]:
+            return "existe"
+        if resp is None or resp.status_code >= 500:
+            # Sin respuesta o 5xx: si el segmento ya está con este contenido, el PUT entró
+            existente, _ = self.leer(archivo)
+            if existente is not None and existente == datos:
+                return "creado"
+        return "error"
+
+    def borrar(self, archivo, sha, mensaje="LAIA Delete"):
+        payload = {"message": mensaje, "sha": sha}
+        try:
+            resp = self.http.delete(f"{self.base_url}/{archivo}", headers=self.headers, json=payload, timeout=(5, 30))
+        except:
+            return False
+        if self.cache:
+            self.cache.invalidar(f"{self.base_url}/{archivo}")
+        self._invalidar_carpeta(archivo)
+        return resp.status_code in [200, 404]
+
+    def _invalidar_carpeta(self, archivo):
+        if self.cache:
+            carpeta = archivo.rsplit('/', 1)[0] if "/" in archivo else ""
+            self.cache.invalidar(f"{self.base_url}/{carpeta}")
+            self.refrescar_arbol()
+
+    def refrescar_arbol(self):
+        """El árbol cambió (commit propio o ajeno): revalidar en la próxima consulta"""
+        if self.cache:
+            self.cache.expirar(self._url_arbol())
+
+    def refrescar(self, archivo=None):
+        """Marca la cache como vencida: la próxima lectura revalida (304 si no cambió)"""
+        if self.cache:
+            self.cache.expirar(f"{self.base_url}/{archivo}" if archivo else None)
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Motor local SQLite (modo WAL).
+
+    historico, buzon, lecciones y pedido viven en tablas propias con índices por
+    `serie` y `guia`; el registro completo se guarda como JSON en la columna `datos`.
+    La tabla `documentos` lleva la forma (lista/dict), la versión local y el sha
+    remoto con el que se sincronizó por última vez.
+    """
+
+    nombre = "sqlite"
+
+    TABLAS = {
+        "historico.json": "historico",
+        "buzon.json": "buzon",
+        "lecciones.json": "lecciones",
+        "pedido.json": "pedido",
+    }
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        carpeta = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(carpeta, exist_ok=True)
+        self._crear_esquema()
+
+    # --- conexión por hilo (Streamlit atiende sesiones en hilos distintos) ---
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _crear_esquema(self):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documentos ("
+                " archivo TEXT PRIMARY KEY,"
+                " forma TEXT NOT NULL,"
+                " version INTEGER NOT NULL DEFAULT 0,"
+                " sha_remoto TEXT,"
+                " sincronizado REAL)"
+            )
+            for tabla in self.TABLAS.values():
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {tabla} ("
+                    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                    " serie TEXT,"
+                    " guia TEXT,"
+                    " datos TEXT NOT NULL)"
+                )
+                conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{tabla}_serie ON {tabla}(serie)")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{tabla}_guia ON {tabla}(guia)")
+
+    @staticmethod
+    def _clave(valor):
+        v = str(valor or "").strip().lower()
+        return v or None
+
+    def _filas(self, registros):
+        for r in registros:
+            serie = guia = None
+            if isinstance(r, dict):
+                serie = self._clave(r.get("serie"))
+                guia = self._clave(r.get("guia"))
+            yield serie, guia, json.dumps(r, ensure_ascii=False)
+
+    def soporta(self, archivo):
+        return archivo in self.TABLAS
+
+    # --- StorageBackend ---
+
+    def leer(self, archivo):
+        tabla = self.TABLAS.get(archivo)
+        if not tabla:
+            return None, None
+        try:
+            conn = self._conn()
+            doc = conn.execute(
+                "SELECT forma, version FROM documentos WHERE archivo = ?", (archivo,)
+            ).fetchone()
+            if doc is None:
+                return [], None
+            forma, version = doc
+            datos = [json.loads(d) for (d,) in conn.execute(f"SELECT datos FROM {tabla} ORDER BY id")]
+            if forma == "dict":
+                return (datos[0] if datos else {}), str(version)
+            return datos, str(version)
+        except sqlite3.Error as e:
+            print(f"Error SQLite leyendo {archivo}: {e}")
+            return None, None
+
+    def escribir(self, archivo, datos, mensaje="LAIA Update", sha_remoto=None):
+        tabla = self.TABLAS.get(archivo)
+        if not tabla:
+            return False
+        forma = "dict" if isinstance(datos, dict) else "list"
+        registros = [datos] if forma == "dict" else list(datos or [])
+        try:
+            with self._lock:
+                conn = self._conn()
+                with conn:
+                    conn.execute(f"DELETE FROM {tabla}")
+                    conn.executemany(
+                        f"INSERT INTO {tabla} (serie, guia, datos) VALUES (?, ?, ?)",
+                        self._filas(registros),
+                    )
+                    self._tocar(conn, archivo, forma, sha_remoto)
+            return True
+        except sqlite3.Error as e:
+            print(f"Error SQLite escribiendo {archivo}: {e}")
+            return False
+
+    def agregar(self, archivo, datos_nuevos, mensaje="Actualización LAIA"):
+        """APPEND real: solo inserta las filas nuevas (O(lote), no O(historial))"""
+        tabla = self.TABLAS.get(archivo)
+        if not tabla:
+            return False
+        registros = datos_nuevos if isinstance(datos_nuevos, list) else [datos_nuevos]
+        try:
+            with self._lock:
+                conn = self._conn()
+                with conn:
+                    doc = conn.execute(
+                        "SELECT forma FROM documentos WHERE archivo = ?", (archivo,)
+                    ).fetchone()
+                    if doc and doc[0] == "dict":
+                        # Igual que en GitHub: un dict no se puede extender => se reemplaza por lista
+                        conn.execute(f"DELETE FROM {tabla}")
+                    conn.executemany(
+                        f"INSERT INTO {tabla} (serie, guia, datos) VALUES (?, ?, ?)",
+                        self._filas(registros),
+                    )
+                    self._tocar(conn, archivo, "list", None, conservar_sha=True)
+            return True
+        except sqlite3.Error as e:
+            print(f"Error SQLite agregando a {archivo}: {e}")
+            return False
+
+    def buscar(self, archivo, campo, valor):
+        tabla = self.TABLAS.get(archivo)
+        if not tabla or campo not in ("serie", "guia"):
+            return super().buscar(archivo, campo, valor)
+        clave = self._clave(valor)
+        if clave is None:
+            return []
+        filas = self._conn().execute(
+            f"SELECT datos FROM {tabla} WHERE {campo} = ? ORDER BY id", (clave,)
+        )
+        return [json.loads(d) for (d,) in filas]
+
+    # --- sincronización con la réplica ---
+
+    def _tocar(self, conn, archivo, forma, sha_remoto, conservar_sha=False):
+        conn.execute(
+            "INSERT INTO documentos (archivo, forma, version, sha_remoto, sincronizado)"
+            " VALUES (?, ?, 1, ?, ?)"
+            " ON CONFLICT(archivo) DO UPDATE SET"
+            "  forma = excluded.forma,"
+            "  version = documentos.version + 1,"
+            "  sha_remoto = CASE WHEN ? THEN documentos.sha_remoto ELSE excluded.sha_remoto END,"
+            "  sincronizado = CASE WHEN ? THEN documentos.sincronizado ELSE excluded.sincronizado END",
+            (archivo, forma, sha_remoto, time.time() if sha_remoto else None,
+             int(conservar_sha), int(conservar_sha)),
+        )
+
+    def estado_sincronizacion(self, archivo):
+        """
+        Returns:
+            tuple: (sha_remoto, timestamp_ultima_sincronizacion) o (None, None)
+        """
+        fila = self._conn().execute(
+            "SELECT sha_remoto, sincronizado FROM documentos WHERE archivo = ?", (archivo,)
+        ).fetchone()
+        return (fila[0], fila[1]) if fila else (None, None)
+
+    def marcar_sincronizado(self, archivo, sha_remoto):
+        """Registra que el documento local coincide con el sha remoto"""
+        with self._lock:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "UPDATE documentos SET sha_remoto = ?, sincronizado = ? WHERE archivo = ?",
+                    (sha_remoto, time.time(), archivo),
+                )
+
+    def marcar_desactualizado(self, archivo=None):
+        """La próxima lectura vuelve a consultar la réplica aunque no haya vencido el intervalo"""
+        with self._lock:
+            conn = self._conn()
+            with conn:
+                if archivo:
+                    conn.execute("UPDATE documentos SET sincronizado = NULL WHERE archivo = ?", (archivo,))
+                else:
+                    conn.execute("UPDATE documentos SET sincronizado = NULL")
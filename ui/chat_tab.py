@@ -2,11 +2,15 @@ import streamlit as st
 import html
 import json
 import pandas as pd
-import re
 from datetime import datetime, timezone, timedelta
 
 from modules.ai_engine import AIEngine
+from modules.extractor_local import ExtractorLocal
 from modules.github_handler import GitHubHandler
+from modules.indice_lecciones import IndiceLecciones
+from modules import cpu_generacion
+from modules.stock_ledger import StockLedger
+from config.settings import Config
 
 
 class ChatTab:
@@ -26,12 +30,20 @@ class ChatTab:
     ✅ No manda JSON del asistente como historial al modelo
     """
 
-    def __init__(self):
-        self.ai_engine = AIEngine()
-        self.github = GitHubHandler()
+    def __init__(self, ai_engine=None, github=None, ledger=None):
+        # Clientes compartidos por proceso (ver modules/recursos.py); se crean si no vienen
+        self.ai_engine = ai_engine or AIEngine()
+        self.github = github or GitHubHandler()
+        self.ledger = ledger or StockLedger(Config.LEDGER_PATH)
+        # Mensajes rutinarios se arman por reglas, sin llamar al modelo
+        self.extractor = ExtractorLocal(umbral=Config.EXTRACTOR_UMBRAL)
+        # Al prompt van solo las lecciones que tienen que ver con el mensaje
+        self.lecciones = IndiceLecciones()
 
         self.LOGO_URL = "https://raw.githubusercontent.com/Soporte1jaher/inventario-jaher/main/assets/logo_jaher.png"
 
+    def _init_state(self):
+        """Estado por sesión: la instancia de la pestaña se comparte entre sesiones"""
         st.session_state.setdefault("messages", [])
         st.session_state.setdefault("draft", [])
         st.session_state.setdefault("status", "NEW")
@@ -223,97 +235,17 @@ class ChatTab:
         return any(v in t for v in verbs) and any(s in t for s in stuff)
 
     # ---------------------------
-    # JSON extraction robusto
+    # JSON de la respuesta
     # ---------------------------
     def _extract_json(self, resultado):
-        """
-        Soporta:
-          - dict con 'json_response'
-          - dict con 'response' / 'content' que trae JSON string
-          - string JSON puro
-        """
-        if resultado is None:
-            return None
-
-        if isinstance(resultado, dict):
-            if isinstance(resultado.get("json_response"), dict):
-                return resultado.get("json_response")
-            if isinstance(resultado.get("json_response"), str):
-                return self._try_parse_json(resultado.get("json_response"))
-
-            for k in ["response", "content", "message", "raw"]:
-                v = resultado.get(k)
-                if isinstance(v, dict):
-                    if "items" in v and "status" in v:
-                        return v
-                if isinstance(v, str):
-                    parsed = self._try_parse_json(v)
-                    if parsed and isinstance(parsed, dict) and "items" in parsed and "status" in parsed:
-                        return parsed
-            return None
-
-        if isinstance(resultado, str):
-            return self._try_parse_json(resultado)
-
-        return None
-
-    def _try_parse_json(self, s: str):
-        if not s:
-            return None
-        try:
-            return json.loads(s)
-        except Exception:
-            try:
-                m = re.search(r"\{.*\}", s, flags=re.DOTALL)
-                if m:
-                    return json.loads(m.group(0))
-            except Exception:
-                return None
+        """json_response ya validado contra el esquema por el motor (modules/esquema_respuesta.py)"""
+        if isinstance(resultado, dict) and isinstance(resultado.get("json_response"), dict):
+            return resultado["json_response"]
         return None
 
     # ---------------------------
     # Cinturón chatarrización
     # ---------------------------
-    def _infer_intel_gen(self, proc: str):
-        if not proc:
-            return None
-        p = str(proc).lower().strip()
-
-        m = re.search(r"(\d{1,2})\s*(?:th)?\s*gen", p)
-        if m:
-            try:
-                return int(m.group(1))
-            except Exception:
-                pass
-
-        if any(x in p for x in ["octava", "8va", "8a", "8ª"]):
-            return 8
-        if any(x in p for x in ["novena", "9na", "9a", "9ª"]):
-            return 9
-        if any(x in p for x in ["decima", "décima", "10ma", "10a", "10ª"]):
-            return 10
-        if any(x in p for x in ["11ma", "11a", "11ª"]) or "11th" in p:
-            return 11
-        if any(x in p for x in ["12ma", "12a", "12ª"]) or "12th" in p:
-            return 12
-        if any(x in p for x in ["13ma", "13a", "13ª"]) or "13th" in p:
-            return 13
-        if any(x in p for x in ["14ma", "14a", "14ª"]) or "14th" in p:
-            return 14
-
-        m2 = re.search(r"i[3579]\s*[- ]?\s*(\d{4,5})", p)
-        if m2:
-            code = m2.group(1)
-            try:
-                if len(code) == 4:
-                    return int(code[0])
-                if len(code) == 5:
-                    return int(code[:2])
-            except Exception:
-                return None
-
-        return None
-
     def _enforce_chatarrizacion_rule(self, items: list, user_text: str) -> list:
         if not items:
             return items
@@ -330,9 +262,8 @@ class ChatTab:
                 k in equipo for k in ["laptop", "cpu", "servidor", "aio", "all-in-one", "tablet"]
             )
 
-            gen = self._infer_intel_gen(str(x.get("procesador", "") or ""))
-
-            if es_computo and gen is not None and gen <= 9:
+            # Intel <= 9na / Ryzen <= 2000 (ver modules/cpu_generacion.py)
+            if es_computo and cpu_generacion.es_obsoleto(x.get("procesador")):
                 x["estado"] = "Obsoleto / Pendiente Chatarrización"
                 x["destino"] = "CHATARRA / BAJA"
 
@@ -380,6 +311,11 @@ class ChatTab:
     # Render
     # ---------------------------
     def render(self):
+        # Las lecciones se bajan mientras se dibuja el chat y el usuario escribe:
+        # al procesar el mensaje ya están en cache y el modelo arranca enseguida
+        self.github.precargar(Config.FILE_LECCIONES)
+
+        self._init_state()
         self._inject_style()
         self._render_logo()
 
@@ -430,6 +366,16 @@ class ChatTab:
             last = st.session_state.get("last_json", {}) or {}
             with st.expander("🧾 JSON (debug)", expanded=False):
                 st.code(json.dumps(last, ensure_ascii=False, indent=2), language="json")
+                st.caption("Cache de respuestas IA")
+                st.json(self.ai_engine.estadisticas_cache())
+                st.caption("Salida del modelo")
+                st.json(self.ai_engine.estadisticas_salida())
+                st.caption("Último prompt")
+                st.json(self.ai_engine.estadisticas_prompt())
+                st.caption("Extractor local (sin IA)")
+                st.json(self.extractor.estadisticas())
+                st.caption("Índice de lecciones")
+                st.json(self.lecciones.estadisticas())
 
         # ✅ Mostrar borrador SIEMPRE que exista draft (aunque status=QUESTION)
         if st.session_state.get("draft"):
@@ -485,14 +431,7 @@ class ChatTab:
 
         try:
             with st.spinner("🧠 LAIA auditando..."):
-                lecciones = self.github.obtener_lecciones()
-
-                resultado = self.ai_engine.procesar_input(
-                    user_input=prompt,
-                    lecciones=lecciones,
-                    borrador_actual=st.session_state.get("draft"),
-                    historial_mensajes=self._filter_history_for_ai(st.session_state.get("messages", [])),
-                )
+                resultado = self._consultar_motor(prompt)
 
                 res_json = self._extract_json(resultado)
 
@@ -543,6 +482,39 @@ class ChatTab:
             }
             self._reply(res_json)
 
+    def _consultar_motor(self, prompt: str) -> dict:
+        """Llama al motor; con streaming muestra el texto y la tabla a medida que llegan"""
+        if Config.EXTRACTOR_LOCAL:
+            local = self.extractor.extraer(prompt, st.session_state.get("draft"))
+            if local is not None:
+                return local
+
+        self.lecciones.sincronizar(self.github.obtener_lecciones())  # precargadas en render()
+        consulta = dict(
+            user_input=prompt,
+            lecciones=self.lecciones.relevantes(prompt, Config.LECCIONES_TOP_K),
+            borrador_actual=st.session_state.get("draft"),
+            historial_mensajes=self._filter_history_for_ai(st.session_state.get("messages", [])),
+        )
+        if not Config.LLM_STREAMING:
+            return self.ai_engine.procesar_input(**consulta)
+
+        with st.chat_message("user"):
+            self._render_user_text_preserving_lines(prompt)
+
+        resultado = {}
+        with st.chat_message("assistant"):
+            ph_texto = st.empty()
+            ph_tabla = st.empty()
+            for tipo, valor in self.ai_engine.procesar_input_stream(**consulta):
+                if tipo == "texto":
+                    ph_texto.markdown(f"{valor} ▌")
+                elif tipo == "items" and valor:
+                    ph_tabla.dataframe(pd.DataFrame(valor), use_container_width=True, hide_index=True)
+                elif tipo == "fin":
+                    resultado = valor
+        return resultado
+
     def _set_draft(self, items):
         st.session_state["draft"] = items
 
@@ -584,6 +556,8 @@ class ChatTab:
 
         ok = self.github.enviar_a_buzon(payload)
         if ok:
+            # El stock los cuenta ya (provisional) hasta que el robot los pase al histórico
+            self.ledger.registrar_envio(payload)
             st.success("✅ Enviado al Robot de la PC", icon="✅")
 
             # ✅ LIMPIEZA TOTAL (chat + borrador + estado)
@@ -600,7 +574,9 @@ class ChatTab:
 
             st.rerun()
         else:
-            st.error("❌ No se pudo enviar al buzón. Revisa token/permiso/red.")
+            st.error(self.github.explicar_fallo(
+                Config.FILE_BUZON, "❌ No se pudo enviar al buzón. Revisa token/permiso/red."
+            ))
 
     # ---------------------------
     # Tabla borrador
@@ -5,6 +5,12 @@ from datetime import datetime
 
 from modules.ai_engine import AIEngine
 from modules.github_handler import GitHubHandler
+from modules.stock_ledger import StockLedger
+from modules.indice_historico import IndiceHistorico
+from modules.paginacion import VistaPaginada
+from modules.refresco_historico import RefrescoHistorico
+from config.settings import Config
+from ui.paginador import controles_paginacion, tamano_pagina
 
 
 class CleaningTab:
@@ -22,13 +28,22 @@ class CleaningTab:
       - envío de orden al robot via github.enviar_orden_limpieza()
     """
 
-    def __init__(self):
-        self.ai_engine = AIEngine()
-        self.github = GitHubHandler()
+    CAMPOS_TEXTO = ("serie", "marca", "equipo", "modelo", "origen", "destino", "guia", "reporte", "tipo", "estado")
 
-        # state
-        st.session_state.setdefault("cln_df", pd.DataFrame())
-        st.session_state.setdefault("cln_view", pd.DataFrame())
+    def __init__(self, ai_engine=None, github=None, ledger=None, indice=None, refresco=None):
+        self.ai_engine = ai_engine or AIEngine()
+        self.github = github or GitHubHandler()
+        self.ledger = ledger or StockLedger(Config.LEDGER_PATH)
+        self.indice = indice or IndiceHistorico()
+        self.refresco = refresco or RefrescoHistorico(
+            self.github, Config.FILE_HISTORICO, Config.REFRESCO_HISTORICO_SEG,
+            al_publicar=(self.indice.sincronizar,),
+        )
+
+    def _init_state(self):
+        """Estado por sesión: la instancia de la pestaña se comparte entre sesiones"""
+        st.session_state.setdefault("cln_resultados", None)  # posiciones (None = todo el historial)
+        st.session_state.setdefault("cln_cache", {})
         st.session_state.setdefault("cln_selected_idx", set())
         st.session_state.setdefault("cln_query", "")
         st.session_state.setdefault("cln_last_order", None)
@@ -39,6 +54,7 @@ class CleaningTab:
     # UI
     # =========================
     def render(self):
+        self._init_state()
         self._inject_css()
 
         # Header tipo Stock Real
@@ -49,6 +65,7 @@ class CleaningTab:
                 st.caption("Busca registros, selecciona y elimina (pensado para usuario final).")
             with c2:
                 if st.button("🔄 Refrescar", use_container_width=True, type="primary", key="cln_refresh_btn"):
+                    self.refresco.forzar()
                     # reset suave visual
                     st.session_state["cln_last_order"] = None
                     st.session_state["cln_editor_key"] = str(datetime.now().timestamp())
@@ -66,33 +83,30 @@ class CleaningTab:
                 with b1:
                     if st.button("🔄 Refrescar ahora", use_container_width=True, key="cln_ref_now"):
                         st.session_state["cln_last_order"] = None
+                        self.refresco.forzar()
                         st.rerun()
                 with b2:
                     if st.button("Ocultar mensaje", use_container_width=True, key="cln_hide_msg"):
                         st.session_state["cln_last_order"] = None
                         st.rerun()
 
-        # Cargar histórico desde GitHub
-        hist = self.github.obtener_historico()
-        if hist is None:
+        # Último snapshot del histórico (lo mantiene el hilo de refresco, sin esperar red)
+        snap = self.refresco.actual()
+        if snap is None:
             st.error("❌ No pude leer el historial. Revisa conexión/token.")
             return
+        hist = snap.registros
         if len(hist) == 0:
             st.info("📭 El historial está vacío.")
             return
 
-        df_all = self._normalize(self._safe_hist_to_df(hist))
-        st.session_state["cln_df"] = df_all
-
-        # Vista por defecto (si no existe)
-        if st.session_state.get("cln_view") is None or st.session_state.get("cln_view", pd.DataFrame()).empty:
-            st.session_state["cln_view"] = df_all
-
-        df_view = st.session_state["cln_view"].copy()
+        # Solo se indexa; los DataFrames se arman por página (ver _vista)
+        self.indice.sincronizar(hist)
+        posiciones = self._resultados()
 
         # Métricas TOP (siempre visibles)
-        total = int(len(df_all))
-        results = int(len(df_view)) if isinstance(df_view, pd.DataFrame) else 0
+        total = int(len(self.indice.posiciones))
+        results = int(len(posiciones))
         selected = int(len(st.session_state.get("cln_selected_idx", set())))
 
         with st.container(border=True):
@@ -124,26 +138,28 @@ class CleaningTab:
                 c1, c2, c3 = st.columns([1.2, 1.2, 1.6], vertical_alignment="center")
                 with c1:
                     if st.button("Buscar", type="primary", use_container_width=True, key="cln_btn_search_v5"):
-                        view = self._apply_query(df_all, q)
-                        st.session_state["cln_view"] = view
+                        st.session_state["cln_resultados"] = self._apply_query(q)
                         st.session_state["cln_selected_idx"] = set()
+                        st.session_state["cln_pag"] = 1
                         st.session_state["cln_editor_key"] = str(datetime.now().timestamp())
                         st.success("✅ Listo. Ve a la viñeta **Seleccionar**.")
                 with c2:
                     if st.button("Ver todo", use_container_width=True, key="cln_btn_all_v5"):
-                        st.session_state["cln_view"] = df_all
+                        st.session_state["cln_resultados"] = None
                         st.session_state["cln_selected_idx"] = set()
                         st.session_state["cln_query"] = ""
+                        st.session_state["cln_pag"] = 1
                         st.session_state["cln_editor_key"] = str(datetime.now().timestamp())
                         st.success("✅ Mostrando todo. Ve a **Seleccionar**.")
                 with c3:
                     st.info("Tip: escribe `guia 0310...` o `serie 5CD...` para afinar.", icon="💡")
 
             # Preview pequeño (no tabla gigante)
-            if isinstance(df_view, pd.DataFrame) and not df_view.empty:
+            if len(posiciones):
                 with st.expander("👀 Vista rápida (últimos 12 resultados)", expanded=False):
-                    cols_preview = [c for c in ["fecha_registro", "tipo", "equipo", "marca", "modelo", "serie", "estado", "origen", "destino", "guia"] if c in df_view.columns]
-                    st.dataframe(df_view[cols_preview].head(12), use_container_width=True, hide_index=True)
+                    df_prev = self._vista(hist, posiciones, tamano=12).pagina(1)
+                    cols_preview = [c for c in ["fecha_registro", "tipo", "equipo", "marca", "modelo", "serie", "estado", "origen", "destino", "guia"] if c in df_prev.columns]
+                    st.dataframe(df_prev[cols_preview], use_container_width=True, hide_index=True)
 
         # -------------------------
         # TAB 2: SELECCIONAR
@@ -153,16 +169,23 @@ class CleaningTab:
                 st.markdown("### ✅ Seleccionar registros a eliminar")
                 st.caption("Marca **Eliminar** solo lo que realmente deseas borrar.")
 
-            if df_view is None or df_view.empty:
+            if not len(posiciones):
                 st.warning("No hay resultados para seleccionar. Ve a **Buscar**.")
             else:
+                vista = self._vista(hist, posiciones, tamano=tamano_pagina("cln"))
+                pagina = controles_paginacion(vista, "cln")
+                df_page = vista.pagina(pagina)
+
                 cols_show = [c for c in [
                     "idx", "fecha_registro", "tipo", "equipo", "marca", "modelo", "serie",
                     "estado", "origen", "destino", "guia"
-                ] if c in df_view.columns]
+                ] if c in df_page.columns]
 
-                table = df_view[cols_show].copy()
-                table.insert(0, "Eliminar", False)
+                # La selección vive en session_state (todas las páginas); el editor solo
+                # muestra la página actual con sus checks ya marcados
+                previos = st.session_state.get("cln_selected_idx", set())
+                table = df_page[cols_show].copy()
+                table.insert(0, "Eliminar", table["idx"].astype(int).isin(previos))
 
                 edited = st.data_editor(
                     table,
@@ -170,10 +193,12 @@ class CleaningTab:
                     hide_index=True,
                     num_rows="fixed",
                     height=560,
-                    key=f"cln_editor_v5_{st.session_state['cln_editor_key']}",
+                    key=f"cln_editor_v5_{st.session_state['cln_editor_key']}_{pagina}_{vista.tamano}",
                 )
 
-                selected_idx = set(edited.loc[edited["Eliminar"] == True, "idx"].astype(int).tolist())
+                idx_pagina = set(table["idx"].astype(int).tolist())
+                marcados = set(edited.loc[edited["Eliminar"] == True, "idx"].astype(int).tolist())
+                selected_idx = (previos - idx_pagina) | marcados
                 st.session_state["cln_selected_idx"] = selected_idx
 
                 with st.container(border=True):
@@ -201,15 +226,15 @@ class CleaningTab:
             a1, a2 = st.columns([1.6, 1.6], vertical_alignment="center")
 
             with a1:
-                self._ui_delete_selected(df_all, sel)
+                self._ui_delete_selected(hist, sel)
 
             with a2:
-                self._ui_delete_all(df_all)
+                self._ui_delete_all(hist)
 
     # =========================
     # UI: borrar seleccionados
     # =========================
-    def _ui_delete_selected(self, dfall: pd.DataFrame, selected_idx: set):
+    def _ui_delete_selected(self, hist: list, selected_idx: set):
         disabled = len(selected_idx) == 0
 
         with st.container(border=True):
@@ -222,7 +247,8 @@ class CleaningTab:
                 confirm = st.checkbox("Confirmo eliminar los seleccionados", value=False, key="cln_chk_confirm_selected_v5")
 
                 if st.button("Eliminar ahora", type="primary", use_container_width=True, disabled=(not confirm)):
-                    self._send_delete_order_indices(dfall, sorted(list(selected_idx)), instruction="BORRAR_SELECCIONADOS")
+                    idx_list = sorted(list(selected_idx))
+                    self._send_delete_order_indices(self._materializar(hist, idx_list), idx_list, instruction="BORRAR_SELECCIONADOS")
                     st.rerun()
 
             if disabled:
@@ -231,11 +257,11 @@ class CleaningTab:
     # =========================
     # UI: borrar todo (fuerte)
     # =========================
-    def _ui_delete_all(self, dfall: pd.DataFrame):
+    def _ui_delete_all(self, hist: list):
         with st.container(border=True):
             st.markdown("#### 🔥 Eliminar TODO")
             st.caption("Borra el historial completo (uso restringido).")
-            st.write(f"Total actual: **{len(dfall)}**")
+            st.write(f"Total actual: **{len(self.indice.posiciones)}**")
 
             with st.popover("🔥 Eliminar TODO", use_container_width=True):
                 st.error("Acción irreversible. Solo úsalo si estás seguro.")
@@ -247,19 +273,33 @@ class CleaningTab:
 
                 disabled = text != "BORRAR TODO"
                 if st.button("Eliminar TODO ahora", type="primary", use_container_width=True, disabled=disabled):
-                    self._send_delete_order_all(dfall)  # ✅ borrado real
+                    self._send_delete_order_all(self._normalize(self._safe_hist_to_df(hist)))  # ✅ borrado real
                     st.rerun()
 
     # =========================
     # lógica de búsqueda
     # =========================
-    def _apply_query(self, df: pd.DataFrame, q: str) -> pd.DataFrame:
+    def _apply_query(self, q: str):
+        """
+        Returns:
+            np.ndarray | None: Posiciones que matchean, más recientes primero
+                               (None = sin consulta, se muestra todo)
+        """
         q = (q or "").strip()
         if not q:
-            return df
+            return None
 
         field, value = self._detect_intent(q)
-        return self._search(df, field, value)
+        return self._search(field, value)
+
+    def _resultados(self):
+        """Posiciones de la búsqueda actual (o todo el historial), más recientes primero"""
+        orden = self.indice.orden("fecha_registro", descendente=True)
+        resultados = st.session_state.get("cln_resultados")
+        if resultados is None:
+            return orden
+        # Si el historial cambió (robot), descarta posiciones que ya no existen
+        return self.indice.seleccionar(orden, incluir=resultados)
 
     def _detect_intent(self, q: str):
         ql = q.lower().strip()
@@ -272,45 +312,28 @@ class CleaningTab:
         if m:
             return "guia", m.group(2).strip()
 
-        # si parece un código sin espacios -> serie
+        # si parece un código sin espacios -> serie (o guía si existe tal cual)
         if re.fullmatch(r"[a-z0-9\-_/]{4,}", ql) and " " not in ql:
+            if not self.indice.existe("serie", ql) and self.indice.existe("guia", ql):
+                return "guia", ql
             return "serie", ql
 
         return "texto", ql
 
-    def _search(self, df: pd.DataFrame, field: str, value: str) -> pd.DataFrame:
+    def _search(self, field: str, value: str):
         field = (field or "").strip().lower()
         value = (value or "").strip().lower()
-
-        if df is None or df.empty:
-            return pd.DataFrame()
+        orden = self.indice.orden("fecha_registro", descendente=True)
 
         if not value:
-            return pd.DataFrame()
+            return orden[:0]
 
-        if field in df.columns and field != "texto":
-            s = df[field].astype(str).str.lower().str.strip()
-            if field in ["serie", "guia"]:
-                mask = (s == value) | s.str.contains(re.escape(value), na=False)
-            else:
-                mask = s.str.contains(re.escape(value), na=False)
-            out = df[mask].copy()
-            return out.sort_values("fecha_registro_dt", ascending=False)
+        # Índice invertido (hash + trigramas) en vez de str.contains fila × columna
+        if field in self.indice.CAMPOS and field != "texto":
+            return self.indice.seleccionar(orden, incluir=self.indice.buscar(value, campos=(field,)))
 
         # texto global
-        search_cols = [c for c in ["serie", "marca", "equipo", "modelo", "origen", "destino", "guia", "reporte", "tipo", "estado"] if c in df.columns]
-        if not search_cols:
-            search_cols = df.columns.tolist()
-
-        mask = pd.Series(False, index=df.index)
-        for c in search_cols:
-            try:
-                mask = mask | df[c].astype(str).str.lower().str.contains(re.escape(value), na=False)
-            except Exception:
-                pass
-
-        out = df[mask].copy()
-        return out.sort_values("fecha_registro_dt", ascending=False)
+        return self.indice.seleccionar(orden, incluir=self.indice.buscar(value, campos=self.CAMPOS_TEXTO))
 
     # =========================
     # enviar órdenes al robot
@@ -346,11 +369,15 @@ class CleaningTab:
 
         ok = self.github.enviar_orden_limpieza(orden)
         if ok:
+            # El ledger revierte estos registros cuando vea que el robot los borró
+            self.ledger.registrar_borrado(orden["idx_list"])
             st.session_state["cln_last_order"] = orden
             self._reset_ui(full=False)
             st.success("✅ Orden enviada. Espera al robot y luego presiona Refrescar.")
         else:
-            st.error("❌ No se pudo enviar la orden. Revisa conexión/permiso.")
+            st.error(self.github.explicar_fallo(
+                Config.FILE_BUZON, "❌ No se pudo enviar la orden. Revisa conexión/permiso."
+            ))
             st.json(orden)
 
     def _send_delete_order_all(self, dfall: pd.DataFrame):
@@ -374,23 +401,44 @@ class CleaningTab:
     # =========================
     # Normalización
     # =========================
-    def _safe_hist_to_df(self, hist):
+    def _vista(self, hist, posiciones, tamano):
+        cache = st.session_state["cln_cache"]
+        # cln_editor_key cambia con cada Buscar / Ver todo / Reiniciar
+        firma = (self.indice.version, st.session_state["cln_editor_key"])
+        return VistaPaginada(
+            posiciones,
+            lambda pos: self._materializar(hist, pos),
+            tamano=tamano,
+            cache=cache,
+            firma=firma,
+        )
+
+    def _materializar(self, hist, posiciones):
+        """DataFrame normalizado solo de esas posiciones del histórico"""
+        return self._normalize(self._safe_hist_to_df(hist, posiciones))
+
+    def _safe_hist_to_df(self, hist, posiciones_sel=None):
         filas = []
-        for x in hist:
+        posiciones = []  # índice = posición en historico.json (la usa el índice de búsqueda)
+        candidatas = range(len(hist)) if posiciones_sel is None else posiciones_sel
+        for pos in candidatas:
+            x = hist[pos]
             if isinstance(x, dict):
                 filas.append(x)
+                posiciones.append(pos)
             elif isinstance(x, (list, tuple)):
                 # Si te llega sucio tipo lista, lo ignoramos aquí (limpieza solo para dicts)
                 # (Si quieres mapearlo a schema como StockTab, me dices y lo adapto)
                 pass
-        return pd.DataFrame(filas)
+        return pd.DataFrame(filas, index=posiciones)
 
     def _normalize(self, df: pd.DataFrame):
         df = df.copy()
         df.columns = [str(c).strip().lower() for c in df.columns]
 
         if "idx" not in df.columns:
-            df.insert(0, "idx", range(len(df)))
+            # idx = posición en historico.json (el robot borra por esa posición)
+            df.insert(0, "idx", df.index.astype(int))
 
         for c in ["fecha_registro", "tipo", "equipo", "marca", "modelo", "serie", "estado", "origen", "destino", "guia", "reporte"]:
             if c not in df.columns:
@@ -420,7 +468,7 @@ class CleaningTab:
         st.session_state["cln_editor_key"] = str(datetime.now().timestamp())
         if full:
             st.session_state["cln_query"] = ""
-            st.session_state["cln_view"] = pd.DataFrame()
+            st.session_state["cln_resultados"] = None
 
     # =========================
     # CSS (más pro, menos técnico)
@@ -0,0 +1,209 @@
+import streamlit as st
+import pandas as pd
+import hashlib
+import time
+from datetime import datetime, timezone, timedelta
+
+from modules.github_handler import GitHubHandler
+from modules.stock_calculator import StockCalculator
+from modules.stock_ledger import StockLedger
+from modules import importador
+from config.settings import Config
+from ui.chat_tab import ChatTab
+from ui.stock_tab import StockTab
+
+
+class ImportTab:
+    """
+    📥 Importación masiva (manifiestos Excel / CSV)
+
+    - Lee xlsx (openpyxl read_only) o csv sin pasar por el Chat ni por la IA
+    - Mapea encabezados a las columnas del histórico (difuso, corregible a mano)
+    - Valida cada fila con las reglas del Chat (_compute_status_from_draft)
+    - Clasifica con StockCalculator.aplicar_reglas_obsolescencia
+    - Envía todo en una sola escritura al buzón
+    """
+
+    # Columnas del histórico + las del borrador del Chat que no están en el Excel
+    COLUMNAS = StockTab.BASE_COLS + ("fecha_llegada", "pasillo", "estante", "repisa")
+    IGNORAR = "(ignorar)"
+    MAX_PREVIEW = 200
+
+    def __init__(self, github=None, ledger=None, chat_tab=None):
+        self.github = github or GitHubHandler()
+        self.ledger = ledger or StockLedger(Config.LEDGER_PATH)
+        self.chat_tab = chat_tab or ChatTab(github=self.github, ledger=self.ledger)
+
+    def _init_state(self):
+        """Estado por sesión: la instancia de la pestaña se comparte entre sesiones"""
+        st.session_state.setdefault("imp_huella", None)
+        st.session_state.setdefault("imp_encabezados", [])
+        st.session_state.setdefault("imp_registros", [])
+        st.session_state.setdefault("imp_lectura_seg", 0.0)
+        st.session_state.setdefault("imp_ultimo_envio", None)
+        st.session_state.setdefault("imp_uploader_key", "0")
+
+    # =========================
+    # UI
+    # =========================
+    def render(self):
+        self._init_state()
+
+        with st.container(border=True):
+            st.markdown("## 📥 Importación masiva")
+            st.caption("Sube el manifiesto de la guía (Excel o CSV): se valida y se envía al robot en un solo paso.")
+
+        if st.session_state.get("imp_ultimo_envio"):
+            st.success(st.session_state["imp_ultimo_envio"], icon="✅")
+
+        archivo = st.file_uploader(
+            "Manifiesto (.xlsx / .csv)", type=["xlsx", "xlsm", "csv"],
+            key=f"imp_archivo_{st.session_state['imp_uploader_key']}",
+        )
+        if archivo is None:
+            return
+
+        if not self._leer(archivo):
+            return
+
+        encabezados = st.session_state["imp_encabezados"]
+        registros = st.session_state["imp_registros"]
+        if not registros:
+            st.warning("No se encontraron filas con datos debajo del encabezado.")
+            return
+
+        mapa = self._render_mapeo(encabezados)
+        if not any(mapa.values()):
+            st.warning("Ninguna columna del archivo coincide con el histórico. Asígnalas en 'Columnas'.")
+            return
+
+        defaults = self._render_defaults(mapa)
+        items = self._preparar(registros, mapa, defaults)
+        self._render_resumen(items)
+
+    def _leer(self, archivo):
+        datos = archivo.getvalue()
+        huella = hashlib.blake2b(datos, digest_size=16).hexdigest()
+        if st.session_state.get("imp_huella") == huella:
+            return True
+
+        t0 = time.perf_counter()
+        try:
+            encabezados, registros = importador.leer_manifiesto(archivo.name, datos, self.COLUMNAS)
+        except Exception as e:
+            st.error(f"No se pudo leer el archivo: {e}")
+            return False
+
+        st.session_state["imp_huella"] = huella
+        st.session_state["imp_encabezados"] = encabezados
+        st.session_state["imp_registros"] = registros
+        st.session_state["imp_lectura_seg"] = time.perf_counter() - t0
+        st.session_state["imp_ultimo_envio"] = None
+        return True
+
+    def _render_mapeo(self, encabezados):
+        sugerido = importador.mapear_encabezados(encabezados, self.COLUMNAS)
+        opciones = [self.IGNORAR] + list(self.COLUMNAS)
+        huella = st.session_state["imp_huella"][:8]
+
+        mapa = {}
+        faltan = [c for c in encabezados if not sugerido.get(c)]
+        with st.expander(f"🧭 Columnas ({len(encabezados) - len(faltan)}/{len(encabezados)} reconocidas)", expanded=bool(faltan)):
+            cols = st.columns(3)
+            for i, enc in enumerate(encabezados):
+                with cols[i % 3]:
+                    elegido = st.selectbox(
+                        enc, opciones,
+                        index=opciones.index(sugerido.get(enc) or self.IGNORAR),
+                        key=f"imp_map_{huella}_{i}",
+                    )
+                mapa[enc] = None if elegido == self.IGNORAR else elegido
+        return mapa
+
+    def _render_defaults(self, mapa):
+        """Valores para lo que el archivo no trae (o trae vacío)"""
+        presentes = set(v for v in mapa.values() if v)
+        with st.container(border=True):
+            st.markdown("#### Datos de la guía")
+            c1, c2, c3, c4, c5 = st.columns(5)
+            with c1:
+                tipo = st.radio("Tipo", ["Recibido", "Enviado"], horizontal=True, key="imp_tipo",
+                                disabled="tipo" in presentes)
+            with c2:
+                guia = st.text_input("Guía", key="imp_guia")
+            with c3:
+                origen = st.text_input("Origen", key="imp_origen")
+            with c4:
+                destino = st.text_input("Destino", key="imp_destino")
+            with c5:
+                # Vacía por defecto: sin fecha, las filas Recibido quedan con faltantes
+                llegada = st.date_input("Fecha de llegada", value=None, key="imp_llegada",
+                                        help="Solo para las filas Recibido que no traen fecha.")
+        return {
+            "tipo": tipo, "guia": guia.strip(), "origen": origen.strip(), "destino": destino.strip(),
+            "fecha_llegada": llegada.strftime("%Y-%m-%d") if llegada else "",
+        }
+
+    def _preparar(self, registros, mapa, defaults):
+        # Hora Ecuador (UTC-5), igual que el Chat
+        ahora = (datetime.now(timezone.utc) - timedelta(hours=5)).strftime("%Y-%m-%d %H:%M")
+        llegada = defaults.get("fecha_llegada", "")
+        generales = {k: v for k, v in defaults.items() if k != "fecha_llegada"}
+        items = importador.normalizar_filas(registros, mapa, generales)
+        for it in items:
+            it["fecha_registro"] = it.get("fecha_registro") or ahora
+            # La fecha de llegada es de cada fila Recibido (con el tipo ya resuelto por fila)
+            if it["tipo"] == "Recibido" and not it.get("fecha_llegada") and llegada:
+                it["fecha_llegada"] = llegada
+        return StockCalculator.aplicar_reglas_obsolescencia(items)
+
+    def _render_resumen(self, items):
+        estados = [self.chat_tab._compute_status_from_draft([it]) for it in items]
+        duplicadas = importador.series_duplicadas(items)
+        completas = sum(1 for e in estados if e == "READY")
+        obsoletos = sum(1 for it in items if it.get("destino") == "CHATARRA / BAJA")
+
+        c1, c2, c3, c4, c5 = st.columns(5)
+        c1.metric("Filas", len(items))
+        c2.metric("Completas", completas)
+        c3.metric("Con faltantes", len(items) - completas)
+        c4.metric("Series repetidas", len(duplicadas))
+        c5.metric("A chatarrización", obsoletos)
+        st.caption(f"Lectura: {st.session_state['imp_lectura_seg']:.2f} s")
+
+        df = pd.DataFrame(items)
+        df.insert(0, "_estado", estados)
+        orden = ["_estado"] + [c for c in self.COLUMNAS if c in df.columns]
+        st.dataframe(df[orden].head(self.MAX_PREVIEW), use_container_width=True, hide_index=True, height=420)
+        if len(df) > self.MAX_PREVIEW:
+            st.caption(f"Vista previa de {self.MAX_PREVIEW} de {len(df)} filas.")
+
+        solo_completas = st.checkbox(
+            "Enviar solo las filas completas (READY)", value=True, key="imp_solo_completas",
+            help="Las filas con faltantes quedan fuera; corrígelas en el archivo o pásalas por el Chat.",
+        )
+        payload = [it for it, e in zip(items, estados) if e == "READY" or not solo_completas]
+        if duplicadas:
+            st.warning(f"Series repetidas en el archivo: {', '.join(sorted(duplicadas)[:10])}")
+
+        if st.button(f"🚀 Enviar {len(payload)} registros al buzón", type="primary",
+                     disabled=not payload, key="imp_enviar", use_container_width=True):
+            self._enviar(payload)
+
+    def _enviar(self, payload):
+        with st.spinner(f"Enviando {len(payload)} registros..."):
+            ok = self.github.enviar_a_buzon(payload)
+        if not ok:
+            st.error(self.github.explicar_fallo(
+                Config.FILE_BUZON, "❌ No se pudo enviar al buzón. Revisa token/permiso/red."
+            ))
+            return
+
+        # El stock los cuenta ya (provisional) hasta que el robot los pase al histórico
+        self.ledger.registrar_envio(payload)
+        st.session_state["imp_ultimo_envio"] = f"{len(payload)} registros enviados al Robot de la PC."
+        st.session_state["imp_huella"] = None
+        st.session_state["imp_encabezados"] = []
+        st.session_state["imp_registros"] = []
+        st.session_state["imp_uploader_key"] = str(datetime.now().timestamp())
+        st.rerun()
@@ -0,0 +1,47 @@
+import streamlit as st
+
+from modules.paginacion import VistaPaginada
+
+
+def controles_paginacion(vista: VistaPaginada, prefijo: str) -> int:
+    """
+    Selector de página + tamaño de página para una VistaPaginada.
+
+    El tamaño se guarda en session_state[f"{prefijo}_tam"] (leerlo antes de
+    crear la vista); la página se acota si el filtro dejó menos páginas.
+
+    Returns:
+        int: Página elegida (1-based)
+    """
+    key_pag = f"{prefijo}_pag"
+    st.session_state[key_pag] = vista.acotar(st.session_state.get(key_pag, 1))
+
+    c1, c2, c3 = st.columns([2.2, 1, 1], vertical_alignment="bottom")
+    with c2:
+        pagina = st.number_input(
+            f"Página (de {vista.paginas})",
+            min_value=1,
+            max_value=vista.paginas,
+            step=1,
+            key=key_pag,
+        )
+    with c3:
+        st.selectbox(
+            "Filas por página",
+            VistaPaginada.TAMANOS,
+            key=f"{prefijo}_tam",
+        )
+    with c1:
+        inicio, fin = vista.rango(pagina)
+        if vista.total:
+            st.caption(f"Mostrando **{inicio + 1}–{fin}** de **{vista.total}**")
+        else:
+            st.caption("Sin filas")
+
+    return int(pagina)
+
+
+def tamano_pagina(prefijo: str, defecto: int = 100) -> int:
+    """Tamaño elegido en controles_paginacion (o el defecto la primera vez)"""
+    st.session_state.setdefault(f"{prefijo}_tam", defecto)
+    return int(st.session_state[f"{prefijo}_tam"])
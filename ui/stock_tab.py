@@ -18,71 +18,60 @@ import streamlit as st
 import pandas as pd
 import datetime
 import io
+import re
 
 from modules.github_handler import GitHubHandler
 from modules.stock_calculator import StockCalculator
+from modules.recursos import registro
+from modules.stock_ledger import StockLedger
+from modules.indice_historico import IndiceHistorico
+from modules.historico_stream import HistoricoColumnar
+from modules.refresco_historico import RefrescoHistorico
+from modules.paginacion import VistaPaginada
+from ui.paginador import controles_paginacion, tamano_pagina
+from config.settings import Config
 
 
 class StockTab:
-    def __init__(self):
-        self.github = GitHubHandler()
+    # Columnas “oficiales” del histórico (mismo orden que el Excel); también las usa la importación
+    BASE_COLS = (
+        "fecha_registro",
+        "guia",
+        "tipo",
+        "origen",
+        "destino",
+        "categoria_item",
+        "equipo",
+        "marca",
+        "modelo",
+        "serie",
+        "estado",
+        "procesador",
+        "ram",
+        "disco",
+        "reporte",
+        "cantidad",
+    )
+
+    def __init__(self, github=None, ledger=None, indice=None, refresco=None):
+        self.github = github or GitHubHandler()
         self.stock_calc = StockCalculator()
+        self.ledger = ledger or StockLedger(Config.LEDGER_PATH)
+        self.indice = indice or IndiceHistorico()
+        self.refresco = refresco or RefrescoHistorico(
+            self.github, Config.FILE_HISTORICO, Config.REFRESCO_HISTORICO_SEG,
+            al_publicar=(self.ledger.sincronizar, self.indice.sincronizar),
+        )
+
+        self.base_cols = list(self.BASE_COLS)
 
-        # Columnas “oficiales” (las que quieres ver igual que Excel)
-        self.base_cols = [
-            "fecha_registro",
-            "guia",
-            "tipo",
-            "origen",
-            "destino",
-            "categoria_item",
-            "equipo",
-            "marca",
-            "modelo",
-            "serie",
-            "estado",
-            "procesador",
-            "ram",
-            "disco",
-            "reporte",
-            "cantidad",
-        ]
-
-        # state UX
+    def _init_state(self):
+        """Estado por sesión: la instancia de la pestaña se comparte entre sesiones"""
         st.session_state.setdefault("stk_query", "")
         st.session_state.setdefault("stk_scope", "Todo")
         st.session_state.setdefault("stk_show_details", False)
         st.session_state.setdefault("stk_debug", False)
-
-    # ---------------------------------------------------------
-    # ✅ FIX 1: Filtrar filas comando dentro del histórico
-    # ---------------------------------------------------------
-    def _filtrar_comandos(self, df: pd.DataFrame) -> pd.DataFrame:
-        if df is None or df.empty:
-            return df
-
-        d = df.copy()
-        d.columns = [str(c).strip().lower() for c in d.columns]
-
-        col_acc = None
-        if "action" in d.columns:
-            col_acc = "action"
-        elif "accion" in d.columns:
-            col_acc = "accion"
-
-        if col_acc:
-            acc = d[col_acc].astype(str).str.strip().str.lower()
-            comandos = acc.isin(["delete", "borrar_por_indices", "borrar_todo", "borrar"])
-            return d[~comandos].copy()
-
-        # fallback
-        if "indices" in d.columns:
-            ind = d["indices"].astype(str).str.strip()
-            comandos = ind.str.startswith("[") & ind.str.endswith("]") & (ind != "[]")
-            if "instruction" in d.columns or "source" in d.columns:
-                return d[~comandos].copy()
-
-        return d
+        st.session_state.setdefault("stk_orden", "Más recientes primero")
 
     # ---------------------------------------------------------
     # ✅ FIX 2: Sanear histórico antes del cálculo/UI
@@ -92,11 +81,13 @@ class StockTab:
             return pd.DataFrame()
 
         filas = []
+        posiciones = []  # índice = posición en historico.json (la usa el ledger)
         schema = self.base_cols[:]  # mismo orden
 
-        for x in hist:
+        for pos, x in enumerate(hist):
             if isinstance(x, dict):
                 filas.append(x)
+                posiciones.append(pos)
                 continue
 
             # Si te llegó como lista/tuple => convertir a dict por orden
@@ -105,8 +96,9 @@ class StockTab:
                 for i, k in enumerate(schema):
                     d[k] = x[i] if i < len(x) else ""
                 filas.append(d)
+                posiciones.append(pos)
 
-        df = pd.DataFrame(filas)
+        df = pd.DataFrame(filas, index=posiciones)
         if df.empty:
             return df
 
@@ -131,6 +123,7 @@ class StockTab:
     # UI principal
     # ---------------------------------------------------------
     def render(self):
+        self._init_state()
         self._inject_css()
 
         # Header pro y simple (usuario final)
@@ -141,6 +134,7 @@ class StockTab:
                 st.caption("Consulta lo disponible y revisa movimientos sin ver tecnicismos.")
             with c2:
                 if st.button("🔄 Refrescar", use_container_width=True, type="primary", key="stk_refresh_btn"):
+                    self.refresco.forzar()
                     st.rerun()
             with c3:
                 st.session_state["stk_show_details"] = st.toggle(
@@ -177,8 +171,12 @@ class StockTab:
                     key="stk_debug_toggle",
                 )
 
-        # Cargar histórico
-        hist = self.github.obtener_historico()
+        # Último snapshot del histórico (lo mantiene el hilo de refresco, sin esperar red)
+        snap = self.refresco.actual()
+        if snap is None:
+            st.error("❌ No pude leer el historial. Revisa conexión/token.")
+            return
+        hist = snap.registros
         if not hist:
             st.info("Aún no hay datos en el histórico.")
             return
@@ -189,38 +187,42 @@ class StockTab:
     # Core
     # ---------------------------------------------------------
     def _mostrar_datos(self, hist, show_debug=False):
-        # SANEAR + FILTRAR comandos
-        df_h_raw = self._sanear_historial(hist)
-        if df_h_raw.empty:
+        # Incremental: ledger (saldos/bodega/dañados) e índice (búsqueda/orden)
+        # solo procesan lo nuevo desde el último checkpoint (normalmente ya lo hizo
+        # el hilo de refresco antes de publicar el snapshot)
+        self.ledger.sincronizar(hist)
+        self.indice.sincronizar(hist)
+        if not self.indice.posiciones:
             st.info("Histórico vacío.")
             return
 
-        df_h_raw = self._filtrar_comandos(df_h_raw)
-
-        # Cálculo modular
-        st_res_raw, bod_res_raw, danados_res_raw, df_h_raw_out = self.stock_calc.calcular_stock_completo(df_h_raw)
-
-        # doble limpieza
-        if isinstance(df_h_raw_out, pd.DataFrame):
-            df_h_raw_out = self._filtrar_comandos(df_h_raw_out)
-            df_h_raw_out.columns = [str(c).strip().lower() for c in df_h_raw_out.columns]
-            for extra in ["action", "accion", "source", "instruction", "count", "indices"]:
-                if extra in df_h_raw_out.columns:
-                    df_h_raw_out = df_h_raw_out.drop(columns=[extra], errors="ignore")
-
-        # Normalizar para UI
-        df_h_view = self._normalize_historial(df_h_raw_out)
-        df_mov_view = self._movimientos_sin_destino_bodega(df_h_view)
-
+        st_res_raw = self.ledger.saldos_df()
         st_res_view = self._normalize_stock(st_res_raw, mode="stock")
-        bod_res_view = self._normalize_stock(bod_res_raw, mode="bodega")
-        danados_res_view = self._normalize_stock(danados_res_raw, mode="danados")
+
+        # Posiciones (no DataFrames) de cada tabla, en orden de fecha
+        orden = self.indice.orden("fecha_registro", descendente=(st.session_state["stk_orden"] == "Más recientes primero"))
+        # Regla JAHER: DESTINO='bodega' no se muestra en Movimientos
+        pos_mov = self.indice.seleccionar(orden, excluir=self.indice.exacto("destino", "bodega"))
+        pos_bod = self.indice.seleccionar(orden, incluir=self.ledger.bodega)
+        pos_dan = self.indice.seleccionar(orden, incluir=self.ledger.danados)
 
         # Métricas + resumen rápido (usuario final)
-        self._mostrar_metricas_top(df_h_view, df_mov_view, st_res_view, bod_res_view, danados_res_view)
+        self._mostrar_metricas_top(
+            len(self.indice.posiciones), len(pos_mov), st_res_view, len(pos_bod), len(pos_dan),
+            self._ultima_fecha(hist),
+        )
+
+        # Export Excel (4 hojas): se arma recién al presionar el botón
+        self._crear_boton_descarga(hist)
 
-        # Export Excel (4 hojas)
-        self._crear_boton_descarga(st_res_raw, bod_res_raw, danados_res_raw, df_h_raw_out)
+        # Orden de las tablas del histórico (lo resuelve el índice, no pandas)
+        st.radio(
+            "Orden",
+            ["Más recientes primero", "Más antiguos primero"],
+            horizontal=True,
+            key="stk_orden",
+            label_visibility="collapsed",
+        )
 
         # Tabs internas (estilo Stock Real)
         t_mov, t_stock, t_bod, t_dan = st.tabs(
@@ -246,12 +248,17 @@ class StockTab:
                     pass
             return df[mask].copy()
 
+        def filtrar_posiciones(pos, campos):
+            # Tablas del histórico: el filtro va al índice invertido, antes de materializar
+            if not q:
+                return pos
+            return self.indice.seleccionar(pos, incluir=self.indice.buscar(q, campos))
+
         # Render tabs (con filtros)
         with t_mov:
-            df = df_mov_view.copy()
-            if scope in ["Todo", "Movimientos"]:
-                df = apply_filter(df)
-            self._tab_movimientos(df, show_details=show_details, is_filtered=(bool(q) and scope in ["Todo", "Movimientos"]))
+            filtrado = bool(q) and scope in ["Todo", "Movimientos"]
+            pos = filtrar_posiciones(pos_mov, self.base_cols) if filtrado else pos_mov
+            self._tab_movimientos(self._vista(hist, pos, "movimientos", q if filtrado else ""), show_details=show_details, is_filtered=filtrado)
 
         with t_stock:
             df = st_res_view.copy()
@@ -260,61 +267,88 @@ class StockTab:
             self._tab_stock(df, is_filtered=(bool(q) and scope in ["Todo", "Stock"]))
 
         with t_bod:
-            df = bod_res_view.copy()
-            if scope in ["Todo", "Bodega"]:
-                df = apply_filter(df)
-            self._tab_bodega(df, show_details=show_details, is_filtered=(bool(q) and scope in ["Todo", "Bodega"]))
+            filtrado = bool(q) and scope in ["Todo", "Bodega"]
+            pos = filtrar_posiciones(pos_bod, IndiceHistorico.CAMPOS) if filtrado else pos_bod
+            self._tab_bodega(self._vista(hist, pos, "bodega", q if filtrado else ""), show_details=show_details, is_filtered=filtrado)
 
         with t_dan:
-            df = danados_res_view.copy()
-            if scope in ["Todo", "Dañados/Chatarras"]:
-                df = apply_filter(df)
-            self._tab_danados(df, show_details=show_details, is_filtered=(bool(q) and scope in ["Todo", "Dañados/Chatarras"]))
+            filtrado = bool(q) and scope in ["Todo", "Dañados/Chatarras"]
+            pos = filtrar_posiciones(pos_dan, IndiceHistorico.CAMPOS) if filtrado else pos_dan
+            self._tab_danados(self._vista(hist, pos, "danados", q if filtrado else ""), show_details=show_details, is_filtered=filtrado)
 
         # Debug opcional
         if show_debug:
             with st.expander("🧪 Debug (revisión técnica)", expanded=False):
-                st.write("df_h_raw (saneado):", df_h_raw.shape)
-                st.dataframe(df_h_raw.head(30), use_container_width=True)
-
-                if isinstance(df_h_raw_out, pd.DataFrame):
-                    st.write("df_h_raw_out:", df_h_raw_out.shape)
-                    st.dataframe(df_h_raw_out.head(30), use_container_width=True)
-
-                st.write("df_h_view:", df_h_view.shape)
-                st.dataframe(df_h_view.head(30), use_container_width=True)
-
-                st.write("df_mov_view:", df_mov_view.shape)
-                st.dataframe(df_mov_view.head(30), use_container_width=True)
+                st.write("Índice:", {
+                    "filas": len(self.indice.posiciones),
+                    "version": self.indice.version,
+                    "reconstrucciones": self.indice.reconstrucciones,
+                })
+                st.write("Refresco del histórico:", self.refresco.estado())
+                st.write("Escrituras a GitHub:", self.github.metricas_escritura())
+                st.write("Ledger:", {
+                    "bodega": len(self.ledger.bodega),
+                    "danados": len(self.ledger.danados),
+                    "provisionales": len(self.ledger.provisionales),
+                    "borrados_pendientes": len(self.ledger.borrados_pendientes),
+                })
+
+                muestra = self._materializar(hist, orden[:30].tolist(), "movimientos")
+                st.write("Primeras 30 filas (normalizadas):", muestra.shape)
+                st.dataframe(muestra, use_container_width=True)
 
                 if isinstance(st_res_raw, pd.DataFrame):
                     st.write("st_res_raw:", st_res_raw.shape)
                     st.dataframe(st_res_raw.head(30), use_container_width=True)
 
+                tiempos = registro.tiempos()
+                if tiempos:
+                    st.write("Recursos (creación única por proceso, seg):")
+                    st.json({k: round(v, 3) for k, v in tiempos.items()})
+
     # ---------------------------------------------------------
-    # Métricas + resumen (UX)
+    # Paginación (solo se arma la página visible + vecinas)
     # ---------------------------------------------------------
-    def _mostrar_metricas_top(self, df_h_view, df_mov_view, st_res_view, bod_res_view, danados_res_view):
-        total_hist = len(df_h_view)
-        total_mov = len(df_mov_view)
+    def _vista(self, hist, posiciones, tabla, q=""):
+        cache = st.session_state.setdefault(f"stk_cache_{tabla}", {})
+        return VistaPaginada(
+            posiciones,
+            lambda pos: self._materializar(hist, pos, tabla),
+            tamano=tamano_pagina(f"stk_{tabla}"),
+            cache=cache,
+            firma=(self.indice.version, self.ledger.version, st.session_state.get("stk_orden"), q),
+        )
+
+    def _materializar(self, hist, posiciones, tabla):
+        """Mismo pipeline que antes (sanear -> StockCalculator -> normalizar UI), solo para esas filas"""
+        if not posiciones:
+            return pd.DataFrame()
+        df = self._sanear_historial([hist[p] for p in posiciones])
+        df.index = posiciones
+        for c in self.base_cols:
+            if c not in df.columns:
+                df[c] = None
+        df = self.stock_calc.normalizar_historial(df)
+        if tabla == "movimientos":
+            return self._normalize_historial(df)
+        return self._normalize_stock(df, mode=tabla)
+
+    def _ultima_fecha(self, hist):
+        orden = self.indice.orden("fecha_registro", descendente=True)
+        if not len(orden):
+            return ""
+        dt = pd.to_datetime(pd.Series([hist[orden[0]].get("fecha_registro")]), errors="coerce", format="mixed").iloc[0]
+        return dt.strftime("%Y-%m-%d %H:%M") if pd.notna(dt) else ""
 
+    # ---------------------------------------------------------
+    # Métricas + resumen (UX)
+    # ---------------------------------------------------------
+    def _mostrar_metricas_top(self, total_hist, total_mov, st_res_view, total_bodega, total_danados, ultimo=""):
         total_stock = 0
         if isinstance(st_res_view, pd.DataFrame) and not st_res_view.empty:
             if "cantidad_disponible" in st_res_view.columns:
                 total_stock = int(pd.to_numeric(st_res_view["cantidad_disponible"], errors="coerce").fillna(0).sum())
 
-        total_bodega = len(bod_res_view) if isinstance(bod_res_view, pd.DataFrame) else 0
-        total_danados = len(danados_res_view) if isinstance(danados_res_view, pd.DataFrame) else 0
-
-        ultimo = ""
-        if "fecha_registro" in df_h_view.columns:
-            try:
-                ultimo_dt = pd.to_datetime(df_h_view["fecha_registro"], errors="coerce").max()
-                if pd.notna(ultimo_dt):
-                    ultimo = ultimo_dt.strftime("%Y-%m-%d %H:%M")
-            except Exception:
-                ultimo = ""
-
         with st.container(border=True):
             k1, k2, k3, k4 = st.columns(4)
             k1.metric("🧾 Movimientos", total_mov, help="Movimientos visibles (excluye DESTINO=bodega).")
@@ -359,16 +393,17 @@ class StockTab:
     # ---------------------------------------------------------
     # Tabs UI (más amigables)
     # ---------------------------------------------------------
-    def _tab_movimientos(self, df_view, show_details=False, is_filtered=False):
+    def _tab_movimientos(self, vista, show_details=False, is_filtered=False):
         with st.container(border=True):
             st.markdown("### 🧾 Movimientos")
             st.caption("Regla: DESTINO='bodega' no se muestra aquí (solo en Bodega).")
 
-            if df_view is None or df_view.empty:
+            if vista is None or vista.total == 0:
                 st.warning("No hay movimientos para mostrar.")
                 return
 
-            df_show = self._clean_nan_to_na(df_view.copy())
+            pagina = controles_paginacion(vista, "stk_movimientos")
+            df_show = self._clean_nan_to_na(vista.pagina(pagina))
 
             # columnas amigables
             base = ["fecha_registro", "guia", "tipo", "origen", "destino", "equipo", "marca", "modelo", "serie", "estado", "cantidad"]
@@ -380,7 +415,7 @@ class StockTab:
             if is_filtered:
                 st.info("Filtro aplicado a Movimientos.", icon="🔎")
 
-            st.dataframe(df_show[cols].tail(300), use_container_width=True, hide_index=True, height=560)
+            st.dataframe(df_show[cols], use_container_width=True, hide_index=True, height=560)
 
     def _tab_stock(self, st_res, is_filtered=False):
         with st.container(border=True):
@@ -403,16 +438,17 @@ class StockTab:
 
             st.dataframe(df[cols], use_container_width=True, hide_index=True, height=560)
 
-    def _tab_bodega(self, bod_res, show_details=False, is_filtered=False):
+    def _tab_bodega(self, vista, show_details=False, is_filtered=False):
         with st.container(border=True):
             st.markdown("### 🏢 Bodega (Cómputo)")
             st.caption("Aquí se ven equipos de cómputo que caen en Bodega (incluye DESTINO=bodega).")
 
-            if bod_res is None or bod_res.empty:
+            if vista is None or vista.total == 0:
                 st.info("No hay registros que caigan en Bodega.")
                 return
 
-            df = self._clean_nan_to_na(bod_res.copy())
+            pagina = controles_paginacion(vista, "stk_bodega")
+            df = self._clean_nan_to_na(vista.pagina(pagina))
 
             base = ["fecha_registro", "guia", "tipo", "origen", "destino", "equipo", "marca", "modelo", "serie", "estado"]
             cols = [c for c in base if c in df.columns]
@@ -423,18 +459,19 @@ class StockTab:
             if is_filtered:
                 st.info("Filtro aplicado a Bodega.", icon="🔎")
 
-            st.dataframe(df[cols].tail(300), use_container_width=True, hide_index=True, height=560)
+            st.dataframe(df[cols], use_container_width=True, hide_index=True, height=560)
 
-    def _tab_danados(self, danados_res, show_details=False, is_filtered=False):
+    def _tab_danados(self, vista, show_details=False, is_filtered=False):
         with st.container(border=True):
             st.markdown("### 🧯 Dañados / Chatarras / Bajas")
             st.caption("Aquí se agrupan equipos con estado de daño/obsolescencia.")
 
-            if danados_res is None or danados_res.empty:
+            if vista is None or vista.total == 0:
                 st.info("No hay registros marcados como dañados/chatarras/bajas.")
                 return
 
-            df = self._clean_nan_to_na(danados_res.copy())
+            pagina = controles_paginacion(vista, "stk_danados")
+            df = self._clean_nan_to_na(vista.pagina(pagina))
 
             base = ["fecha_registro", "guia", "tipo", "origen", "destino", "equipo", "marca", "modelo", "serie", "estado"]
             cols = [c for c in base if c in df.columns]
@@ -445,41 +482,62 @@ class StockTab:
             if is_filtered:
                 st.info("Filtro aplicado a Dañados/Chatarras.", icon="🔎")
 
-            st.dataframe(df[cols].tail(400), use_container_width=True, hide_index=True, height=560)
+            st.dataframe(df[cols], use_container_width=True, hide_index=True, height=560)
 
     # ---------------------------------------------------------
     # Export
     # ---------------------------------------------------------
-    def _crear_boton_descarga(self, st_res, bod_res, danados_res, df_h):
+    def _datos_completos(self, hist):
+        """
+        Las 4 tablas completas (para el Excel). Es el cálculo caro de antes;
+        solo corre al descargar, no en cada rerun.
+        """
+        # Solo las columnas que se muestran (snapshot Parquet si está al día);
+        # si no se pudo leer, columnar desde el histórico ya cargado
+        df_h_raw = self.github.obtener_historico_columnas(self.base_cols)
+        if df_h_raw is None:
+            df_h_raw = HistoricoColumnar.desde(hist).dataframe()
+        df_h = self.stock_calc.normalizar_historial(df_h_raw)
+        return (
+            self.ledger.saldos_df(),
+            self.ledger.filas(df_h, "bodega"),
+            self.ledger.filas(df_h, "danados"),
+            df_h,
+        )
+
+    def _crear_boton_descarga(self, hist):
         with st.container(border=True):
             c1, c2 = st.columns([3, 1.4], vertical_alignment="center")
             with c1:
                 st.markdown("### 📥 Exportar Excel")
                 st.caption("Descarga un Excel con 4 hojas: MOVIMIENTOS, STOCK_SALDOS, BODEGA, DANADOS_CHATARRA.")
             with c2:
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                    pd.DataFrame(df_h).to_excel(writer, index=False, sheet_name="MOVIMIENTOS")
-
-                    if isinstance(st_res, pd.DataFrame) and not st_res.empty:
-                        st_res.to_excel(writer, index=False, sheet_name="STOCK_SALDOS")
-                    else:
-                        pd.DataFrame().to_excel(writer, index=False, sheet_name="STOCK_SALDOS")
-
-                    if isinstance(bod_res, pd.DataFrame) and not bod_res.empty:
-                        bod_res.to_excel(writer, index=False, sheet_name="BODEGA")
-                    else:
-                        pd.DataFrame().to_excel(writer, index=False, sheet_name="BODEGA")
-
-                    if isinstance(danados_res, pd.DataFrame) and not danados_res.empty:
-                        danados_res.to_excel(writer, index=False, sheet_name="DANADOS_CHATARRA")
-                    else:
-                        pd.DataFrame().to_excel(writer, index=False, sheet_name="DANADOS_CHATARRA")
+                def generar_excel():
+                    st_res, bod_res, danados_res, df_h = self._datos_completos(hist)
+                    buffer = io.BytesIO()
+                    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+                        pd.DataFrame(df_h).to_excel(writer, index=False, sheet_name="MOVIMIENTOS")
+
+                        if isinstance(st_res, pd.DataFrame) and not st_res.empty:
+                            st_res.to_excel(writer, index=False, sheet_name="STOCK_SALDOS")
+                        else:
+                            pd.DataFrame().to_excel(writer, index=False, sheet_name="STOCK_SALDOS")
+
+                        if isinstance(bod_res, pd.DataFrame) and not bod_res.empty:
+                            bod_res.to_excel(writer, index=False, sheet_name="BODEGA")
+                        else:
+                            pd.DataFrame().to_excel(writer, index=False, sheet_name="BODEGA")
+
+                        if isinstance(danados_res, pd.DataFrame) and not danados_res.empty:
+                            danados_res.to_excel(writer, index=False, sheet_name="DANADOS_CHATARRA")
+                        else:
+                            pd.DataFrame().to_excel(writer, index=False, sheet_name="DANADOS_CHATARRA")
+                    return buffer.getvalue()
 
                 timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
                 st.download_button(
                     label="📥 Descargar Excel",
-                    data=buffer.getvalue(),
+                    data=generar_excel,
                     file_name=f"Inventario_Jaher_{timestamp}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                     type="primary",
@@ -557,16 +615,6 @@ class StockTab:
 
         return self._clean_nan_to_na(df)
 
-    def _movimientos_sin_destino_bodega(self, df_view: pd.DataFrame):
-        if df_view is None or df_view.empty:
-            return df_view
-        if "destino" not in df_view.columns:
-            return df_view
-
-        df = df_view.copy()
-        dest = df["destino"].astype(str).str.strip().str.lower()
-        return df[dest != "bodega"].copy()
-
     # ---------------------------------------------------------
     # CSS (usuario final)
     # ---------------------------------------------------------
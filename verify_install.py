@@ -51,7 +51,8 @@ def verificar_dependencias():
         ('openai', 'openai'),
         ('pandas', 'pandas'),
         ('requests', 'requests'),
-        ('xlsxwriter', 'xlsxwriter')
+        ('xlsxwriter', 'xlsxwriter'),
+        ('pyarrow', 'pyarrow')
     ]
     
     faltantes = []